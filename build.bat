@@ -4,27 +4,44 @@ REM Build script for LOLOS
 echo Building LOLOS...
 echo.
 
+REM Memory size in KB (set MSIZE=48 before running for a 48K system)
+if "%MSIZE%"=="" set MSIZE=64
+
 REM Create output directory
 if not exist build mkdir build
 
+REM Size the system: assemble at the last layout, then pack the layout
+REM against the sizes in the new listings (tools\layout.py)
+echo Sizing system for %MSIZE%K...
+python tools\layout.py --msize %MSIZE%
+if errorlevel 1 goto error
+tools\zmac.exe -8 -I build --od build --oo cim,lst src\bios.asm
+if errorlevel 1 goto error
+tools\zmac.exe -8 -I build --od build --oo cim,lst src\bdos.asm
+if errorlevel 1 goto error
+tools\zmac.exe -8 -I build --od build --oo cim,lst src\ccp.asm
+if errorlevel 1 goto error
+python tools\layout.py --msize %MSIZE%
+if errorlevel 1 goto error
+
 REM Assemble boot loader
 echo Assembling boot loader...
-tools\zmac.exe -8 --od build --oo cim,lst src\boot.asm
+tools\zmac.exe -8 -I build --od build --oo cim,lst src\boot.asm
 if errorlevel 1 goto error
 
 REM Assemble BIOS
 echo Assembling BIOS...
-tools\zmac.exe -8 --od build --oo cim,lst src\bios.asm
+tools\zmac.exe -8 -I build --od build --oo cim,lst src\bios.asm
 if errorlevel 1 goto error
 
 REM Assemble BDOS
 echo Assembling BDOS...
-tools\zmac.exe -8 --od build --oo cim,lst src\bdos.asm
+tools\zmac.exe -8 -I build --od build --oo cim,lst src\bdos.asm
 if errorlevel 1 goto error
 
 REM Assemble CCP
 echo Assembling CCP...
-tools\zmac.exe -8 --od build --oo cim,lst src\ccp.asm
+tools\zmac.exe -8 -I build --od build --oo cim,lst src\ccp.asm
 if errorlevel 1 goto error
 
 REM Create disk image
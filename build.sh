@@ -21,24 +21,36 @@ else
     ZMAC="zmac"
 fi
 
+# Memory size in KB (MSIZE=48 ./build.sh for a 48K system)
+MSIZE=${MSIZE:-64}
+
 # Create output directory
 mkdir -p build
 
+# Size the system: assemble at the last layout, then pack the layout
+# against the sizes in the new listings (tools/layout.py)
+echo "Sizing system for ${MSIZE}K..."
+python3 tools/layout.py --msize $MSIZE
+$ZMAC -8 -I build --od build --oo cim,lst src/bios.asm
+$ZMAC -8 -I build --od build --oo cim,lst src/bdos.asm
+$ZMAC -8 -I build --od build --oo cim,lst src/ccp.asm
+python3 tools/layout.py --msize $MSIZE
+
 # Assemble boot loader
 echo "Assembling boot loader..."
-$ZMAC -8 --od build --oo cim,lst src/boot.asm
+$ZMAC -8 -I build --od build --oo cim,lst src/boot.asm
 
 # Assemble BIOS
 echo "Assembling BIOS..."
-$ZMAC -8 --od build --oo cim,lst src/bios.asm
+$ZMAC -8 -I build --od build --oo cim,lst src/bios.asm
 
 # Assemble BDOS
 echo "Assembling BDOS..."
-$ZMAC -8 --od build --oo cim,lst src/bdos.asm
+$ZMAC -8 -I build --od build --oo cim,lst src/bdos.asm
 
 # Assemble CCP
 echo "Assembling CCP..."
-$ZMAC -8 --od build --oo cim,lst src/ccp.asm
+$ZMAC -8 -I build --od build --oo cim,lst src/ccp.asm
 
 # Create disk image
 echo
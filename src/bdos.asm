@@ -5,14 +5,11 @@
 ;===============================================================================
 
 ;-------------------------------------------------------------------------------
-; System Constants (must match BIOS)
+; System Constants
 ;-------------------------------------------------------------------------------
 
-MSIZE   EQU     64
-BIAS    EQU     (MSIZE-20)*1024
-CCP     EQU     3400H+BIAS
-BDOS    EQU     CCP+0800H
-BIOS    EQU     CCP+1600H
+; Memory layout: MSIZE, CCP, BDOS, BIOS (generated by tools/layout.py)
+        INCLUDE layout.inc
 
 ; Page zero
 IOBYTE  EQU     0003H
@@ -37,6 +34,12 @@ BREAD   EQU     BIOS+27H
 BWRITE  EQU     BIOS+2AH
 BLISTST EQU     BIOS+2DH
 BSECTRN EQU     BIOS+30H
+BSTATS  EQU     BIOS+33H        ; Pointer to the BIOS I/O statistics block
+
+; BDOS counters in the BIOS I/O statistics block (byte offsets)
+STDRD   EQU     1+7*4           ; Directory sector reads
+STDHIT  EQU     1+8*4           ; Directory cache hits
+STLOG   EQU     1+9*4           ; ALV rebuilds
 
 ; ASCII codes
 CR      EQU     0DH
@@ -53,6 +56,11 @@ CTRLX   EQU     18H             ; Delete line (alt)
 CTRLZ   EQU     1AH             ; End of file
 DEL     EQU     7FH             ; Delete/rubout
 
+; Extent cache (random I/O)
+NEXC    EQU     4               ; Entries
+EXCSIZ  EQU     34              ; Age, drive, user, name, EX through D15
+EXCDAT  EQU     14              ; Offset of EX through D15 in an entry
+
 ;-------------------------------------------------------------------------------
 ; BDOS Entry Point
 ;-------------------------------------------------------------------------------
@@ -79,8 +87,8 @@ BDOSENT:
         LXI     SP, BDOSSK      ; Switch to BDOS stack
 
         MOV     A, C
-        CPI     41              ; Check function range
-        JNC     BFRET           ; Return if >= 41
+        CPI     45              ; Check function range
+        JNC     BFRET           ; Return if >= 45
 
         MOV     E, A            ; Function number in E
         MVI     D, 0
@@ -163,6 +171,10 @@ FTABLE:
         DW      BFRET           ; 38 - (not used in 2.2)
         DW      BFRET           ; 39 - (not used in 2.2)
         DW      FUNC40          ; 40 - Write random with zero fill
+        DW      BFRET           ; 41 - (not implemented)
+        DW      BFRET           ; 42 - (not implemented)
+        DW      BFRET           ; 43 - (not implemented)
+        DW      FUNC44          ; 44 - Set multi-sector count (CP/M 3)
 
 ;-------------------------------------------------------------------------------
 ; Console I/O Functions (0-12)
@@ -466,7 +478,7 @@ F09LP:
 ;
 ; Notes:
 ;   - CR/LF is echoed but not stored in buffer
-;   - ^C causes warm boot
+;   - ^C as the first character causes warm boot (elsewhere it is ignored)
 ;-------------------------------------------------------------------------------
 
 FUNC10:
@@ -509,6 +521,9 @@ F10LP:
         CPI     CTRLE           ; Physical end of line?
         JZ      F10PE
 
+        CPI     CTRLC           ; Warm boot?
+        JZ      F10CC
+
         CPI     ' '             ; Control char?
         JC      F10LP           ; Ignore other control chars
 
@@ -595,6 +610,13 @@ F10RT:
         ; Retype... skip for now
         JMP     F10LP
 
+F10CC:
+        ; ^C warm boots only as the first character of the line
+        MOV     A, C
+        ORA     A
+        JZ      WBOOT
+        JMP     F10LP
+
 F10PE:
         ; Physical end of line - CR/LF but continue
         PUSH    B
@@ -792,6 +814,7 @@ CSTRT:
 ;   DMADDR  - Reset to 0080H
 ;   LOGINV  - Cleared to 0
 ;   ROVEC   - Cleared to 0
+;   DIRCDSK - FFH (no directory sector cached)
 ;
 ; Clobbers:
 ;   BC, DE, HL, flags
@@ -810,6 +833,10 @@ FUNC13:
         LXI     H, 0
         SHLD    LOGINV
         SHLD    ROVEC
+        ; Disks may have been changed, drop the cached directory sector
+        MVI     A, 0FFH
+        STA     DIRCDSK
+        CALL    EXCCLR          ; and the cached extents
         JMP     BFRET
 
 ;-------------------------------------------------------------------------------
@@ -842,15 +869,18 @@ FUNC14:
 ; SELDRIVE - Select drive and initialize if needed (internal)
 ;-------------------------------------------------------------------------------
 ; Description:
-;   Selects a disk drive via BIOS and initializes its allocation vector
-;   if this is the first login. Updates the login vector.
+;   Selects a disk drive via BIOS and logs it in (LOGIN) if it is not
+;   yet in the login vector. Updates the login vector.
 ;
 ; Input:
 ;   A       - [REQ] Drive number (0=A, 1=B, etc.)
 ;
 ; Output:
 ;   HL      - DPH address, or 0 if invalid drive
+;   CURDSK  - Set to drive number
 ;   CURDPH  - Updated with DPH address
+;   CDIRBF  - Copy of the DPH's DIRBF, DPB, CSV and ALV pointers
+;   CURDPB  - Copy of the drive's DPB (CSPT..COFF)
 ;   LOGINV  - Bit set for selected drive
 ;
 ; Clobbers:
@@ -858,28 +888,52 @@ FUNC14:
 ;-------------------------------------------------------------------------------
 
 SELDRIVE:
+        STA     CURDSK
         MOV     C, A
         MVI     E, 0            ; First select
         CALL    BSELDSK
         MOV     A, H
         ORA     L
         RZ                      ; Return if invalid
+        ; Copy the DPH pointers and DPB so lookups need no pointer chase
+        XCHG
+        LHLD    CURDPH
+        MOV     A, L
+        SUB     E
+        MOV     L, A
+        MOV     A, H
+        SBB     D
+        ORA     L
+        XCHG
+        JZ      SELD2           ; Same DPH, CURDPB is already current
         SHLD    CURDPH          ; Save DPH
-        ; Mark drive as logged in
-        LDA     CDISK
-        CALL    BITMASK         ; B = mask for drive
+        LXI     D, 8
+        DAD     D               ; HL = DPH+8 (DIRBF, DPB, CSV, ALV)
+        LXI     D, CDIRBF
+        MVI     B, 8
+        CALL    COPYB
+        LHLD    CDPBA           ; HL = DPB
+        LXI     D, CURDPB
+        MVI     B, 15
+        CALL    COPYB
+SELD2:
         ; Check if already logged in
-        LDA     LOGINV
+        LDA     CURDSK
+        LXI     H, LOGINV
+        CALL    VECBIT          ; HL = LOGINV byte, B = mask
+        MOV     A, M
         ANA     B
         JNZ     SELD3           ; Already logged in, skip init
-        ; First login - initialize ALV
+        ; First login since reset - check or rebuild the ALV
+        PUSH    H
         PUSH    B
-        CALL    INITALV
+        CALL    LOGIN
         POP     B
-SELD3:
-        LDA     LOGINV
+        POP     H
+        MOV     A, M            ; Mark drive as logged in
         ORA     B
-        STA     LOGINV
+        MOV     M, A
+SELD3:
         LHLD    CURDPH
         RET
 
@@ -907,57 +961,157 @@ SELD3:
 ;
 ; Notes:
 ;   - Extent byte (FCB+12) must match directory entry
+;   - S2 is cleared first, so the open is of extent EX of the first 512K
 ;   - Drive byte: 0=default, 1=A:, 2=B:, etc.
 ;-------------------------------------------------------------------------------
 
 FUNC15:
         CALL    SETFCB
-        ; Get extent from user's FCB
-        LHLD    CURFCB
-        LXI     D, 12
-        DAD     D
-        MOV     A, M            ; A = requested extent
-        STA     OPENEXT         ; Save for comparison
-        XRA     A
-        STA     SEARCHI         ; Start from entry 0
-F15LP:
-        CALL    SEARCH          ; Find directory entry
+        MVI     E, 14
+        CALL    FCBFLD
+        MVI     M, 0            ; S2 = 0, open starts at extent EX
+        CALL    FINDEXT         ; Find entry for the FCB's extent
         CPI     0FFH
         JZ      F15NF           ; Not found
+        CALL    LOADEXT         ; Copy directory data to FCB
+        MVI     E, 32
+        CALL    FCBFLD
+        MOV     M, A            ; Clear CR (current record)
+        MVI     L, 0            ; Return directory code
+        JMP     SETRET
+F15NF:
+        MVI     A, 0FFH
+        JMP     SETLA
+
+;-------------------------------------------------------------------------------
+; FINDEXT - Find the directory entry for the FCB's extent (internal)
+;-------------------------------------------------------------------------------
+; Description:
+;   Searches for an entry matching the FCB's filename, EX and S2. The
+;   search starts at the directory sector hint kept in FCB S1 and wraps
+;   to entry 0 once, so the next extent of a file is usually found a
+;   few entries after the current one.
+;
+; Input:
+;   CURFCB  - [REQ] FCB with filename, EX, S1 (directory sector hint) and S2
+;
+; Output:
+;   A       - Directory code (0-3) if found, FFH if not found
+;   DIRPTR  - Points to matched entry in the directory buffer
+;   DIRSEC  - Sector of the matched entry
+;
+; Clobbers:
+;   BC, DE, HL, flags
+;
+; Notes:
+;   - Any hint gives the right entry; a stale one only costs a longer scan
+;   - When nothing matches, entries past the hint are searched twice
+;-------------------------------------------------------------------------------
+
+FINDEXT:
+        MVI     E, 12
+        CALL    FCBFLD
+        MOV     A, M            ; A = extent to find
+        STA     OPENEXT
+        INX     H
+        INX     H
+        MOV     A, M
+        STA     OPENS2          ; and its S2
+        DCX     H
+        MOV     L, M            ; S1 = directory sector hint
+        MVI     H, 0
+        DAD     H
+        DAD     H               ; HL = first entry of that sector
+        SHLD    SEARCHI
+        MOV     A, H
+        ORA     L
+        STA     FXWRAP          ; Non-zero if entries before it remain
+FXLP:
+        CALL    SEARCH
+        CPI     0FFH
+        JZ      FXEND
         ; Check if extent matches
         LHLD    DIRPTR
         LXI     D, 12
-        DAD     D               ; HL = dir entry + 12 (extent)
+        DAD     D
         MOV     A, M            ; A = directory extent
         ANI     1FH             ; Mask to extent bits (0-31)
         MOV     B, A
         LDA     OPENEXT
         ANI     1FH
-        CMP     B               ; Compare extents
-        JNZ     F15LP           ; Not matching extent, try next
-        ; Found matching extent - copy directory data to FCB
-        LHLD    CURFCB
-        LXI     D, 12           ; Skip to extent field
-        DAD     D
+        CMP     B
+        JNZ     FXLP            ; Wrong extent, keep searching
+        INX     H
+        INX     H
+        LDA     OPENS2
+        CMP     M
+        JNZ     FXLP            ; Wrong S2
+        LDA     DIRENT
+        RET
+FXEND:
+        LXI     H, FXWRAP
+        MOV     A, M
+        MVI     M, 0
+        ORA     A
+        MVI     A, 0FFH
+        RZ                      ; Whole directory searched
+        LXI     H, 0
+        SHLD    SEARCHI         ; Wrap to entry 0
+        JMP     FXLP
+
+; LOADEXT - Load the entry found by FINDEXT into the FCB
+; Input: CURFCB, DIRPTR, DIRSEC  Output: A=0, FCB EX through D15 and S1 set, extent cached  Clobbers: BC, DE, HL, flags
+LOADEXT:
+        MVI     E, 12
+        CALL    FCBFLD
         XCHG                    ; DE = FCB+12
         LHLD    DIRPTR
         LXI     B, 12
         DAD     B               ; HL = dir entry + 12
-        MVI     B, 21           ; Copy EX through allocation
+        MVI     B, 20           ; Copy EX through allocation
         CALL    COPYB
-        LHLD    CURFCB
-        LXI     D, 32
+        CALL    SETHINT         ; S1 = entry's directory sector
+        CALL    EXCPUT
+        XRA     A
+        RET
+
+; SETHINT - Store the directory sector of the current entry in FCB S1
+; Input: CURFCB, DIRSEC  Output: (FCB S1 set)  Clobbers: A, DE, HL
+SETHINT:
+        MVI     E, 13
+        CALL    FCBFLD
+        LDA     DIRSEC
+        MOV     M, A
+        RET
+
+; CLSEXT - Write the FCB's extent back to its directory entry
+; Input: CURFCB  Output: A=0 if written, FFH if not found  Clobbers: BC, DE, HL, flags
+CLSEXT:
+        CALL    FINDEXT
+        CPI     0FFH
+        RZ
+        ; Update directory entry from FCB
+        MVI     E, 12
+        CALL    FCBFLD          ; HL = FCB+12
+        XCHG                    ; DE = FCB+12
+        LHLD    DIRPTR
+        LXI     B, 12
+        DAD     B               ; HL = dir+12
+        XCHG                    ; Swap: HL=FCB+12, DE=dir+12
+        MVI     B, 20           ; Copy EX through allocation (not CR)
+        CALL    COPYB
+        LHLD    DIRPTR
+        LXI     D, 13
         DAD     D
+        MVI     M, 0            ; The S1 hint is not kept on disk
+        CALL    WRITEDIR        ; Write directory sector back
+        CALL    EXCPUT          ; Directory now matches the FCB
         XRA     A
-        MOV     M, A            ; Clear CR (current record)
-        MVI     L, 0            ; Return directory code
-        JMP     SETRET
-F15NF:
-        MVI     A, 0FFH
-        JMP     SETLA
+        RET
 
-OPENEXT: DS     1               ; Requested extent for OPEN
-CLOSEXT: DS     1               ; Extent for CLOSE
+OPENEXT: DS     1               ; Extent wanted by FINDEXT
+OPENS2: DS      1               ; S2 wanted by FINDEXT
+FXWRAP: DS      1               ; Non-zero until FINDEXT has wrapped
 
 ;-------------------------------------------------------------------------------
 ; FUNC16 - Close file (BDOS Function 16)
@@ -981,46 +1135,14 @@ CLOSEXT: DS     1               ; Extent for CLOSE
 ;
 ; Notes:
 ;   - Must match both filename and extent number
-;   - Updates EX, S1, S2, RC and allocation map in directory
+;   - Updates EX, S2, RC and allocation map in directory (S1 is stored as 0)
 ;-------------------------------------------------------------------------------
 
 FUNC16:
         CALL    SETFCB
-        ; Get extent from user's FCB
-        LHLD    CURFCB
-        LXI     D, 12
-        DAD     D
-        MOV     A, M            ; A = FCB's extent
-        STA     CLOSEXT         ; Save for comparison
-        XRA     A
-        STA     SEARCHI         ; Start from entry 0
-F16LP:
-        CALL    SEARCH
+        CALL    CLSEXT          ; Find the extent's entry and update it
         CPI     0FFH
         JZ      F16NF
-        ; Check if extent matches
-        LHLD    DIRPTR
-        LXI     D, 12
-        DAD     D
-        MOV     A, M
-        ANI     1FH
-        MOV     B, A
-        LDA     CLOSEXT
-        ANI     1FH
-        CMP     B
-        JNZ     F16LP           ; Not matching extent, try next
-        ; Update directory entry from FCB
-        LHLD    CURFCB
-        LXI     D, 12
-        DAD     D               ; HL = FCB+12
-        XCHG                    ; DE = FCB+12
-        LHLD    DIRPTR
-        LXI     B, 12
-        DAD     B               ; HL = dir+12
-        XCHG                    ; Swap: HL=FCB+12, DE=dir+12
-        MVI     B, 20           ; Copy EX through allocation (not CR)
-        CALL    COPYB
-        CALL    WRITEDIR        ; Write directory sector back
         MVI     L, 0
         JMP     SETRET
 F16NF:
@@ -1055,8 +1177,8 @@ F16NF:
 
 FUNC17:
         CALL    SETFCB
-        XRA     A
-        STA     SEARCHI         ; Start from entry 0
+        LXI     H, 0
+        SHLD    SEARCHI         ; Start from entry 0
         ; Fall through to search next
 
 ;-------------------------------------------------------------------------------
@@ -1091,7 +1213,7 @@ FUNC18:
         PUSH    PSW
         LHLD    DMADDR
         XCHG                    ; DE = DMA address
-        LXI     H, DIRBUF
+        LHLD    CDIRBF
         MVI     B, 128
         CALL    COPYB
         POP     PSW
@@ -1120,13 +1242,13 @@ F18NF:
 ;
 ; Notes:
 ;   - Marks entries with E5H (deleted)
-;   - Does not free disk blocks (freed on next INITALV)
+;   - Frees the entries' blocks in the ALV
 ;-------------------------------------------------------------------------------
 
 FUNC19:
         CALL    SETFCB
-        XRA     A
-        STA     SEARCHI
+        LXI     H, 0
+        SHLD    SEARCHI
 F19LP:
         CALL    SEARCH
         CPI     0FFH
@@ -1134,9 +1256,26 @@ F19LP:
         ; Mark entry as deleted
         CALL    GETDIRENT
         MVI     M, 0E5H         ; E5 = deleted
+        XRA     A
+        STA     BLKOP
+        CALL    MAPENT          ; Free its blocks
         CALL    WRITEDIR
+        ; Lower the free-slot rover to this entry if it is below it
+        CALL    DROVPTR
+        LDA     SRCHCUR
+        SUB     M
+        INX     H
+        LDA     SRCHCUR+1
+        SBB     M
+        JNC     F19LP           ; Entry is at or past the rover
+        LDA     SRCHCUR+1
+        MOV     M, A
+        DCX     H
+        LDA     SRCHCUR
+        MOV     M, A
         JMP     F19LP
 F19DN:
+        CALL    EXCCLR          ; Cached extents may be gone
         MVI     L, 0
         JMP     SETRET
 
@@ -1144,8 +1283,10 @@ F19DN:
 ; FUNC20 - Read sequential (BDOS Function 20)
 ;-------------------------------------------------------------------------------
 ; Description:
-;   Reads the next 128-byte record from the file. Automatically advances
-;   to the next extent when the current extent is exhausted.
+;   Reads the next record from the file, or the next MULTCNT records
+;   (F44) into consecutive 128-byte buffers from the DMA address.
+;   Automatically advances to the next extent when the current extent is
+;   exhausted.
 ;
 ; Input:
 ;   C       - [REQ] Function number (20)
@@ -1154,9 +1295,9 @@ F19DN:
 ; Output:
 ;   A       - 0 on success, 1 on EOF/error
 ;   L       - Same as A
-;   H       - 0
-;   DMA     - 128 bytes of file data (on success)
-;   FCB     - CR incremented, extent updated if needed
+;   H       - Records read before an error (0 on success)
+;   DMA     - 128 bytes of file data per record read
+;   FCB     - CR advanced, extent updated if needed
 ;
 ; Clobbers:
 ;   BC, DE, flags
@@ -1164,13 +1305,16 @@ F19DN:
 ; Notes:
 ;   - CR (FCB+32) is the current record within extent
 ;   - Extent auto-advances when CR reaches 128
+;   - The DMA address itself is not changed (SETFCB copies it to XDMA)
 ;-------------------------------------------------------------------------------
 
 FUNC20:
         CALL    SETFCB
-        LHLD    CURFCB
-        LXI     D, 32
-        DAD     D               ; HL = FCB+32 (CR)
+        LDA     MULTCNT
+        STA     MLEFT           ; Records to read
+F20LP:
+        MVI     E, 32
+        CALL    FCBFLD          ; HL = FCB+32 (CR)
         MOV     A, M            ; Get current record
         PUSH    H               ; Save CR pointer
         CALL    READREC         ; Read record A from current extent
@@ -1183,96 +1327,36 @@ FUNC20:
         JC      F20OK
         ; Need next extent
         MVI     M, 0            ; Reset CR
-        LHLD    CURFCB
-        LXI     D, 12
-        DAD     D               ; HL = extent byte
-        INR     M               ; Increment extent
+        CALL    NEXTEX          ; Step to the next extent
         ; Re-open file to load next extent's data
         CALL    F20OPN          ; Open next extent
         ORA     A
         JNZ     F20EOF          ; No more extents = EOF
 F20OK:
+        CALL    MNEXT
+        JNZ     F20LP           ; More records
         MVI     L, 0
         JMP     SETRET
 F20ERR:
-        MVI     A, 1
-        JMP     SETLA
 F20EOF:
         MVI     A, 1            ; Return 1 = EOF
-        JMP     SETLA
+        JMP     MERR
 
 ; F20OPN - Open next extent for reading
 ; Searches directory for matching filename and extent, loads allocation map
 ; Returns: A=0 if found, A=FFH if not found
 F20OPN:
-        ; Get extent from FCB
-        LHLD    CURFCB
-        LXI     D, 12
-        DAD     D
-        MOV     A, M            ; A = extent to find
-        STA     OPENEXT         ; Save for comparison
-        XRA     A
-        STA     SEARCHI         ; Start search from beginning
-F20OLP:
-        CALL    SEARCH          ; Search for filename match
+        CALL    FINDEXT         ; Search from the current extent's sector
         CPI     0FFH
         RZ                      ; Not found - return FFH
-        ; Check if extent matches
-        LHLD    DIRPTR
-        LXI     D, 12
-        DAD     D
-        MOV     A, M            ; A = directory extent
-        ANI     1FH             ; Mask extent bits
-        MOV     B, A
-        LDA     OPENEXT
-        ANI     1FH
-        CMP     B
-        JNZ     F20OLP          ; Wrong extent, keep searching
-        ; Found matching extent - copy data to FCB
-        ; Copy extent byte, S1, S2, RC
-        LHLD    DIRPTR
-        LXI     D, 12
-        DAD     D               ; HL = dir entry extent
-        XCHG                    ; DE = dir entry extent
-        LHLD    CURFCB
-        PUSH    H               ; Save FCB base
-        LXI     B, 12
-        DAD     B               ; HL = FCB extent
-        XCHG                    ; DE = FCB extent, HL = dir extent
-        MVI     B, 4            ; Copy 4 bytes (EX, S1, S2, RC)
-F20OC1:
-        MOV     A, M
-        STAX    D
-        INX     H
-        INX     D
-        DCR     B
-        JNZ     F20OC1
-        ; Copy allocation map (16 bytes)
-        POP     H               ; HL = FCB base
-        PUSH    H
-        LXI     D, 16
-        DAD     D               ; HL = FCB allocation map
-        XCHG                    ; DE = FCB alloc map
-        LHLD    DIRPTR
-        LXI     B, 16
-        DAD     B               ; HL = dir alloc map
-        MVI     B, 16
-F20OC2:
-        MOV     A, M
-        STAX    D
-        INX     H
-        INX     D
-        DCR     B
-        JNZ     F20OC2
-        POP     H               ; Clean up stack
-        XRA     A               ; Return 0 = success
-        RET
+        JMP     LOADEXT         ; Copy data to FCB, return 0
 
 ;-------------------------------------------------------------------------------
 ; FUNC21 - Write sequential (BDOS Function 21)
 ;-------------------------------------------------------------------------------
 ; Description:
-;   Writes a 128-byte record to the file at the current position.
+;   Writes a record to the file at the current position, or MULTCNT
+;   records (F44) from consecutive 128-byte buffers at the DMA address.
 ;   Allocates new blocks as needed. Automatically creates a new extent
 ;   when the current one fills (128 records).
 ;
@@ -1284,8 +1368,8 @@ F20OC2:
 ; Output:
 ;   A       - 0 on success, 1 on error, 2 on disk full
 ;   L       - Same as A
-;   H       - 0
-;   FCB     - CR incremented, RC/extent updated
+;   H       - Records written before an error (0 on success)
+;   FCB     - CR advanced, RC/extent updated
 ;
 ; Clobbers:
 ;   BC, DE, flags
@@ -1299,11 +1383,13 @@ F20OC2:
 
 FUNC21:
         CALL    SETFCB
+        LDA     MULTCNT
+        STA     MLEFT           ; Records to write
         CALL    CHKRO           ; Check if drive is read-only
         JNZ     F21ERR          ; If R/O, return error (A=1)
-        LHLD    CURFCB
-        LXI     D, 32
-        DAD     D               ; HL = FCB+32 (CR)
+F21LP:
+        MVI     E, 32
+        CALL    FCBFLD          ; HL = FCB+32 (CR)
         MOV     A, M            ; Get current record
         PUSH    H
         CALL    WRITEREC        ; Write record A to current extent
@@ -1319,24 +1405,17 @@ FUNC21:
         CALL    F21CLS
         ORA     A
         JNZ     F21ERR
-        ; Increment extent number in FCB
-        LHLD    CURFCB
-        LXI     D, 12
-        DAD     D
-        INR     M               ; Increment extent
+        CALL    NEXTEX          ; Step to the next extent
         ; Reset CR and RC
-        LHLD    CURFCB
-        LXI     D, 32
-        DAD     D
+        MVI     E, 32
+        CALL    FCBFLD
         MVI     M, 0            ; Reset CR
-        LHLD    CURFCB
-        LXI     D, 15
-        DAD     D
+        MVI     E, 15
+        CALL    FCBFLD
         MVI     M, 0            ; Reset RC
         ; Clear allocation map for new extent
-        LHLD    CURFCB
-        LXI     D, 16
-        DAD     D
+        MVI     E, 16
+        CALL    FCBFLD
         MVI     B, 16
 F21CAL:
         MVI     M, 0
@@ -1348,50 +1427,40 @@ F21CAL:
         ORA     A
         JNZ     F21ERR
 F21OK:
+        CALL    MNEXT
+        JNZ     F21LP           ; More records
         MVI     L, 0
         JMP     SETRET
 F21ERR:
-        JMP     SETLA           ; Pass through error code (1=error, 2=disk full)
+        JMP     MERR            ; Pass through error code (1=error, 2=disk full)
+
+; MNEXT - Step a multi-sector transfer to its next record
+; Input: MLEFT, XDMA  Output: NZ and XDMA advanced if records remain  Clobbers: DE, HL
+MNEXT:
+        LXI     H, MLEFT
+        DCR     M
+        RZ
+        LHLD    XDMA
+        LXI     D, 128
+        DAD     D
+        SHLD    XDMA
+        RET
+
+; MERR - Return error A from F20/F21 with the records transferred in H
+; Input: A=error, MULTCNT, MLEFT  Output: (returns to caller)
+MERR:
+        MOV     L, A
+        LDA     MLEFT
+        MOV     H, A
+        LDA     MULTCNT
+        SUB     H
+        MOV     H, A
+        JMP     SETRET
 
 ; Close current extent (internal helper for extent overflow)
 F21CLS:
-        ; Get extent from FCB
-        LHLD    CURFCB
-        LXI     D, 12
-        DAD     D
-        MOV     A, M
-        STA     CLOSEXT
-        XRA     A
-        STA     SEARCHI
-F21CLP:
-        CALL    SEARCH
-        CPI     0FFH
-        JZ      F21CNF          ; Not found - OK for new extent
-        ; Check extent match
-        LHLD    DIRPTR
-        LXI     D, 12
-        DAD     D
-        MOV     A, M
-        ANI     1FH
-        MOV     B, A
-        LDA     CLOSEXT
-        ANI     1FH
-        CMP     B
-        JNZ     F21CLP
-        ; Update directory entry
-        LHLD    CURFCB
-        LXI     D, 12
-        DAD     D
-        XCHG
-        LHLD    DIRPTR
-        LXI     B, 12
-        DAD     B
-        XCHG
-        MVI     B, 20
-        CALL    COPYB
-        CALL    WRITEDIR
-F21CNF:
-        XRA     A               ; Return success
+        CALL    CLSEXT
+        XRA     A               ; Not found is OK for a new extent
         RET
 
 ; Create new directory entry for current extent
@@ -1427,24 +1496,46 @@ F21MCN:
         INX     D
         DCR     B
         JNZ     F21MCN
-        ; Set extent number from FCB
+        ; Set extent number and S2 from FCB
         CALL    GETDIRENT
         LXI     D, 12
         DAD     D               ; HL = dir+12 (extent field)
         PUSH    H
-        LHLD    CURFCB
-        LXI     D, 12
-        DAD     D
+        MVI     E, 12
+        CALL    FCBFLD
         MOV     A, M            ; Get extent from FCB
+        INX     H
+        INX     H
+        MOV     C, M            ; and S2
         POP     H
         MOV     M, A            ; Store in directory entry
+        INX     H
+        INX     H
+        MOV     M, C
         CALL    WRITEDIR
+        CALL    SETHINT         ; Next extent search starts here
+        CALL    EXCPUT
         XRA     A
         RET
 F21MER:
         MVI     A, 1
         RET
 
+; NEXTEX - Step the FCB to its next extent, carrying from EX into S2
+; Input: CURFCB  Output: (FCB EX, S2 advanced)  Clobbers: A, DE, HL, flags
+NEXTEX:
+        MVI     E, 12
+        CALL    FCBFLD
+        INR     M               ; Increment extent
+        MOV     A, M
+        CPI     32
+        RC
+        MVI     M, 0            ; EX wraps to 0
+        INX     H
+        INX     H
+        INR     M               ; S2 counts 32 extents
+        RET
+
 ;-------------------------------------------------------------------------------
 ; FUNC22 - Make file (BDOS Function 22)
 ;-------------------------------------------------------------------------------
@@ -1466,7 +1557,8 @@ F21MER:
 ;
 ; Notes:
 ;   - File is created with zero length (no blocks allocated)
-;   - EX, S1, S2, RC, and allocation map are zeroed
+;   - EX, S1, S2, RC, and allocation map are zeroed in the FCB and the
+;     entry, so blocks left in the FCB are not written to the new file
 ;-------------------------------------------------------------------------------
 
 FUNC22:
@@ -1475,32 +1567,30 @@ FUNC22:
         CALL    FINDFREE
         CPI     0FFH
         JZ      F22ERR          ; Directory full
-        ; Initialize directory entry
-        CALL    GETDIRENT
-        PUSH    H
-        ; Clear entry
-        MVI     B, 32
+        ; Clear EX through the allocation map in the FCB, which becomes
+        ; the new entry, so no stale block pointers are written back
+        MVI     E, 12
+        CALL    FCBFLD
+        MVI     B, 20
         XRA     A
 F22CLR:
         MOV     M, A
         INX     H
         DCR     B
         JNZ     F22CLR
-        ; Copy filename from FCB
-        POP     H
-        PUSH    H
+        ; Initialize directory entry: user number, then the FCB
+        CALL    GETDIRENT
         LDA     USERNO
         MOV     M, A            ; User number
         INX     H
+        XCHG                    ; DE = dir+1 (dest)
         LHLD    CURFCB
-        INX     H               ; Skip drive byte, HL = FCB+1 (source)
-        XCHG                    ; DE = FCB+1
-        POP     H
-        INX     H               ; HL = dir+1 (dest)
-        XCHG                    ; Now HL = FCB+1 (source), DE = dir+1 (dest)
-        MVI     B, 11           ; Copy filename + type
+        INX     H               ; HL = FCB+1 (source)
+        MVI     B, 31           ; Name, type, EX-RC and map
         CALL    COPYB
         CALL    WRITEDIR
+        CALL    SETHINT         ; S1 = new entry's directory sector
+        CALL    EXCCLR          ; An old file of this name may be cached
         MVI     L, 0
         JMP     SETRET
 F22ERR:
@@ -1534,8 +1624,8 @@ F22ERR:
 
 FUNC23:
         CALL    SETFCB
-        XRA     A
-        STA     SEARCHI
+        LXI     H, 0
+        SHLD    SEARCHI
 F23LP:
         CALL    SEARCH
         CPI     0FFH
@@ -1552,6 +1642,7 @@ F23LP:
         CALL    WRITEDIR
         JMP     F23LP
 F23DN:
+        CALL    EXCCLR          ; Cached extents are keyed by the old name
         MVI     L, 0
         JMP     SETRET
 
@@ -1686,10 +1777,11 @@ FUNC27:
 
 FUNC28:
         LDA     CDISK
-        CALL    BITMASK         ; B = mask for drive
-        LDA     ROVEC
+        LXI     H, ROVEC
+        CALL    VECBIT          ; HL = ROVEC byte, B = mask
+        MOV     A, M
         ORA     B
-        STA     ROVEC
+        MOV     M, A
         JMP     BFRET
 
 ;-------------------------------------------------------------------------------
@@ -1741,16 +1833,15 @@ FUNC29:
 FUNC30:
         ; Copy attribute bits from FCB to directory
         CALL    SETFCB
-        XRA     A
-        STA     SEARCHI         ; Start from entry 0
+        LXI     H, 0
+        SHLD    SEARCHI         ; Start from entry 0
         CALL    SEARCH
         CPI     0FFH
         JZ      F30NF
         CALL    GETDIRENT
         PUSH    H
-        LHLD    CURFCB
-        LXI     D, 9            ; T1 (first type char)
-        DAD     D
+        MVI     E, 9
+        CALL    FCBFLD          ; T1 (first type char)
         XCHG                    ; DE = FCB+9
         POP     H
         LXI     B, 9
@@ -1846,6 +1937,7 @@ F32SET:
 ; Output:
 ;   A       - 0 on success
 ;             1 on unwritten record (CR >= RC or block unallocated)
+;             4 on unwritten extent (FCB keeps its current extent)
 ;             6 on seek past end of disk (R2 > 0)
 ;   L       - Same as A
 ;   H       - 0
@@ -1865,9 +1957,8 @@ FUNC33:
         ORA     A
         JNZ     F33ERR          ; RNDREC returned error (6=past disk)
         ; Load CR from FCB for READREC
-        LHLD    CURFCB
-        LXI     D, 32
-        DAD     D
+        MVI     E, 32
+        CALL    FCBFLD
         MOV     A, M            ; A = CR
         CALL    READREC
 F33ERR:
@@ -1888,6 +1979,7 @@ F33ERR:
 ; Output:
 ;   A       - 0 on success
 ;             2 on disk full (no free blocks)
+;             5 on directory full (no entry for a new extent)
 ;             6 on seek past end of disk (R2 > 0)
 ;   L       - Same as A
 ;   H       - 0
@@ -1908,9 +2000,8 @@ FUNC34:
         ORA     A
         JNZ     F34ERR          ; RNDREC returned error (6=past disk)
         ; Load CR from FCB for WRITEREC
-        LHLD    CURFCB
-        LXI     D, 32
-        DAD     D
+        MVI     E, 32
+        CALL    FCBFLD
         MOV     A, M            ; A = CR
         CALL    WRITEREC        ; Returns 0=success, 2=disk full
 F34ERR:
@@ -1942,9 +2033,8 @@ FUNC35:
         ; Set random record field to file size
         CALL    SETFCB
         ; Search all extents, find highest
-        XRA     A
-        STA     SEARCHI
         LXI     H, 0
+        SHLD    SEARCHI
         SHLD    MAXREC          ; Max record found
 F35LP:
         CALL    SEARCH
@@ -2017,9 +2107,8 @@ F35DN:
 
 FUNC36:
         CALL    SETFCB
-        LHLD    CURFCB
-        LXI     D, 12
-        DAD     D
+        MVI     E, 12
+        CALL    FCBFLD
         MOV     A, M            ; Extent
         RLC
         RLC
@@ -2029,16 +2118,14 @@ FUNC36:
         RLC
         RLC                     ; *128
         PUSH    H
-        LHLD    CURFCB
-        LXI     D, 32
-        DAD     D
+        MVI     E, 32
+        CALL    FCBFLD
         ADD     M               ; Add CR
         POP     H
         ; Store in random record field
         PUSH    PSW
-        LHLD    CURFCB
-        LXI     D, 33
-        DAD     D
+        MVI     E, 33
+        CALL    FCBFLD
         POP     PSW
         MOV     M, A            ; R0
         INX     H
@@ -2061,6 +2148,7 @@ FUNC36:
 ; Output:
 ;   LOGINV  - Specified bits cleared
 ;   ROVEC   - Specified bits cleared
+;   DIRCDSK - FFH (no directory sector cached)
 ;
 ; Clobbers:
 ;   BC, DE, HL, flags
@@ -2071,24 +2159,35 @@ FUNC36:
 
 FUNC37:
         ; DE = drive bitmap - reset specified drives
-        XCHG
-        SHLD    TEMP16
-        ; Clear login bits for specified drives
-        LDA     LOGINV
-        MOV     B, A
-        LDA     TEMP16
+        MOV     A, E
         CMA
-        ANA     B
-        STA     LOGINV
-        ; Clear R/O bits too
-        LDA     ROVEC
-        MOV     B, A
-        LDA     TEMP16
+        MOV     E, A
+        MOV     A, D
         CMA
-        ANA     B
-        STA     ROVEC
+        MOV     D, A            ; DE = mask of drives to keep
+        ; Clear login bits for specified drives
+        LXI     H, LOGINV
+        CALL    VECAND
+        ; Clear R/O bits too
+        LXI     H, ROVEC
+        CALL    VECAND
+        ; Drop the cached directory sector and extents
+        MVI     A, 0FFH
+        STA     DIRCDSK
+        CALL    EXCCLR
         JMP     BFRET
 
+; AND the 16-bit vector at HL with DE
+VECAND:
+        MOV     A, M
+        ANA     E
+        MOV     M, A
+        INX     H
+        MOV     A, M
+        ANA     D
+        MOV     M, A
+        RET
+
 ;-------------------------------------------------------------------------------
 ; FUNC40 - Write random with zero fill (BDOS Function 40)
 ;-------------------------------------------------------------------------------
@@ -2118,6 +2217,41 @@ FUNC40:
         ; For now, same as regular write
         JMP     FUNC34
 
+;-------------------------------------------------------------------------------
+; FUNC44 - Set multi-sector count (BDOS Function 44, from CP/M 3)
+;-------------------------------------------------------------------------------
+; Description:
+;   Sets how many consecutive records each F20/F21 call transfers. The
+;   records go to or come from consecutive 128-byte buffers starting at
+;   the DMA address, so a loader can read a whole chunk of a file with
+;   one call.
+;
+; Input:
+;   C       - [REQ] Function number (44)
+;   E       - [REQ] Record count (1-128)
+;
+; Output:
+;   A       - 0 if set, FFH if the count is out of range
+;   MULTCNT - Record count
+;
+; Clobbers:
+;   BC, DE, flags
+;
+; Notes:
+;   - Random I/O (F33, F34, F40) still transfers one record
+;   - The CCP sets the count back to 1 on every warm start
+;-------------------------------------------------------------------------------
+
+FUNC44:
+        MOV     A, E
+        DCR     A
+        CPI     128             ; 1-128 only
+        MVI     A, 0FFH
+        JNC     SETLA
+        MOV     A, E
+        STA     MULTCNT
+        JMP     BFRET           ; RETS is already 0
+
 ;-------------------------------------------------------------------------------
 ; Disk I/O Helper Routines
 ;-------------------------------------------------------------------------------
@@ -2134,6 +2268,7 @@ FUNC40:
 ;
 ; Output:
 ;   CURFCB  - Set to FCB address
+;   XDMA    - Set to DMADDR (advanced per record by F20/F21)
 ;   CURDSK  - Set to drive number
 ;   CURDPH  - Set via SELDRIVE
 ;
@@ -2142,6 +2277,8 @@ FUNC40:
 ;-------------------------------------------------------------------------------
 
 SETFCB:
+        LHLD    DMADDR
+        SHLD    XDMA            ; Transfer starts at the DMA address
         LHLD    PARAM
         SHLD    CURFCB
         ; Get drive from FCB
@@ -2153,8 +2290,14 @@ SETFCB:
 SFDEF:
         LDA     CDISK
 SFSEL:
-        STA     CURDSK
-        CALL    SELDRIVE
+        JMP     SELDRIVE
+
+; FCBFLD - Address a field of the current FCB
+; Input: E=field offset, CURFCB  Output: HL=CURFCB+E  Clobbers: D (0)
+FCBFLD:
+        LHLD    CURFCB
+        MVI     D, 0
+        DAD     D
         RET
 
 ;-------------------------------------------------------------------------------
@@ -2176,18 +2319,9 @@ SFSEL:
 
 CHKRO:
         LDA     CURDSK
-        CALL    BITMASK         ; B = mask for drive
-        ; Check appropriate byte of ROVEC based on drive number
-        LDA     CURDSK
-        CPI     8
-        JNC     CHKRH           ; Drive 8-15, check high byte
-        LDA     ROVEC
-        ANA     B
-        RZ                      ; Z=writable
-        MVI     A, 1
-        RET
-CHKRH:
-        LDA     ROVEC+1
+        LXI     H, ROVEC
+        CALL    VECBIT          ; HL = ROVEC byte, B = mask
+        MOV     A, M
         ANA     B
         RZ                      ; Z=writable
         MVI     A, 1
@@ -2209,54 +2343,19 @@ CHKRH:
 ; Output:
 ;   A       - Directory code (0-3) if found, FFH if not found
 ;   SEARCHI - Updated to next entry (for Search Next)
-;   DIRPTR  - Points to matched entry in DIRBUF
-;   DIRBUF  - Contains directory sector
+;   DIRPTR  - Points to matched entry in the directory buffer
+;   (CDIRBF) - Contains directory sector
 ;
 ; Clobbers:
 ;   BC, DE, HL, flags
 ;-------------------------------------------------------------------------------
 
 SEARCH:
-        LDA     SEARCHI
+        LHLD    SEARCHI
 SRCHLP:
-        STA     SRCHCUR
-        ; Calculate directory sector and entry
-        ; Each sector has 4 entries (128/32)
-        MOV     B, A
-        ANI     03H             ; Entry within sector (0-3)
-        STA     DIRENT
-        MOV     A, B
-        RRC
-        RRC
-        ANI     3FH             ; Sector number
-        STA     DIRSEC
-
-        ; Check if past end of directory
-        LHLD    CURDPH
-        MOV     A, H
-        ORA     L
-        JZ      SRCHNF          ; No disk
-        LXI     D, 10
-        DAD     D               ; DPB pointer
-        MOV     A, M
-        INX     H
-        MOV     H, M
-        MOV     L, A            ; HL = DPB
-        LXI     D, 7
-        DAD     D               ; DRM
-        MOV     A, M
-        INX     H
-        MOV     E, A
-        MOV     D, M            ; DE = DRM (max dir entry)
-        LDA     SRCHCUR
-        MOV     L, A
-        MVI     H, 0
-        ; Compare HL vs DE
-        MOV     A, L
-        SUB     E
-        MOV     A, H
-        SBB     D
-        JNC     SRCHNF          ; Past end
+        SHLD    SRCHCUR
+        CALL    DIRSET          ; Locate entry
+        JC      SRCHNF          ; Past end or no disk
 
         ; Read directory sector
         CALL    READDIR
@@ -2313,16 +2412,16 @@ SRCHCN:
         ; Match found
         CALL    GETDIRENT       ; Get entry pointer
         SHLD    DIRPTR          ; Save for OPEN/etc
-        LDA     SRCHCUR
-        INR     A
-        STA     SEARCHI         ; Save for search next
+        LHLD    SRCHCUR
+        INX     H
+        SHLD    SEARCHI         ; Save for search next
         LDA     DIRENT          ; Return entry index (0-3)
         RET
 
 SRCHNX:
         ; Try next entry
-        LDA     SRCHCUR
-        INR     A
+        LHLD    SRCHCUR
+        INX     H
         JMP     SRCHLP
 
 SRCHNF:
@@ -2334,6 +2433,8 @@ SRCHNF:
 ;-------------------------------------------------------------------------------
 ; Description:
 ;   Scans directory for a free (E5H) entry for creating new files.
+;   The scan starts at the drive's free-slot rover, below which every
+;   entry is known to be in use.
 ;
 ; Input:
 ;   CURDPH  - [REQ] Current disk's DPH
@@ -2342,51 +2443,27 @@ SRCHNF:
 ;   A       - Directory code (0-3) if found, FFH if directory full
 ;   DIRSEC  - Sector containing free entry
 ;   DIRENT  - Entry index within sector
-;   DIRBUF  - Contains directory sector
+;   (CDIRBF) - Contains directory sector
+;   (DPH+4) - Rover, set to the free entry found
 ;
 ; Clobbers:
 ;   BC, DE, HL, flags
+;
+; Notes:
+;   - Still returns the lowest free entry: F19 lowers the rover when it
+;     deletes an entry below it, and INITALV resets it on login
 ;-------------------------------------------------------------------------------
 
 FINDFREE:
-        XRA     A
-FFREELP:
-        STA     SRCHCUR
-        ; Check bounds
-        LHLD    CURDPH
-        MOV     A, H
-        ORA     L
-        JZ      FFREENF
-        LXI     D, 10
-        DAD     D
+        CALL    DROVPTR
         MOV     A, M
         INX     H
         MOV     H, M
-        MOV     L, A
-        LXI     D, 7
-        DAD     D
-        MOV     E, M
-        INX     H
-        MOV     D, M            ; DE = DRM
-        LDA     SRCHCUR
-        MOV     L, A
-        MVI     H, 0
-        MOV     A, L
-        SUB     E
-        MOV     A, H
-        SBB     D
-        JNC     FFREENF
-
-        ; Calculate sector/entry
-        LDA     SRCHCUR
-        MOV     B, A
-        ANI     03H
-        STA     DIRENT
-        MOV     A, B
-        RRC
-        RRC
-        ANI     3FH
-        STA     DIRSEC
+        MOV     L, A            ; HL = rover
+FFREELP:
+        SHLD    SRCHCUR
+        CALL    DIRSET          ; Locate entry
+        JC      FFREENF         ; Directory full or no disk
 
         CALL    READDIR
         ORA     A
@@ -2397,11 +2474,17 @@ FFREELP:
         CPI     0E5H            ; Deleted/free?
         JZ      FFREEFND
 
-        LDA     SRCHCUR
-        INR     A
+        LHLD    SRCHCUR
+        INX     H
         JMP     FFREELP
 
 FFREEFND:
+        LHLD    SRCHCUR
+        XCHG
+        CALL    DROVPTR
+        MOV     M, E            ; Rover = this entry
+        INX     H
+        MOV     M, D
         LDA     DIRENT
         RET
 
@@ -2409,10 +2492,10 @@ FFREENF:
         MVI     A, 0FFH
         RET
 
-; GETDIRENT - Get pointer to directory entry in DIRBUF
+; GETDIRENT - Get pointer to directory entry in CDIRBF
 ; Input: DIRENT=entry index (0-3)  Output: HL=pointer  Clobbers: A, DE, flags
 GETDIRENT:
-        ; Calculate pointer to directory entry in DIRBUF
+        ; Calculate pointer to directory entry in CDIRBF
         ; Entry 0: offset 0, Entry 1: offset 32, Entry 2: offset 64, Entry 3: offset 96
         ; offset = entry * 32
         LDA     DIRENT
@@ -2423,15 +2506,71 @@ GETDIRENT:
         ADD     A               ; *32
         MOV     E, A
         MVI     D, 0
-        LXI     H, DIRBUF
+        LHLD    CDIRBF
         DAD     D
         RET
 
+;-------------------------------------------------------------------------------
+; DIRSET - Locate directory entry (internal)
+;-------------------------------------------------------------------------------
+; Description:
+;   Splits the directory index in SRCHCUR into a directory sector and
+;   an entry within that sector (4 entries of 32 bytes per sector).
+;
+; Input:
+;   SRCHCUR - [REQ] Directory entry index (0-DRM)
+;   CURDPH  - [REQ] Current disk's DPH
+;   CDRM    - [REQ] Last directory entry
+;
+; Output:
+;   CY      - Set if past DRM or no disk
+;   DIRSEC  - Logical sector within directory
+;   DIRENT  - Entry index within sector (0-3)
+;
+; Clobbers:
+;   A, DE, HL, flags
+;-------------------------------------------------------------------------------
+
+DIRSET:
+        LHLD    CURDPH
+        MOV     A, H
+        ORA     L
+        STC
+        RZ                      ; No disk
+        LHLD    CDRM
+        XCHG                    ; DE = DRM (last dir entry)
+        LHLD    SRCHCUR
+        MOV     A, E
+        SUB     L
+        MOV     A, D
+        SBB     H               ; CY if index > DRM
+        RC
+        MOV     A, L
+        ANI     03H             ; Entry within sector (0-3)
+        STA     DIRENT
+        ORA     A
+        MOV     A, H            ; HL = index / 4
+        RAR
+        MOV     H, A
+        MOV     A, L
+        RAR
+        MOV     L, A
+        ORA     A
+        MOV     A, H
+        RAR
+        MOV     H, A
+        MOV     A, L
+        RAR
+        MOV     L, A
+        SHLD    DIRSEC
+        ORA     A               ; Clear carry
+        RET
+
 ;-------------------------------------------------------------------------------
 ; READDIR - Read directory sector from disk (internal)
 ;-------------------------------------------------------------------------------
 ; Description:
-;   Reads the directory sector specified by DIRSEC into DIRBUF. Sets up
+;   Reads the directory sector specified by DIRSEC into CDIRBF. Sets up
 ;   BIOS with track (reserved tracks) and translated sector.
 ;
 ; Input:
@@ -2440,42 +2579,122 @@ GETDIRENT:
 ;
 ; Output:
 ;   A       - 0 on success, non-0 on error
-;   DIRBUF  - 128 bytes of directory data
+;   (CDIRBF) - 128 bytes of directory data
+;   DIRCDSK - Set to CURDSK (FFH after an error)
+;   DIRCSEC - Set to DIRSEC
+;   STDHIT or STDRD counted in the BIOS statistics block
 ;
 ; Clobbers:
 ;   BC, DE, HL, flags
 ;
 ; Notes:
-;   - Temporarily changes DMA to DIRBUF, restores DMADDR after
+;   - No BIOS read if the directory buffer already holds DIRSEC of CURDSK
+;   - A sector read from disk that the CSV covers must match its checksum
+;     once the ALV is built; a mismatch rebuilds the ALV (INITALV) first
+;   - Temporarily changes DMA to the directory buffer, restores DMADDR after
 ;-------------------------------------------------------------------------------
 
 READDIR:
-        ; Calculate absolute sector
-        ; Dir starts at track OFF (reserved tracks)
         LHLD    CURDPH
         MOV     A, H
         ORA     L
         MVI     A, 1
         RZ                      ; Error if no DPH
-        LXI     D, 10
-        DAD     D
+        ; Skip the read if the directory buffer already holds this sector
+        LDA     CURDSK
+        LXI     H, DIRCDSK
+        CMP     M
+        JNZ     RDIRRD
+        LHLD    DIRCSEC
+        XCHG
+        LHLD    DIRSEC
+        MOV     A, L
+        CMP     E
+        JNZ     RDIRRD
+        MOV     A, H
+        CMP     D
+        JNZ     RDIRRD
+        MVI     E, STDHIT
+        CALL    STCNT
+        XRA     A               ; Hit, CDIRBF is current
+        RET
+RDIRRD:
+        MVI     E, STDRD
+        CALL    STCNT
+        CALL    DIRIO           ; Set track, sector and DMA
+        CALL    BREAD
+        CALL    DIRDMA
+        ORA     A
+        RNZ
+        ; Check the sector against the CSV while the ALV counts as built
+        CALL    ALVFLG
         MOV     A, M
+        ORA     A
+        RZ                      ; Not built yet or being rebuilt
+        CALL    INCSV
+        JNC     RDIROK          ; Not covered by the CSV
+        CALL    CSVSUM
+        CMP     M
+        JZ      RDIROK
+        ; The directory changed behind the BDOS (new disk): rebuild the
+        ; ALV and CSV, then read the sector again
+        LHLD    SRCHCUR
+        PUSH    H
+        LHLD    DIRSEC
+        PUSH    H
+        LDA     BLKOP
+        PUSH    PSW
+        CALL    EXCCLR
+        CALL    INITALV
+        POP     PSW
+        STA     BLKOP
+        POP     H
+        SHLD    DIRSEC
+        POP     H
+        SHLD    SRCHCUR
+        JMP     READDIR
+RDIROK:
+        XRA     A
+        RET
+
+; STCNT - Add 1 to a 32-bit counter in the BIOS I/O statistics block
+; Input: E=counter offset (STDRD, STDHIT, STLOG)  Output: (none)  Clobbers: DE, HL, flags
+STCNT:
+        LHLD    BSTATS
+        MVI     D, 0
+        DAD     D
+        MVI     E, 4
+STCNTL:
+        INR     M
+        RNZ
         INX     H
-        MOV     H, M
-        MOV     L, A            ; HL = DPB
-        LXI     D, 13
-        DAD     D               ; OFF (reserved tracks)
-        MOV     C, M
-        INX     H
-        MOV     B, M            ; BC = reserved tracks
+        DCR     E
+        JNZ     STCNTL
+        RET
 
-        ; Set track
-        CALL    BSETTRK
+; DIRIO - Point BIOS at directory sector DIRSEC with DMA at CDIRBF
+; Input: DIRSEC, CURDPH, CURDPB  Output: (BIOS track/sector/DMA set)  Clobbers: A, BC, DE, HL, flags
+DIRIO:
+        ; Directory starts at track OFF and may span several tracks
+        LHLD    DIRSEC
+        CALL    SETTS
+        ; Set DMA to directory buffer
+        LHLD    CDIRBF
+        MOV     B, H
+        MOV     C, L
+        JMP     BSETDMA
 
-        ; Set sector (DIRSEC is already logical sector)
-        LDA     DIRSEC
-        MOV     C, A
-        MVI     B, 0
+; SETTS - Set BIOS track and translated sector for a sector past OFF
+; Input: HL=sector from start of track OFF, CURDPB  Output: (BIOS track/sector set)  Clobbers: A, BC, DE, HL, flags
+SETTS:
+        CALL    DIVSPT          ; BC = track offset, HL = sector
+        PUSH    H
+        LHLD    COFF
+        DAD     B
+        MOV     B, H
+        MOV     C, L            ; BC = OFF + track offset
+        CALL    BSETTRK
+        POP     B               ; BC = logical sector
         ; Translate sector
         LHLD    CURDPH
         MOV     E, M
@@ -2484,39 +2703,50 @@ READDIR:
         CALL    BSECTRN         ; HL = physical sector
         MOV     B, H
         MOV     C, L
-        CALL    BSETSEC
-
-        ; Set DMA to directory buffer
-        LXI     B, DIRBUF
-        CALL    BSETDMA
-
-        ; Read
-        CALL    BREAD
-        PUSH    PSW
-
-        ; Restore user DMA
-        LHLD    DMADDR
-        MOV     B, H
-        MOV     C, L
-        CALL    BSETDMA
-
-        POP     PSW
+        JMP     BSETSEC
+
+; DIVSPT - Divide by sectors per track (8-step shift and subtract)
+; Input: HL=dividend, CSPT  Output: BC=quotient, HL=remainder  Clobbers: A, DE, flags
+; Needs SPT < 256 and a quotient (tracks past OFF) below 256
+DIVSPT:
+        LDA     CSPT
+        MOV     C, A            ; C = SPT
+        MVI     B, 8
+DVSLP:
+        DAD     H               ; H = remainder, quotient bits into L
+        JC      DVSSUB          ; Remainder carried past 255, so >= SPT
+        MOV     A, H
+        CMP     C
+        JC      DVSNX
+DVSSUB:
+        MOV     A, H
+        SUB     C
+        MOV     H, A
+        INR     L               ; Quotient bit = 1
+DVSNX:
+        DCR     B
+        JNZ     DVSLP
+        MOV     C, L            ; BC = quotient (B is 0)
+        MOV     L, H
+        MVI     H, 0            ; HL = remainder
         RET
 
 ;-------------------------------------------------------------------------------
 ; WRITEDIR - Write directory sector to disk (internal)
 ;-------------------------------------------------------------------------------
 ; Description:
-;   Writes DIRBUF back to the directory sector specified by DIRSEC.
+;   Writes CDIRBF back to the directory sector specified by DIRSEC.
 ;   Used after modifying directory entries.
 ;
 ; Input:
 ;   DIRSEC  - [REQ] Logical sector number within directory
 ;   CURDPH  - [REQ] Current disk's DPH
-;   DIRBUF  - [REQ] 128 bytes of directory data
+;   (CDIRBF) - [REQ] 128 bytes of directory data
 ;
 ; Output:
 ;   A       - 0 on success, non-0 on error
+;   DIRCDSK - Set to CURDSK (FFH after an error), CDIRBF stays cached
+;   DIRCSEC - Set to DIRSEC
 ;
 ; Clobbers:
 ;   BC, DE, HL, flags
@@ -2528,44 +2758,31 @@ WRITEDIR:
         ORA     L
         MVI     A, 1
         RZ
-        LXI     D, 10
-        DAD     D
-        MOV     A, M
-        INX     H
-        MOV     H, M
-        MOV     L, A
-        LXI     D, 13
-        DAD     D
-        MOV     C, M
-        INX     H
-        MOV     B, M
-
-        CALL    BSETTRK
-
-        LDA     DIRSEC
-        MOV     C, A
-        MVI     B, 0
-        LHLD    CURDPH
-        MOV     E, M
-        INX     H
-        MOV     D, M
-        CALL    BSECTRN
-        MOV     B, H
-        MOV     C, L
-        CALL    BSETSEC
-
-        LXI     B, DIRBUF
-        CALL    BSETDMA
-
+        ; Keep the checksum vector in step with the directory
+        CALL    INCSV
+        JNC     WDIRIO
+        CALL    CSVSUM
+        MOV     M, A
+WDIRIO:
+        CALL    DIRIO
         MVI     C, 1            ; Directory write type
         CALL    BWRITE
+DIRDMA:
         PUSH    PSW
-
+        ; Record the sector CDIRBF now holds (none after an error)
+        ORA     A
+        LDA     CURDSK
+        JZ      DIRDM1
+        MVI     A, 0FFH
+DIRDM1:
+        STA     DIRCDSK
+        LHLD    DIRSEC
+        SHLD    DIRCSEC
+        ; Restore user DMA
         LHLD    DMADDR
         MOV     B, H
         MOV     C, L
         CALL    BSETDMA
-
         POP     PSW
         RET
 
@@ -2580,7 +2797,7 @@ WRITEDIR:
 ; Input:
 ;   A       - [REQ] Record number within extent (0-127)
 ;   CURFCB  - [REQ] Current FCB
-;   DMADDR  - [REQ] DMA buffer address
+;   XDMA    - [REQ] Transfer buffer address
 ;
 ; Output:
 ;   A       - 0 on success, 1 on EOF/error
@@ -2593,9 +2810,8 @@ WRITEDIR:
 READREC:
         STA     RECREQ
         ; Check if record is beyond file size (RC)
-        LHLD    CURFCB
-        LXI     D, 15           ; Offset to RC (record count)
-        DAD     D
+        MVI     E, 15
+        CALL    FCBFLD          ; Offset to RC (record count)
         MOV     B, M            ; B = RC
         LDA     RECREQ          ; A = requested record
         CMP     B               ; Compare record with RC
@@ -2631,7 +2847,7 @@ RRECEOF:
 ; Input:
 ;   A       - [REQ] Record number within extent (0-127)
 ;   CURFCB  - [REQ] Current FCB
-;   DMADDR  - [REQ] DMA buffer with data
+;   XDMA    - [REQ] Transfer buffer with data
 ;
 ; Output:
 ;   A       - 0 on success, 2 on disk full (no free blocks)
@@ -2662,9 +2878,8 @@ WRECHB:
         CALL    BWRITE
         ; Update record count if needed
         PUSH    PSW
-        LHLD    CURFCB
-        LXI     D, 15
-        DAD     D               ; RC
+        MVI     E, 15
+        CALL    FCBFLD          ; RC
         LDA     RECREQ
         INR     A               ; Records = record+1
         CMP     M
@@ -2680,38 +2895,56 @@ WRECERR:
 ; GETBLOCK - Get block number for record from FCB allocation map
 ; Input: RECREQ=record, CURFCB  Output: HL=block (0=unallocated)  Clobbers: A, BC, DE, flags
 GETBLOCK:
-        LDA     RECREQ
-        RRC
-        RRC
-        RRC                     ; /8 = block index within extent
-        ANI     0FH
-        MOV     E, A
+        CALL    MAPPTR          ; HL = pointer to block number
+        MOV     E, M            ; Get block (8-bit for small disks)
         MVI     D, 0
-        LHLD    CURFCB
-        LXI     B, 16           ; Allocation map starts at FCB+16
-        DAD     B
-        DAD     D               ; HL = pointer to block number
-        MOV     L, M            ; Get block (8-bit for small disks)
-        MVI     H, 0
+        LDA     CDSM+1          ; 16-bit pointers when DSM > 255
+        ORA     A
+        JZ      GBLK8
+        INX     H
+        MOV     D, M            ; High byte for 16-bit pointers
+GBLK8:
+        XCHG
         RET
 
 ; PUTBLOCK - Store block number in FCB allocation map
 ; Input: HL=block, RECREQ=record, CURFCB  Output: (FCB updated)  Clobbers: A, BC, DE, HL, flags
 PUTBLOCK:
-        SHLD    TEMP16
+        PUSH    H
+        CALL    MAPPTR
+        POP     D
+        MOV     M, E
+        LDA     CDSM+1          ; 16-bit pointers when DSM > 255
+        ORA     A
+        RZ
+        INX     H
+        MOV     M, D            ; High byte for 16-bit pointers
+        RET
+
+; MAPPTR - Get pointer to the FCB allocation map entry for a record
+; Input: RECREQ=record, CURFCB, CURDPB  Output: HL=map entry  Clobbers: A, BC, DE, flags
+MAPPTR:
+        LDA     CBSH
+        MOV     B, A            ; B = BSH
         LDA     RECREQ
-        RRC
-        RRC
-        RRC
-        ANI     0FH
+MPSHR:
+        ORA     A               ; Clear carry
+        RAR                     ; Record >> BSH = block index within extent
+        DCR     B
+        JNZ     MPSHR
+        MOV     E, A
+        LDA     CDSM+1          ; 16-bit pointers when DSM > 255
+        ORA     A
+        MOV     A, E
+        JZ      MP8
+        ADD     A               ; 2 bytes per 16-bit pointer
+MP8:
         MOV     E, A
         MVI     D, 0
         LHLD    CURFCB
-        LXI     B, 16
+        LXI     B, 16           ; Allocation map starts at FCB+16
         DAD     B
         DAD     D
-        LDA     TEMP16
-        MOV     M, A
         RET
 
 ;-------------------------------------------------------------------------------
@@ -2719,119 +2952,172 @@ PUTBLOCK:
 ;-------------------------------------------------------------------------------
 ; Description:
 ;   Scans the allocation vector for a free block (bit=0), marks it as
-;   used, and returns the block number.
+;   used, and returns the block number. The rover is kept in the first
+;   DPH scratch word, so each drive has its own.
 ;
 ; Input:
 ;   CURDPH  - [REQ] Current disk's DPH (for ALV and DPB)
 ;
 ; Output:
 ;   HL      - Block number (1-DSM), or 0 if disk full
+;   (DPH+2) - Rover, set to the block allocated
+;   (DPH+6) - ALV flag set to 2 (rebuilt on the next re-login)
 ;
 ; Clobbers:
 ;   A, BC, DE, flags
+;
+; Notes:
+;   - Next fit: the scan starts after the drive's rover and wraps at DSM,
+;     so sequential writes do not rescan the used part of the disk
+;   - Full ALV bytes (FFH) are skipped 8 blocks at a time
 ;-------------------------------------------------------------------------------
 
 ALLOCBLK:
-        ; Scan allocation vector for free block
         LHLD    CURDPH
         MOV     A, H
         ORA     L
         JZ      ABLKERR
-        LXI     D, 14           ; ALV pointer
-        DAD     D
-        MOV     A, M
-        INX     H
-        MOV     H, M
-        MOV     L, A
-        SHLD    ALVPTR          ; Save ALV address
+        LHLD    CDSM
+        XCHG                    ; DE = DSM
+        MOV     B, D
+        MOV     C, E
+        INX     B               ; BC = blocks left to check
 
-        ; Get DSM from DPB
-        LHLD    CURDPH
-        LXI     D, 10
-        DAD     D
+        ; Start after the last block allocated on this drive (next fit)
+        CALL    ROVPTR
         MOV     A, M
         INX     H
         MOV     H, M
-        MOV     L, A            ; HL = DPB
-        LXI     D, 5
-        DAD     D               ; DSM
-        MOV     E, M
-        INX     H
-        MOV     D, M            ; DE = DSM
-
-        ; Scan for free block (bit = 0 in ALV)
-        LXI     H, 0            ; Block counter
+        MOV     L, A
+        INX     H               ; HL = rover + 1
 ABLKLP:
-        ; Check if past DSM
-        MOV     A, L
-        SUB     E
-        MOV     A, H
-        SBB     D
-        JNC     ABLKERR         ; Past end
-
+        MOV     A, B
+        ORA     C
+        JZ      ABLKERR         ; Every block checked, disk full
+        ; Wrap to block 0 past DSM
+        MOV     A, E
+        SUB     L
+        MOV     A, D
+        SBB     H
+        JNC     ABLKCK
+        LXI     H, 0
+ABLKCK:
         ; Check bit in ALV
-        PUSH    H
+        PUSH    B
         PUSH    D
-        CALL    GETBIT          ; Check if block HL is free
-        POP     D
-        POP     H
+        PUSH    H
+        CALL    BITPREP         ; HL = ALV byte, B = mask
+        MOV     A, M
+        MOV     C, A            ; C = whole ALV byte
+        ANA     B
         JZ      ABLKFND         ; Found free block
-
+        POP     H
+        POP     D
+        ; At the first block of a full ALV byte, skip all 8
+        MOV     A, L
+        ANI     07H
+        JNZ     ABLKNX
+        INR     C               ; FFH -> 0
+        JNZ     ABLKNX
+        POP     B
+        MOV     A, C            ; 8 fewer blocks to check
+        SUI     8
+        MOV     C, A
+        MOV     A, B
+        SBI     0
+        MOV     B, A
+        JC      ABLKERR         ; Last few blocks all used
+        MOV     A, L            ; HL += 8
+        ADI     8
+        MOV     L, A
+        JNC     ABLKLP
+        INR     H
+        JMP     ABLKLP
+ABLKNX:
+        POP     B
+        DCX     B
         INX     H
         JMP     ABLKLP
 
 ABLKFND:
         ; Mark block as used
-        PUSH    H
-        CALL    SETBIT
+        MOV     A, M
+        ORA     B
+        MOV     M, A
+        POP     D               ; DE = block number
+        POP     H               ; Drop DSM and count
         POP     H
+        ; Remember it as the rover
+        CALL    ROVPTR
+        MOV     M, E
+        INX     H
+        MOV     M, D
+        CALL    ALVFLG
+        MVI     M, 2            ; Rebuild on re-login, the file may never be closed
+        XCHG                    ; HL = block number
         RET
 
 ABLKERR:
         LXI     H, 0
         RET
 
+; ROVPTR - Get address of the current drive's allocation rover
+; Input: CURDPH  Output: HL=rover (DPH scratch word 1)  Clobbers: (none)
+ROVPTR:
+        LHLD    CURDPH
+        INX     H
+        INX     H
+        RET
+
+; DROVPTR - Get address of the current drive's free directory entry rover
+; Input: CURDPH  Output: HL=rover (DPH scratch word 2)  Clobbers: (none)
+DROVPTR:
+        CALL    ROVPTR
+        INX     H
+        INX     H
+        RET
+
 ;-------------------------------------------------------------------------------
 ; INITALV - Initialize allocation vector for drive (internal)
 ;-------------------------------------------------------------------------------
 ; Description:
-;   Clears the ALV and rebuilds it by scanning all directory entries.
-;   Called when a drive is first logged in.
+;   Clears the ALV and rebuilds it from the directory, one sector at a
+;   time: each sector is read once, its checksum recorded, and the blocks
+;   of its four entries marked. Called by LOGIN when the drive's ALV
+;   cannot be reused.
 ;
 ; Input:
 ;   CURDPH  - [REQ] Current disk's DPH
 ;
 ; Output:
 ;   ALV     - Rebuilt with all used blocks marked
+;   CSV     - Checksums of the directory sectors it covers
+;   (DPH+2) - Allocation rover reset to 0
+;   (DPH+4) - Free directory entry rover reset to 0
+;   (DPH+6) - ALV valid flag 0 while rebuilding, then 1
+;   STLOG   - Counted in the BIOS statistics block
 ;
 ; Clobbers:
 ;   All registers
 ;-------------------------------------------------------------------------------
 
 INITALV:
-        ; Get ALV address from DPH
-        LHLD    CURDPH
-        LXI     D, 14           ; Offset to ALV pointer
-        DAD     D
-        MOV     E, M
+        MVI     E, STLOG
+        CALL    STCNT
+        ; Restart the allocation and directory rovers at the front, and
+        ; clear the valid flag so READDIR does not check the old CSV
+        CALL    ROVPTR
+        XRA     A
+        MVI     B, 5
+IALROV:
+        MOV     M, A
         INX     H
-        MOV     D, M
-        XCHG
-        SHLD    ALVPTR          ; Save ALV address
+        DCR     B
+        JNZ     IALROV
 
-        ; Get DSM from DPB to calculate ALV size
-        LHLD    CURDPH
-        LXI     D, 10           ; Offset to DPB pointer
-        DAD     D
-        MOV     E, M
-        INX     H
-        MOV     D, M
-        XCHG                    ; HL = DPB address
-        LXI     D, 5            ; Offset to DSM
-        DAD     D
-        MOV     E, M
-        INX     H
-        MOV     D, M            ; DE = DSM (max block number)
+        ; ALV size comes from DSM (max block number)
+        LHLD    CDSM
+        XCHG                    ; DE = DSM
 
         ; ALV size in bytes = (DSM / 8) + 1
         MOV     A, E
@@ -2851,7 +3137,7 @@ INITALV:
         MOV     B, A            ; B = bytes to clear
 
         ; Clear ALV to zeros
-        LHLD    ALVPTR
+        LHLD    CALV
 IALCLR:
         MVI     M, 0
         INX     H
@@ -2859,102 +3145,189 @@ IALCLR:
         JNZ     IALCLR
 
         ; Mark directory blocks as used
-        ; Get AL0, AL1 from DPB which has pre-set bits for dir blocks
-        LHLD    CURDPH
-        LXI     D, 10
-        DAD     D
-        MOV     E, M
+        ; AL0, AL1 from the DPB have pre-set bits for dir blocks
+        LHLD    CAL0
+        XCHG                    ; D = AL1, E = AL0
+        LHLD    CALV
+        MOV     M, E            ; Store AL0
         INX     H
-        MOV     D, M
-        XCHG                    ; HL = DPB
-        LXI     D, 9            ; Offset to AL0
-        DAD     D
-        MOV     A, M            ; AL0
-        INX     H
-        MOV     B, M            ; AL1
-        LHLD    ALVPTR
-        MOV     M, A            ; Store AL0
-        INX     H
-        MOV     M, B            ; Store AL1
+        MOV     M, D            ; Store AL1
 
-        ; Now scan directory and mark blocks as used
-        XRA     A
-        STA     SEARCHI
-IALSCAN:
-        LDA     SEARCHI
-        ; Calculate sector and entry
-        MOV     B, A
-        ANI     03H
-        STA     DIRENT
-        MOV     A, B
-        RRC
-        RRC
-        ANI     3FH
-        STA     DIRSEC
+        ; Scan the directory a sector at a time
+        MVI     A, 1
+        STA     BLKOP           ; MAPENT marks blocks used
+        LXI     H, 0
+IALSEC:
+        SHLD    SRCHCUR         ; First entry of the sector
+        CALL    DIRSET
+        JC      IALDON          ; Past directory end
+        CALL    READDIR
 
-        ; Check if past end of directory
-        LHLD    CURDPH
-        LXI     D, 10
+        ; Record the checksum of a sector the CSV covers
+        CALL    INCSV
+        JNC     IALMAP
+        CALL    CSVSUM
+        MOV     M, A
+IALMAP:
+        ; Mark the blocks of the sector's four entries
+        LHLD    CDIRBF
+        MVI     B, 4
+IALENT:
+        MOV     A, M            ; User number or E5
+        CPI     0E5H
+        JZ      IALNXT
+        PUSH    H
+        PUSH    B
+        CALL    MAPENT
+        POP     B
+        POP     H
+IALNXT:
+        LXI     D, 32
         DAD     D
-        MOV     E, M
-        INX     H
-        MOV     D, M
-        XCHG                    ; HL = DPB
-        LXI     D, 7            ; Offset to DRM
+        DCR     B
+        JNZ     IALENT
+
+        LHLD    SRCHCUR
+        LXI     D, 4            ; Next sector
         DAD     D
-        MOV     E, M
-        INX     H
-        MOV     D, M            ; DE = DRM (max dir entry)
-        LDA     SEARCHI
-        MOV     L, A
-        MVI     H, 0
-        ; Compare HL with DE
-        MOV     A, L
-        SUB     E
+        JMP     IALSEC
+
+IALDON:
+        ; The ALV and CSV now describe this directory
+        CALL    ALVFLG
+        MVI     M, 1
+        RET
+
+;-------------------------------------------------------------------------------
+; LOGIN - Log in the current drive (internal)
+;-------------------------------------------------------------------------------
+; Description:
+;   Reuses the drive's ALV when it is known to match the directory and
+;   rebuilds it with INITALV otherwise. The ALV, CSV and valid flag are
+;   in the BIOS, so they survive F13, F37 and warm boots; a kept ALV
+;   costs no disk reads.
+;
+; Input:
+;   CURDPH  - [REQ] Current disk's DPH
+;   CURDPB  - [REQ] Current disk's DPB copy
+;
+; Output:
+;   ALV     - Matches the directory
+;
+; Clobbers:
+;   All registers
+;
+; Notes:
+;   - The ALV is reused without reading the directory when the valid
+;     flag is 1 and either CKS = 0 (fixed disk) or the CSV covers every
+;     directory sector; a directory longer than the CSV is rebuilt
+;   - A changed directory (media change) is found by READDIR, which
+;     compares each sector it reads with the CSV and rebuilds on a
+;     mismatch
+;   - ALLOCBLK sets the flag to 2 and only INITALV sets it back to 1, so
+;     blocks of a file that was never closed are freed by the rebuild
+;-------------------------------------------------------------------------------
+
+LOGIN:
+        CALL    ALVFLG
+        MOV     A, M
+        CPI     1
+        JNZ     INITALV         ; Never built, or blocks allocated since
+        LHLD    CCKS
         MOV     A, H
-        SBB     D
-        JNC     IALDON          ; Past directory end
+        ORA     L
+        RZ                      ; Fixed disk, ALV is current
+        ; Keep the ALV if the CSV covers the whole directory: READDIR
+        ; checks each sector against it as the sector is read
+        LHLD    CDRM
+        SHLD    SRCHCUR
+        CALL    DIRSET          ; DIRSEC = last directory sector
+        CALL    INCSV
+        RC                      ; All covered
+        JMP     INITALV
+
+; INCSV - Check whether the checksum vector covers sector DIRSEC
+; Input: DIRSEC, CCKS  Output: CY if DIRSEC < CKS  Clobbers: A, DE, HL
+INCSV:
+        LHLD    DIRSEC
+        XCHG
+        LHLD    CCKS
+        MOV     A, E
+        SUB     L
+        MOV     A, D
+        SBB     H
+        RET
 
-        ; Read directory sector
-        LDA     DIRSEC
-        CALL    READDIR
+; CSVSUM - Checksum the directory buffer and locate its CSV byte
+; Input: CDIRBF, CCSV, DIRSEC  Output: A=checksum, HL=CSV byte  Clobbers: B, DE, flags
+CSVSUM:
+        LHLD    CDIRBF
+        XRA     A
+        MVI     B, 16           ; 16 x 8 bytes
+CSSLP:
+        ADD     M
+        INX     H
+        ADD     M
+        INX     H
+        ADD     M
+        INX     H
+        ADD     M
+        INX     H
+        ADD     M
+        INX     H
+        ADD     M
+        INX     H
+        ADD     M
+        INX     H
+        ADD     M
+        INX     H
+        DCR     B
+        JNZ     CSSLP
+        LHLD    DIRSEC
+        XCHG
+        LHLD    CCSV
+        DAD     D
+        RET
 
-        ; Get pointer to entry
-        CALL    GETDIRENT
-        MOV     A, M            ; First byte = user number or E5
-        CPI     0E5H
-        JZ      IALNXT          ; Empty entry, skip
+; ALVFLG - Get address of the current drive's ALV valid flag
+; (0 = not built or being rebuilt, 1 = matches the directory, 2 = blocks
+; allocated since the last rebuild)
+; Input: CURDPH  Output: HL=flag (DPH scratch word 3)  Clobbers: (none)
+ALVFLG:
+        CALL    DROVPTR
+        INX     H
+        INX     H
+        RET
 
-        ; Valid entry - mark its blocks as used
-        PUSH    H
+; MAPENT - Mark or free the blocks in a directory entry's map
+; Input: HL=entry, BLKOP (0 = free, else used)  Output: (ALV updated)  Clobbers: A, BC, DE, HL
+MAPENT:
         LXI     D, 16           ; Offset to allocation map
         DAD     D
-        MVI     C, 16           ; 16 block pointers (8-bit each)
-IALBLK:
-        MOV     A, M
+        MVI     C, 16           ; 16 map bytes (8-bit or 16-bit pointers)
+MEBLK:
+        MOV     E, M
+        MVI     D, 0
+        LDA     CDSM+1          ; 16-bit pointers when DSM > 255
         ORA     A
-        JZ      IALBN           ; Zero = unused
-        ; Mark block A as used
+        JZ      MEB8
+        INX     H
+        MOV     D, M            ; High byte for 16-bit pointers
+        DCR     C
+MEB8:
+        MOV     A, D
+        ORA     E
+        JZ      MEBN            ; Zero = unused
         PUSH    H
         PUSH    B
-        MOV     L, A
-        MVI     H, 0
-        CALL    SETBIT
+        XCHG
+        CALL    PUTBIT
         POP     B
         POP     H
-IALBN:
+MEBN:
         INX     H
         DCR     C
-        JNZ     IALBLK
-        POP     H
-
-IALNXT:
-        LDA     SEARCHI
-        INR     A
-        STA     SEARCHI
-        JMP     IALSCAN
-
-IALDON:
+        JNZ     MEBLK
         RET
 
 ; BITMASK - Create bit mask for drive number (internal)
@@ -2973,12 +3346,23 @@ BMLP:   MOV     A, B
         JNZ     BMLP
         RET
 
-; BITPREP - Calculate ALV byte address and bit position (internal)
-; Input: HL=block  Output: HL=ALV byte addr, B=bit position  Clobbers: A,C,DE
+; VECBIT - Locate a drive's bit in a 16-bit drive vector (internal)
+; Input: A = drive (0-15), HL = vector
+; Output: HL = vector byte holding the drive, B = mask
+; Clobbers: A, C
+VECBIT:
+        CPI     8
+        JC      BITMASK         ; Drives A-H in low byte
+        INX     H               ; Drives I-P in high byte
+        SUI     8
+        JMP     BITMASK
+
+; BITPREP - Calculate ALV byte address and bit mask (internal)
+; Input: HL=block  Output: HL=ALV byte addr, B=bit mask  Clobbers: A,C,DE
 BITPREP:
         MOV     A, L
         ANI     07H
-        MOV     B, A            ; B = bit position (0-7)
+        MOV     C, A            ; C = bit position (0-7)
         MOV     A, L
         RRC
         RRC
@@ -2994,54 +3378,31 @@ BITPREP:
         ORA     E
         MOV     E, A
         MVI     D, 0            ; DE = byte offset
-        LHLD    ALVPTR
+        MVI     B, 0
+        LXI     H, BITTAB
+        DAD     B
+        MOV     B, M            ; B = bit mask
+        LHLD    CALV
         DAD     D               ; HL = byte address
         RET
 
-; GETBIT - Test bit for block HL in allocation vector
-; Input: HL=block, ALVPTR  Output: Z=free(0), NZ=used(1)  Clobbers: A,BC,DE
-GETBIT:
-        CALL    BITPREP
-        MOV     A, M            ; Get byte
-        MVI     C, 80H          ; Start with bit 7
-GBITLP:
-        MOV     D, A
-        MOV     A, B
-        ORA     A
-        JZ      GBITDN
-        MOV     A, C
-        RRC
-        MOV     C, A
-        DCR     B
-        MOV     A, D
-        JMP     GBITLP
-GBITDN:
-        MOV     A, D
-        ANA     C
-        RET
+; Bit masks by position, block 0 of each ALV byte is bit 7
+BITTAB: DB      80H, 40H, 20H, 10H, 08H, 04H, 02H, 01H
 
-; SETBIT - Set bit for block HL in allocation vector (mark used)
-; Input: HL=block, ALVPTR  Output: (ALV updated)  Clobbers: A,BC,DE
-SETBIT:
+; PUTBIT - Set or clear the bit for block HL in the allocation vector
+; Input: HL=block, BLKOP (0 = free, else used), CALV  Output: (ALV updated)  Clobbers: A,BC,DE
+PUTBIT:
         CALL    BITPREP
-        PUSH    H
-        MOV     A, M
-        MVI     C, 80H
-SBITLP:
-        MOV     D, A
-        MOV     A, B
+        LDA     BLKOP
         ORA     A
-        JZ      SBITDN
-        MOV     A, C
-        RRC
-        MOV     C, A
-        DCR     B
-        MOV     A, D
-        JMP     SBITLP
-SBITDN:
-        MOV     A, D
-        ORA     C               ; Set the bit
-        POP     H
+        MOV     A, B
+        JZ      PBFREE
+        ORA     M               ; Set the bit
+        MOV     M, A
+        RET
+PBFREE:
+        CMA
+        ANA     M               ; Clear the bit
         MOV     M, A
         RET
 
@@ -3054,9 +3415,10 @@ SBITDN:
 ;
 ; Input:
 ;   HL      - [REQ] Block number
-;   RECREQ  - [REQ] Record number (mod 8 used for offset within block)
+;   RECREQ  - [REQ] Record number (AND BLM used for offset within block)
 ;   CURDPH  - [REQ] Current disk's DPH
-;   DMADDR  - [REQ] DMA buffer address
+;   CURDPB  - [REQ] Current disk's DPB copy
+;   XDMA    - [REQ] Transfer buffer address
 ;
 ; Output:
 ;   (BIOS)  - Track, sector, DMA configured for read/write
@@ -3066,121 +3428,23 @@ SBITDN:
 ;-------------------------------------------------------------------------------
 
 BLKTOSEC:
-        SHLD    TEMP16
-        ; Sector = block * (block_size/128) + record_within_block
-        ; For 1K blocks: sector = block * 8 + (record mod 8)
-        ; Then convert to track/sector
-
-        ; Get SPT from DPB
-        LHLD    CURDPH
-        LXI     D, 10
-        DAD     D
-        MOV     A, M
-        INX     H
-        MOV     H, M
-        MOV     L, A            ; HL = DPB
-        MOV     E, M
-        INX     H
-        MOV     D, M            ; DE = SPT
-
-        ; Calculate absolute sector
-        ; abs_sector = block * 8 + (record mod 8) + (reserved_tracks * SPT)
-        LHLD    TEMP16          ; Block number
-        DAD     H               ; *2
-        DAD     H               ; *4
-        DAD     H               ; *8
-        ; Add record offset within block
+        ; Sector past OFF = block * (block_size/128) + record_within_block
+        LDA     CBSH
+        MOV     B, A            ; B = BSH
+BTSSHL:
+        DAD     H               ; Block << BSH
+        DCR     B
+        JNZ     BTSSHL
+        LDA     CBLM
+        MOV     C, A
         LDA     RECREQ
-        ANI     07H
+        ANA     C               ; A = record within block (RECREQ & BLM)
         MOV     C, A
-        MVI     B, 0
         DAD     B               ; HL = sector offset from start of data area
-
-        ; Add reserved tracks * SPT
-        PUSH    H
-        LHLD    CURDPH
-        LXI     D, 10
-        DAD     D
-        MOV     A, M
-        INX     H
-        MOV     H, M
-        MOV     L, A            ; DPB
-        PUSH    H
-        MOV     E, M
-        INX     H
-        MOV     D, M            ; DE = SPT
-        POP     H
-        LXI     B, 13
-        DAD     B               ; OFF
-        MOV     C, M
-        INX     H
-        MOV     B, M            ; BC = reserved tracks
-
-        ; Multiply BC * DE (tracks * SPT)
-        ; Simple: add DE, BC times
-        LXI     H, 0
-BTSLP:
-        MOV     A, B
-        ORA     C
-        JZ      BTSDN
-        DAD     D
-        DCX     B
-        JMP     BTSLP
-BTSDN:
-        ; HL = reserved sectors
-        POP     D               ; DE = data sector
-        DAD     D               ; HL = absolute sector
-
-        ; Now divide by SPT to get track and sector
-        ; Save for division
-        SHLD    TEMP16
-
-        ; Get SPT again
-        LHLD    CURDPH
-        LXI     D, 10
-        DAD     D
-        MOV     A, M
-        INX     H
-        MOV     H, M
-        MOV     L, A
-        MOV     E, M
-        INX     H
-        MOV     D, M            ; DE = SPT
-
-        ; Divide TEMP16 by SPT
-        ; Track = TEMP16 / SPT, Sector = TEMP16 mod SPT
-        LHLD    TEMP16
-        LXI     B, 0            ; BC = quotient (track)
-DIVLP:
-        MOV     A, L
-        SUB     E
-        MOV     L, A
-        MOV     A, H
-        SBB     D
-        MOV     H, A
-        JC      DIVDN
-        INX     B
-        JMP     DIVLP
-DIVDN:
-        ; Restore remainder
-        DAD     D               ; HL = remainder (sector)
-        PUSH    H
-        ; Set track
-        CALL    BSETTRK         ; BC = track
-        POP     B               ; BC = logical sector
-
-        ; Translate sector
-        LHLD    CURDPH
-        MOV     E, M
-        INX     H
-        MOV     D, M
-        CALL    BSECTRN
-        MOV     B, H
-        MOV     C, L
-        CALL    BSETSEC
+        CALL    SETTS           ; Track = OFF + HL / SPT, sector = HL mod SPT
 
         ; Set DMA
-        LHLD    DMADDR
+        LHLD    XDMA
         MOV     B, H
         MOV     C, L
         CALL    BSETDMA
@@ -3191,28 +3455,34 @@ DIVDN:
 ;-------------------------------------------------------------------------------
 ; Description:
 ;   Converts the 24-bit random record number (FCB bytes 33-35) to
-;   extent and current record (CR) for random access operations.
+;   extent, S2 and current record (CR) for random access operations. When
+;   the record lies in another extent, the FCB is switched to it: the
+;   current extent is written back if it changed, and the new one comes
+;   from the extent cache or, on a miss, from the directory.
 ;
 ; Input:
 ;   CURFCB  - [REQ] FCB with random record field set
+;   FUNCT   - [REQ] 33 for read; write otherwise (missing extent created)
 ;
 ; Output:
-;   A       - 0 on success, 6 if R2 > 0 (seek past end of disk)
-;   FCB     - Extent (byte 12) and CR (byte 32) updated (if success)
+;   A       - 0 on success, 4 if a read needs an extent that does not
+;             exist, 5 if a write finds the directory full, 6 if R2 > 0
+;   FCB     - EX through D15 and CR (byte 32) updated (if success)
 ;
 ; Clobbers:
-;   DE, HL, flags
+;   BC, DE, HL, flags
 ;
 ; Notes:
-;   - Extent = random_record / 128
+;   - Extent = (random_record / 128) mod 32, S2 = random_record / 4096
 ;   - CR = random_record mod 128
-;   - Maximum addressable record is 65535 (R2 must be 0)
+;   - Maximum addressable record is 65535 (R2 must be 0), and an S2
+;     past the end of the drive (MAXS2) is error 6
+;   - An unchanged extent is not written back: the cached copy matches
 ;-------------------------------------------------------------------------------
 
 RNDREC:
-        LHLD    CURFCB
-        LXI     D, 33
-        DAD     D
+        MVI     E, 33
+        CALL    FCBFLD
         MOV     E, M            ; R0
         INX     H
         MOV     D, M            ; R1
@@ -3220,36 +3490,302 @@ RNDREC:
         MOV     A, M            ; R2
         ORA     A               ; Check if R2 > 0
         JNZ     RNDERR6         ; Past end of disk
-        ; Record = R1:R0, extent = record / 128, CR = record mod 128
-        ; CR = R0 AND 7FH (low 7 bits)
-        MOV     A, E
-        ANI     7FH
-        PUSH    PSW             ; Save CR
-        ; Extent = (R1 << 1) | (R0 >> 7) = bits 14:7 of record
+        ; Record = R1:R0, extent = bits 11:7, S2 = bits 15:12
         MOV     A, E            ; A = R0
         RLC                     ; Bit 7 of R0 → carry
         MOV     A, D            ; A = R1
-        RAL                     ; (R1 << 1) | carry = extent
+        RAL                     ; (R1 << 1) | carry
         ANI     1FH             ; Mask to 5 bits (extents 0-31)
-        ; Store extent
+        MOV     C, A            ; C = extent
+        MOV     A, D
+        RRC
+        RRC
+        RRC
+        RRC
+        ANI     0FH
+        MOV     B, A            ; B = S2
+        CALL    MAXS2
+        MOV     A, H
+        ORA     A
+        JNZ     RNDCR           ; Drive holds every S2
+        MOV     A, L
+        CMP     B
+        JC      RNDERR6         ; Past end of disk
+RNDCR:
+        ; CR = R0 AND 7FH (low 7 bits)
+        MOV     A, E
+        ANI     7FH
         LHLD    CURFCB
+        LXI     D, 32
+        DAD     D
+        MOV     M, A            ; Store CR
+        MVI     E, 12
+        CALL    FCBFLD
+        MOV     A, M
+        CMP     C
+        JNZ     RNDSW
+        INX     H
+        INX     H
+        MOV     A, M
+        CMP     B
+        JZ      RNDOK           ; Same extent, map is already loaded
+RNDSW:
+        PUSH    B               ; Save new extent and S2
+        ; Write the current extent back unless the cached copy matches
+        CALL    EXCFIND
+        JC      RNDCLS          ; Not cached, assume changed
+        LXI     D, EXCDAT
+        DAD     D
+        XCHG                    ; DE = cached EX through D15
+        LHLD    CURFCB
+        LXI     B, 12
+        DAD     B               ; HL = FCB+12
+        MVI     B, 20
+RNDCMP:
+        LDAX    D
+        CMP     M
+        JNZ     RNDCLS
+        INX     H
+        INX     D
+        DCR     B
+        JNZ     RNDCMP
+        JMP     RNDNEW          ; Unchanged since read or written
+RNDCLS:
+        CALL    CHKRO
+        JNZ     RNDNEW          ; R/O drive, nothing can have changed
+        CALL    CLSEXT
+RNDNEW:
+        ; Switch the FCB to the new extent
+        POP     B
+        MVI     E, 12
+        CALL    FCBFLD
+        MOV     D, M            ; D = old extent
+        MOV     M, C
+        INX     H
+        INX     H
+        MOV     E, M            ; E = old S2
+        MOV     M, B
         PUSH    D
-        LXI     D, 12
+        CALL    EXCFIND
+        JC      RNDDIR          ; Not cached, look in the directory
+        CALL    EXCUSE
+        LXI     D, EXCDAT
         DAD     D
+        PUSH    H
+        MVI     E, 12
+        CALL    FCBFLD
+        XCHG                    ; DE = FCB+12
+        POP     H               ; HL = cached EX through D15
+        MVI     B, 20
+        CALL    COPYB
         POP     D
-        MOV     M, A
-        ; Store CR
-        POP     PSW
+RNDOK:
+        XRA     A
+        RET
+RNDDIR:
+        CALL    FINDEXT
+        CPI     0FFH
+        JZ      RNDNF
+        CALL    LOADEXT
+        POP     D
+        RET
+RNDNF:
+        LDA     FUNCT
+        CPI     33
+        JNZ     RNDMK
+        ; Reading an extent that was never written, keep the current one
+        MVI     E, 12
+        CALL    FCBFLD
+        POP     D
+        MOV     M, D
+        INX     H
+        INX     H
+        MOV     M, E
+        MVI     A, 4            ; 4 = seek to unwritten extent
+        RET
+RNDMK:
+        POP     D
+        ; Writing: start a new, empty extent
+        MVI     E, 15
+        CALL    FCBFLD          ; HL = RC
+        MVI     B, 17           ; RC and allocation map
+RNDCLR:
+        MVI     M, 0
+        INX     H
+        DCR     B
+        JNZ     RNDCLR
+        CALL    F21MKE
+        ORA     A
+        RZ
+        MVI     A, 5            ; 5 = directory overflow
+        RET
+RNDERR6:
+        MVI     A, 6            ; 6 = seek past end of disk
+        RET
+
+; MAXS2 - Highest S2 the current drive can hold, DSM >> (12 - BSH)
+; Input: CDSM, CBSH  Output: HL=S2  Clobbers: A, D, flags
+MAXS2:
+        LDA     CBSH
+        MOV     D, A
+        MVI     A, 12
+        SUB     D
+        MOV     D, A            ; D = shift (4096 records per S2)
+        LHLD    CDSM
+MS2LP:
+        MOV     A, H
+        ORA     A               ; Clear carry
+        RAR
+        MOV     H, A
+        MOV     A, L
+        RAR
+        MOV     L, A
+        DCR     D
+        JNZ     MS2LP
+        RET
+
+;-------------------------------------------------------------------------------
+; Extent Cache
+;-------------------------------------------------------------------------------
+; Holds EX through D15 of recently used extents, keyed by drive, user,
+; name, EX and S2, so random I/O that moves between extents only reads
+; the directory on a miss. Every entry matches its directory entry: it
+; is stored after an extent is read from or written to the directory,
+; through whichever FCB, and emptied by F13, F19, F22, F23 and F37. The
+; age byte ranks entries 0 (most recent) upwards; free entries have age
+; and drive FFH.
+;-------------------------------------------------------------------------------
+
+; EXCFIND - Look up the FCB's current extent in the extent cache
+; Input: CURDSK, USERNO, CURFCB (name, EX, S2)  Output: CY clear and HL=entry if cached, CY set if not  Clobbers: A, BC, DE
+EXCFIND:
+        LXI     H, EXCACHE
+        MVI     B, NEXC
+EXFLP:
+        PUSH    B
+        PUSH    H
+        INX     H
+        LDA     CURDSK
+        CMP     M
+        JNZ     EXFNX
+        INX     H
+        LDA     USERNO
+        CMP     M
+        JNZ     EXFNX
+        INX     H
+        XCHG                    ; DE = entry name
         LHLD    CURFCB
-        LXI     D, 32
+        INX     H               ; HL = FCB name
+        MVI     C, 12           ; Name and EX
+EXFCMP:
+        MOV     A, M
+        ANI     7FH             ; Ignore attribute bits
+        XCHG
+        CMP     M
+        XCHG
+        JNZ     EXFNX
+        INX     H
+        INX     D
+        DCR     C
+        JNZ     EXFCMP
+        INX     H
+        INX     D               ; Skip S1
+        LDAX    D
+        CMP     M               ; S2
+        JNZ     EXFNX
+        POP     H               ; Hit, HL = entry
+        POP     B
+        ORA     A               ; Clear carry
+        RET
+EXFNX:
+        POP     H
+        POP     B
+        LXI     D, EXCSIZ
         DAD     D
+        DCR     B
+        JNZ     EXFLP
+        STC                     ; Miss
+        RET
+
+; EXCPUT - Store the FCB's EX through D15 in the extent cache
+; Input: CURDSK, USERNO, CURFCB  Output: (entry stored, most recent)  Clobbers: A, BC, DE, HL, flags
+EXCPUT:
+        CALL    EXCFIND
+        JNC     EXPSET          ; Already cached, refresh it
+        ; Replace the oldest entry (free entries are oldest)
+        LXI     H, EXCACHE
+        MVI     B, NEXC
+        MVI     C, 0            ; C = oldest age so far
+EXPLP:
+        MOV     A, M
+        CMP     C
+        JC      EXPNX
+        MOV     C, A
+        SHLD    EXCPTR
+EXPNX:
+        LXI     D, EXCSIZ
+        DAD     D
+        DCR     B
+        JNZ     EXPLP
+        LHLD    EXCPTR
+EXPSET:
+        CALL    EXCUSE
+        INX     H
+        LDA     CURDSK
         MOV     M, A
-        ; For random access, just return success
-        ; The FCB should already have correct allocation from OPEN
-        XRA     A               ; Return success
+        INX     H
+        LDA     USERNO
+        MOV     M, A
+        INX     H
+        XCHG                    ; DE = entry name
+        LHLD    CURFCB
+        INX     H               ; HL = FCB name
+        MVI     B, 11
+EXPNAM:
+        MOV     A, M
+        ANI     7FH             ; Attribute bits are not part of the key
+        STAX    D
+        INX     H
+        INX     D
+        DCR     B
+        JNZ     EXPNAM
+        MVI     B, 20           ; HL = FCB+12, DE = entry EX through D15
+        JMP     COPYB
+
+; EXCUSE - Make extent cache entry HL the most recent
+; Input: HL=entry  Output: (ages updated)  Clobbers: A, BC, DE
+EXCUSE:
+        MOV     C, M            ; C = entry's age
+        PUSH    H
+        LXI     H, EXCACHE
+        MVI     B, NEXC
+EXULP:
+        MOV     A, M
+        CMP     C
+        JNC     EXUNX
+        INR     M               ; Was more recent, now one older
+EXUNX:
+        LXI     D, EXCSIZ
+        DAD     D
+        DCR     B
+        JNZ     EXULP
+        POP     H
+        MVI     M, 0            ; Age 0 = most recent
         RET
-RNDERR6:
-        MVI     A, 6            ; 6 = seek past end of disk
+
+; EXCCLR - Empty the extent cache
+; Input: (none)  Output: (all entries free)  Clobbers: A, B, DE, HL
+EXCCLR:
+        LXI     H, EXCACHE
+        MVI     B, NEXC
+EXCLP:
+        MVI     M, 0FFH         ; Age
+        INX     H
+        MVI     M, 0FFH         ; Drive
+        LXI     D, EXCSIZ-1
+        DAD     D
+        DCR     B
+        JNZ     EXCLP
         RET
 
 ; COPYB - Copy B bytes from HL to DE
@@ -3284,20 +3820,41 @@ LOGINV: DS      2               ; Login vector
 ROVEC:  DS      2               ; Read-only vector
 
 ; Directory search variables
-SEARCHI: DS     1               ; Search starting index
-SRCHCUR: DS     1               ; Current search index
-DIRSEC: DS      1               ; Directory sector
+SEARCHI: DS     2               ; Search starting index
+SRCHCUR: DS     2               ; Current search index
+DIRSEC: DS      2               ; Directory sector
 DIRENT: DS      1               ; Entry within sector (0-3)
+DIRCDSK: DS     1               ; Drive of sector in CDIRBF (FFH = none)
+DIRCSEC: DS     2               ; Directory sector in CDIRBF
 DIRPTR: DS      2               ; Pointer to directory entry
 
 ; File I/O variables
 RECREQ: DS      1               ; Requested record number
+BLKOP:  DS      1               ; PUTBIT: 0 = free block, else mark used
 MAXREC: DS      2               ; Max record (for file size)
-ALVPTR: DS      2               ; Allocation vector pointer
-TEMP16: DS      2               ; Temporary 16-bit value
-
-; Directory buffer (128 bytes = 4 entries)
-DIRBUF: DS      128
+XDMA:   DS      2               ; Transfer buffer of the current record
+MULTCNT: DB     1               ; Records per F20/F21 call (F44)
+MLEFT:  DS      1               ; Records left in this F20/F21 call
+
+; Extent cache
+EXCPTR: DS      2               ; Entry chosen for replacement
+EXCACHE: DS     NEXC*EXCSIZ     ; Age, drive, user, name, EX through D15
+
+; Current disk's DPH pointers and DPB, copied by SELDRIVE
+CDIRBF: DS      2               ; Directory buffer (shared with the BIOS)
+CDPBA:  DS      2               ; DPB address
+CCSV:   DS      2               ; Checksum vector
+CALV:   DS      2               ; Allocation vector
+CURDPB:
+CSPT:   DS      2               ; Sectors per track
+CBSH:   DS      1               ; Block shift
+CBLM:   DS      1               ; Block mask
+CEXM:   DS      1               ; Extent mask
+CDSM:   DS      2               ; Max block number
+CDRM:   DS      2               ; Max directory entry
+CAL0:   DS      2               ; Directory allocation bits (AL0, AL1)
+CCKS:   DS      2               ; Checksum vector size
+COFF:   DS      2               ; Reserved tracks
 
 ; BDOS stack
         DS      64              ; 32 levels
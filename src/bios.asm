@@ -8,13 +8,8 @@
 ; System Constants
 ;-------------------------------------------------------------------------------
 
-MSIZE   EQU     64              ; System memory size in KB
-
-; Memory layout calculations
-BIAS    EQU     (MSIZE-20)*1024 ; Offset from 20K base system
-CCP     EQU     3400H+BIAS      ; CCP base address
-BDOS    EQU     CCP+0800H       ; BDOS base (CCP + 2K)
-BIOS    EQU     CCP+1600H       ; BIOS base (CCP + 5.5K)
+; Memory layout: MSIZE, CCP, BDOS, BIOS (generated by tools/layout.py)
+        INCLUDE layout.inc
 
 ; Page zero locations
 IOBYTE  EQU     0003H           ; Intel I/O byte
@@ -38,11 +33,40 @@ DMAH    EQU     16              ; DMA address high
 
 ; Disk parameters for 8" SSSD (IBM 3740)
 NDISKS  EQU     4               ; Number of drives supported
+HDDSK   EQU     8               ; z80pack 4MB hard disk drive (I:)
 NSECTS  EQU     26              ; Sectors per track
 NTRKS   EQU     77              ; Tracks per disk
+CCPSEC  EQU     2               ; CCP image: track 0, from sector 2
+
+; Optional track read cache for drives A:-D:. A whole track is read into
+; TRKBUF on the first READ from it and later READs are served from RAM.
+; TRKBUF sits just below the CCP, so (0006H) is lowered to a JMP BDOS+6
+; stub under it and the TPA shrinks by TRKSIZE+3 bytes.
+        IFNDEF  TRKCACHE
+TRKCACHE EQU    0               ; 1 = build with the track cache
+        ENDIF
+TRKSIZE EQU     NSECTS*128      ; One 8" SSSD track
+TRKBUF  EQU     CCP-TRKSIZE     ; Track buffer
+        IF      TRKCACHE
+BDOSV   EQU     TRKBUF-3        ; BDOS entry stub below the track buffer
+        ELSE
+BDOSV   EQU     BDOS+6          ; BDOS entry point (after serial check)
+        ENDIF
+
+; Optional FDC access trace. SELDSK, SETTRK, READ and WRITE each send a
+; 5-byte record to the punch port (AUXDAT): op, drive, track, logical
+; sector, physical sector. tools/fdctrace.py decodes and analyzes it.
+        IFNDEF  TRACE
+TRACE   EQU     0               ; 1 = build with the FDC trace
+        ENDIF
+TRREAD  EQU     0               ; Trace ops (low nibble of the op byte)
+TRWRIT  EQU     1               ; WRITE, write type C in the high nibble
+TRSEL   EQU     2
+TRTRK   EQU     3
 
 ;-------------------------------------------------------------------------------
 ; BIOS Jump Table - 17 entry points, each 3 bytes (JMP instruction)
+; followed by a pointer to the I/O statistics block at BIOS+33H
 ;-------------------------------------------------------------------------------
 
         ORG     BIOS
@@ -64,6 +88,7 @@ WBOOTE: JMP     WBOOT           ; 03 - Warm boot
         JMP     WRITE           ; 2A - Write sector
         JMP     LISTST          ; 2D - List status
         JMP     SECTRAN         ; 30 - Sector translate
+        DW      IOSTAT          ; 33 - I/O statistics block (see Data Area)
 
 ;-------------------------------------------------------------------------------
 ; Signon Message
@@ -81,17 +106,19 @@ SIGNON: DB      0DH, 0AH
 ;-------------------------------------------------------------------------------
 ; Description:
 ;   Performs initial system startup. Clears page zero state (CDISK, IOBYTE),
-;   displays signon message, initializes warm boot and BDOS entry vectors
-;   at addresses 0000H and 0005H, then transfers control to CCP.
+;   displays signon message, records the CCP checksum for WBOOT,
+;   initializes warm boot and BDOS entry vectors at addresses 0000H and
+;   0005H, then transfers control to CCP.
 ;
 ; Input:
 ;   (none)  - [---] Called by boot loader after system load
 ;
 ; Output:
 ;   (0000H) - JMP WBOOT vector installed
-;   (0005H) - JMP BDOS+6 vector installed
+;   (0005H) - JMP BDOSV vector installed
 ;   CDISK   - Cleared to 0 (drive A:, user 0)
 ;   IOBYTE  - Cleared to 0
+;   IOSTAT  - Counters cleared
 ;
 ; Clobbers:
 ;   All registers
@@ -106,6 +133,15 @@ BOOT:
         STA     CDISK           ; Clear current disk (A:, user 0)
         STA     IOBYTE          ; Clear IOBYTE
 
+        ; Clear the I/O statistics
+        LXI     H, IOSTAT
+        MVI     M, NSTATS       ; Header: number of counters
+        MVI     B, NSTATS*4
+BOOT0:  INX     H
+        MOV     M, A
+        DCR     B
+        JNZ     BOOT0
+
         ; Print signon message
         LXI     H, SIGNON
 BOOT1:  MOV     A, M
@@ -117,13 +153,20 @@ BOOT1:  MOV     A, M
         JMP     BOOT1
 
 GOCPM:
+        LDA     CCP+3           ; Checked groups from the CCP header
+        STA     CCPLEN
+        CALL    CCPCHK
+        SHLD    CCPSUM          ; Sum of the CCP as loaded
+        IF      TRKCACHE
+        CALL    TRKINIT         ; Install stub, empty the track cache
+        ENDIF
         MVI     A, 0C3H         ; JMP opcode
         STA     0000H           ; Warm boot vector
         LXI     H, WBOOTE
         SHLD    0001H           ; Address for warm boot
 
         STA     0005H           ; BDOS entry vector
-        LXI     H, BDOS+6       ; BDOS entry point (after serial check)
+        LXI     H, BDOSV        ; BDOS entry point
         SHLD    0006H
 
         LXI     B, 0080H        ; Default DMA address
@@ -134,19 +177,21 @@ GOCPM:
         JMP     CCP             ; Enter CCP
 
 ;-------------------------------------------------------------------------------
-; WBOOT - Warm boot (reload CCP and BDOS)
+; WBOOT - Warm boot (reload CCP if overwritten)
 ;-------------------------------------------------------------------------------
 ; Description:
 ;   Reinitializes the system after a transient program terminates. Sets up
-;   stack, reinstalls page zero vectors for warm boot (0000H) and BDOS
-;   (0005H), then transfers control to CCP with current disk selection.
+;   stack, checks the CCP against the sum taken at cold boot and reloads
+;   it from the system track if a program wrote over it, reinstalls page
+;   zero vectors for warm boot (0000H) and BDOS (0005H), then transfers
+;   control to CCP with current disk selection.
 ;
 ; Input:
 ;   (none)  - [---] Called via JMP 0000H
 ;
 ; Output:
 ;   (0000H) - JMP WBOOT vector installed
-;   (0005H) - JMP BDOS+6 vector installed
+;   (0005H) - JMP BDOSV vector installed
 ;   SP      - Set to 0080H
 ;
 ; Clobbers:
@@ -156,22 +201,36 @@ GOCPM:
 ;   - Does not return; transfers to CCP
 ;   - Preserves current disk from CDISK
 ;   - Sets default DMA to 0080H
-;   - Full CP/M would reload CCP+BDOS from disk; this version skips reload
+;   - Transients may use memory up to the BDOS; an intact CCP costs one
+;     checksum pass and no disk reads
+;   - The BDOS is not reloaded; programs must stay below (0006H)
 ;-------------------------------------------------------------------------------
 
 WBOOT:
         LXI     SP, 0080H       ; Temporary stack in page zero
+        IF      TRKCACHE
+        CALL    TRKINIT         ; Install stub, empty the track cache
+        ENDIF
 
-        ; For now, just reinitialize vectors and enter CCP
-        ; Full implementation would reload CCP+BDOS from disk
-
+        CALL    CCPCHK          ; HL = sum of the CCP now
+        XCHG
+        LHLD    CCPSUM
+        MOV     A, L
+        CMP     E
+        JNZ     WBOOT1
+        MOV     A, H
+        CMP     D
+        JZ      WBOOT2          ; Intact, nothing to load
+WBOOT1:
+        CALL    CCPLD           ; Overwritten, reload from track 0
+WBOOT2:
         MVI     A, 0C3H         ; JMP opcode
         STA     0000H
         LXI     H, WBOOTE
         SHLD    0001H
 
         STA     0005H
-        LXI     H, BDOS+6
+        LXI     H, BDOSV
         SHLD    0006H
 
         LXI     B, 0080H
@@ -181,6 +240,85 @@ WBOOT:
         MOV     C, A
         JMP     CCP
 
+;-------------------------------------------------------------------------------
+; CCP image helpers (internal)
+;-------------------------------------------------------------------------------
+
+; CCPCHK - Sum the CCPLEN 16-byte groups of CCP code and constants
+; Words are popped through SP, so nothing may use the stack meanwhile.
+; Input: CCPLEN  Output: HL = 16-bit word sum  Clobbers: A, BC, DE
+CCPCHK:
+        LXI     H, 0
+        DAD     SP
+        SHLD    CCPSP
+        LXI     SP, CCP
+        LXI     H, 0            ; HL = sum
+        LDA     CCPLEN
+        MOV     E, A
+CCPCKL:
+        POP     B
+        DAD     B
+        POP     B
+        DAD     B
+        POP     B
+        DAD     B
+        POP     B
+        DAD     B
+        POP     B
+        DAD     B
+        POP     B
+        DAD     B
+        POP     B
+        DAD     B
+        POP     B
+        DAD     B
+        DCR     E
+        JNZ     CCPCKL
+        XCHG
+        LHLD    CCPSP
+        SPHL
+        XCHG
+        RET
+
+; CCPLD - Read the CCPLEN groups back from track 0 of drive A:
+; Input: CCPLEN  Output: CCP reloaded (halts on FDC error)  Clobbers: A, BC, DE, HL
+CCPLD:
+        LDA     CCPLEN
+        ADI     7               ; 8 groups per sector, rounded up
+        RRC
+        RRC
+        RRC
+        ANI     1FH
+        ADI     CCPSEC
+        MOV     B, A            ; B = sector after the last
+        XRA     A
+        OUT     FDCD            ; Drive A:
+        OUT     FDCT            ; Track 0
+        LXI     H, CCP
+        LXI     D, 128
+        MVI     C, CCPSEC
+CCPLDL:
+        MOV     A, C
+        OUT     FDCS
+        MOV     A, L
+        OUT     DMAL
+        MOV     A, H
+        OUT     DMAH
+        XRA     A               ; Command 0 = read
+        OUT     FDCOP
+        IN      FDCST
+        ORA     A
+        JNZ     CCPERR
+        DAD     D
+        INR     C
+        MOV     A, C
+        CMP     B
+        JNZ     CCPLDL
+        RET
+CCPERR:
+        HLT                     ; No CCP to return to
+        JMP     CCPERR
+
 ;-------------------------------------------------------------------------------
 ; Console I/O Functions
 ;-------------------------------------------------------------------------------
@@ -222,15 +360,21 @@ CONST:
 ;
 ; Output:
 ;   A       - ASCII character (00H-7EH, or 08H for DEL)
+;   STCIN   - Incremented
 ;
 ; Clobbers:
 ;   Flags
 ;-------------------------------------------------------------------------------
 
 CONIN:
+        PUSH    H
+        LXI     H, STCIN
+        CALL    STINC
+        POP     H
+CONIN1:
         IN      CONSTA          ; Check status
         ANI     01H
-        JZ      CONIN           ; Loop until ready
+        JZ      CONIN1          ; Loop until ready
         IN      CONDAT          ; Read character
         ANI     7FH             ; Strip parity/high bit
         CPI     7FH             ; DEL?
@@ -248,13 +392,17 @@ CONIN:
 ;   C       - [REQ] ASCII character to output
 ;
 ; Output:
-;   (none)
+;   STCOUT  - Incremented
 ;
 ; Clobbers:
-;   A
+;   A, flags
 ;-------------------------------------------------------------------------------
 
 CONOUT:
+        PUSH    H
+        LXI     H, STCOUT
+        CALL    STINC
+        POP     H
         MOV     A, C
         OUT     CONDAT          ; Output character
         RET
@@ -369,12 +517,17 @@ READER:
 ;
 ; Output:
 ;   SEKTRK  - Set to 0
+;   STHOME  - Incremented
 ;
 ; Clobbers:
-;   A, BC
+;   A, BC, flags
 ;-------------------------------------------------------------------------------
 
 HOME:
+        PUSH    H
+        LXI     H, STHOME
+        CALL    STINC
+        POP     H
         LXI     B, 0            ; Track 0
         ; Fall through to SETTRK
 
@@ -393,11 +546,19 @@ HOME:
 ;
 ; Clobbers:
 ;   A
+;
+; Notes:
+;   - With TRACE, sends a TRTRK record (HOME sends one for track 0)
 ;-------------------------------------------------------------------------------
 
 SETTRK:
         MOV     A, C
         STA     SEKTRK          ; Save track
+        IF      TRACE
+        MVI     A, TRTRK
+        CALL    TRCREC
+        MOV     A, C            ; A = track, as without TRACE
+        ENDIF
         RET
 
 ;-------------------------------------------------------------------------------
@@ -454,27 +615,43 @@ SETDMA:
 ;   directory buffer, DPB, checksum vector, and allocation vector.
 ;
 ; Input:
-;   C       - [REQ] Disk number (0=A, 1=B, 2=C, 3=D)
+;   C       - [REQ] Disk number (0=A, 1=B, 2=C, 3=D, 8=I)
 ;   E       - [OPT] 0=first select (cold), non-0=already logged in
 ;
 ; Output:
-;   HL      - DPH address if valid (0-3), 0000H if invalid drive
+;   HL      - DPH address if valid (0-3, 8), 0000H if invalid drive
 ;   SEKDSK  - Updated with selected disk number
+;   STSEL   - Incremented
 ;
 ; Clobbers:
 ;   A, DE, flags
 ;
 ; Notes:
 ;   - Supports NDISKS (4) drives: A: through D:
+;   - Plus the z80pack hard disk at HDDSK (I:)
 ;   - DPH is 16 bytes per drive
+;   - With TRACE, sends a TRSEL record
 ;-------------------------------------------------------------------------------
 
 SELDSK:
+        LXI     H, STSEL
+        CALL    STINC
         MOV     A, C
         STA     SEKDSK          ; Save selected disk
+        IF      TRACE
+        MVI     A, TRSEL
+        CALL    TRCREC
+        MOV     A, C
+        ENDIF
 
         CPI     NDISKS          ; Check if valid drive
-        JNC     SELNO           ; Invalid if >= NDISKS
+        JC      SELFD           ; Floppy drive A-D
+        CPI     HDDSK
+        JNZ     SELNO           ; Invalid unless hard disk
+        LXI     H, DPH8
+        RET
+
+SELFD:
 
         ; Calculate DPH address: DPH0 + (drive * 16)
         LXI     H, 0
@@ -497,7 +674,8 @@ SELNO:
 ; Description:
 ;   Converts a logical sector number to a physical sector number using
 ;   the disk's sector translation table (skew table). If no translation
-;   table is provided (DE=0), returns the logical sector unchanged.
+;   table is provided (DE=0), returns the logical sector plus one, as
+;   z80pack numbers physical sectors from 1.
 ;
 ; Input:
 ;   BC      - [REQ] Logical sector number (0 to NSECTS-1)
@@ -512,9 +690,14 @@ SELNO:
 ; Notes:
 ;   - Translation table is indexed by logical sector
 ;   - 8" SSSD uses 6-sector skew for optimal rotational latency
+;   - With TRACE, keeps the logical sector in TRLSEC for the trace
 ;-------------------------------------------------------------------------------
 
 SECTRAN:
+        IF      TRACE
+        MOV     A, C
+        STA     TRLSEC
+        ENDIF
         MOV     A, D            ; Check if table exists
         ORA     E
         JZ      NOTRAN          ; No translation if DE=0
@@ -526,8 +709,9 @@ SECTRAN:
         RET
 
 NOTRAN:
-        MOV     H, B            ; HL = BC (no translation)
+        MOV     H, B            ; HL = BC + 1 (no translation)
         MOV     L, C
+        INX     H
         RET
 
 ;-------------------------------------------------------------------------------
@@ -543,12 +727,42 @@ NOTRAN:
 ; Output:
 ;   A       - 0 on success, non-0 on error
 ;   (DMAADR)- 128 bytes of sector data on success
+;   STREAD  - Incremented
 ;
 ; Clobbers:
-;   HL, flags
+;   HL, flags (also BC, DE with TRKCACHE)
+;
+; Notes:
+;   - With TRKCACHE, drives A:-D: read a whole track into TRKBUF on a
+;     miss and copy the sector from there
+;   - With TRACE, sends a TRREAD record (cache hits included)
 ;-------------------------------------------------------------------------------
 
 READ:
+        LXI     H, STREAD
+        CALL    STINC
+        IF      TRACE
+        MVI     A, TRREAD
+        CALL    TRCREC
+        ENDIF
+        IF      TRKCACHE
+        LDA     SEKDSK
+        CPI     NDISKS
+        JNC     READ1           ; Only floppy tracks are cached
+        CALL    TRKHIT          ; Track already in TRKBUF?
+        JZ      READ2
+        CALL    TRKFIL          ; No, read the whole track
+        ORA     A
+        RNZ                     ; FDC error, cache left empty
+READ2:
+        CALL    TRKPTR          ; HL = sector in TRKBUF
+        XCHG
+        LHLD    DMAADR          ; DE = sector, HL = DMA
+        CALL    MOVSEC
+        XRA     A
+        RET
+READ1:
+        ENDIF
         CALL    SETFDC          ; Set up FDC parameters
         XRA     A               ; Command 0 = read
         OUT     FDCOP
@@ -568,19 +782,195 @@ READ:
 ;
 ; Output:
 ;   A       - 0 on success, non-0 on error
+;   STWRIT  - Incremented
+;   STDWR   - Incremented for a directory write (C=1)
 ;
 ; Clobbers:
-;   HL
+;   HL (also BC, DE with TRKCACHE)
 ;
 ; Notes:
-;   - Write type used by BDOS for write optimization (not used here)
+;   - Write type is only counted, the write itself is the same for all
+;   - With TRKCACHE, a write to the cached track also updates TRKBUF;
+;     a failed write empties the cache
+;   - With TRACE, sends a TRWRIT record with the write type
 ;-------------------------------------------------------------------------------
 
 WRITE:
+        LXI     H, STWRIT
+        CALL    STINC
+        IF      TRACE
+        MOV     A, C            ; Write type to the high nibble
+        ADD     A
+        ADD     A
+        ADD     A
+        ADD     A
+        ORI     TRWRIT
+        CALL    TRCREC
+        ENDIF
+        MOV     A, C
+        DCR     A               ; Directory write?
+        JNZ     WRITE0
+        LXI     H, STDWR
+        CALL    STINC
+WRITE0:
         CALL    SETFDC          ; Set up FDC parameters
         MVI     A, 1            ; Command 1 = write
         OUT     FDCOP
         IN      FDCST           ; Get status
+        IF      TRKCACHE
+        ORA     A
+        JNZ     TRKERR          ; Write failed, drop the cached track
+        CALL    TRKHIT
+        JNZ     WRITE1          ; Track not cached
+        CALL    TRKPTR          ; Keep the cached copy current
+        XCHG
+        LHLD    DMAADR
+        XCHG                    ; DE = DMA, HL = sector in TRKBUF
+        CALL    MOVSEC
+WRITE1:
+        XRA     A
+        ENDIF
+        RET
+
+        IF      TRKCACHE
+;-------------------------------------------------------------------------------
+; Track cache helpers (internal, TRKCACHE builds only)
+;-------------------------------------------------------------------------------
+
+; TRKINIT - Install the BDOSV stub and empty the track cache
+; Input: (none)  Output: (BDOSV) = JMP BDOS+6, TRKDSK = FFH  Clobbers: A, HL
+TRKINIT:
+        MVI     A, 0C3H         ; JMP opcode
+        STA     BDOSV
+        LXI     H, BDOS+6
+        SHLD    BDOSV+1
+        MVI     A, 0FFH
+        STA     TRKDSK
+        RET
+
+; TRKHIT - Check whether TRKBUF holds SEKTRK of SEKDSK
+; Input: SEKDSK, SEKTRK  Output: Z = hit  Clobbers: A, HL
+TRKHIT:
+        LXI     H, TRKDSK
+        LDA     SEKDSK
+        CMP     M
+        RNZ
+        INX     H               ; TRKTRK
+        LDA     SEKTRK
+        CMP     M
+        RET
+
+; TRKFIL - Read track SEKTRK of SEKDSK into TRKBUF
+; Input: SEKDSK, SEKTRK  Output: A = 0 or FDC status  Clobbers: C, DE, HL
+TRKFIL:
+        MVI     A, 0FFH
+        STA     TRKDSK          ; Empty while filling
+        LDA     SEKDSK
+        OUT     FDCD
+        LDA     SEKTRK
+        OUT     FDCT
+        LXI     H, TRKBUF
+        LXI     D, 128
+        MVI     C, 1            ; Physical sectors are 1-NSECTS
+TRKFLP:
+        MOV     A, C
+        OUT     FDCS
+        MOV     A, L
+        OUT     DMAL
+        MOV     A, H
+        OUT     DMAH
+        XRA     A               ; Command 0 = read
+        OUT     FDCOP
+        IN      FDCST
+        ORA     A
+        RNZ                     ; FDC error
+        DAD     D
+        INR     C
+        MOV     A, C
+        CPI     NSECTS+1
+        JNZ     TRKFLP
+        LDA     SEKDSK
+        STA     TRKDSK
+        LDA     SEKTRK
+        STA     TRKTRK
+        XRA     A
+        RET
+
+; TRKPTR - Get address of sector SEKSEC in TRKBUF
+; Input: SEKSEC  Output: HL = sector address  Clobbers: A, DE
+TRKPTR:
+        LDA     SEKSEC
+        DCR     A               ; Sectors are numbered from 1
+        ORA     A               ; Clear carry
+        RAR                     ; A = sector/2, CY = odd sector
+        MOV     H, A
+        MVI     A, 0
+        RAR                     ; A = 80H for odd sectors
+        MOV     L, A
+        LXI     D, TRKBUF
+        DAD     D
+        RET
+
+; MOVSEC - Copy one 128-byte sector
+; Input: DE = source, HL = destination  Output: (none)  Clobbers: A, B, DE, HL
+MOVSEC:
+        MVI     B, 128
+MOVSLP:
+        LDAX    D
+        MOV     M, A
+        INX     D
+        INX     H
+        DCR     B
+        JNZ     MOVSLP
+        RET
+
+; TRKERR - Empty the track cache and return FDC status A
+TRKERR:
+        MOV     B, A
+        MVI     A, 0FFH
+        STA     TRKDSK
+        MOV     A, B
+        RET
+        ENDIF
+
+        IF      TRACE
+;-------------------------------------------------------------------------------
+; TRCREC - Send an FDC trace record to the punch port (internal, TRACE only)
+;-------------------------------------------------------------------------------
+; Input: A = op  Output: (AUXDAT) op, SEKDSK, SEKTRK, TRLSEC, SEKSEC
+; Clobbers: A
+;-------------------------------------------------------------------------------
+
+TRCREC:
+        OUT     AUXDAT
+        LDA     SEKDSK
+        OUT     AUXDAT
+        LDA     SEKTRK
+        OUT     AUXDAT
+        LDA     TRLSEC
+        OUT     AUXDAT
+        LDA     SEKSEC
+        OUT     AUXDAT
+        RET
+        ENDIF
+
+;-------------------------------------------------------------------------------
+; STINC - Add 1 to a 32-bit I/O statistics counter (internal)
+;-------------------------------------------------------------------------------
+; Input: HL = counter (low byte first)  Output: (none)  Clobbers: HL, flags
+;-------------------------------------------------------------------------------
+
+STINC:
+        INR     M
+        RNZ
+        INX     H
+        INR     M
+        RNZ
+        INX     H
+        INR     M
+        RNZ
+        INX     H
+        INR     M
         RET
 
 ;-------------------------------------------------------------------------------
@@ -662,6 +1052,16 @@ DPH3:   DW      XLAT
         DW      CHK03
         DW      ALL03
 
+; DPH for drive I: (hard disk, no skew)
+DPH8:   DW      0000H
+        DW      0000H
+        DW      0000H
+        DW      0000H
+        DW      DIRBUF
+        DW      DPBHD
+        DW      0000H           ; No checksums (fixed disk)
+        DW      ALL08
+
 ; Disk Parameter Block for 8" SSSD (IBM 3740 format)
 ; 77 tracks, 26 sectors/track, 128 bytes/sector
 ; 2 reserved tracks, 1K blocks, 64 directory entries
@@ -676,6 +1076,20 @@ DPB0:   DW      26              ; SPT - sectors per track
         DW      16              ; CKS - checksum vector size (DRM+1)/4
         DW      2               ; OFF - reserved tracks
 
+; Disk Parameter Block for z80pack 4MB hard disk
+; 255 tracks, 128 sectors/track, 128 bytes/sector
+; No reserved tracks, 2K blocks, 1024 directory entries
+DPBHD:  DW      128             ; SPT - sectors per track
+        DB      4               ; BSH - block shift factor (2K = 2^4 * 128)
+        DB      15              ; BLM - block mask
+        DB      0               ; EXM - extent mask
+        DW      2039            ; DSM - total blocks - 1
+        DW      1023            ; DRM - directory entries - 1
+        DB      0FFH            ; AL0 - directory allocation bitmap
+        DB      0FFH            ; AL1
+        DW      0               ; CKS - fixed disk, no checksums
+        DW      0               ; OFF - reserved tracks
+
 ;-------------------------------------------------------------------------------
 ; Data Area
 ;-------------------------------------------------------------------------------
@@ -684,6 +1098,36 @@ SEKDSK: DS      1               ; Seek disk number
 SEKTRK: DS      1               ; Seek track number
 SEKSEC: DS      1               ; Seek sector number
 DMAADR: DS      2               ; DMA address
+CCPLEN: DS      1               ; CCP 16-byte groups checked at warm boot
+CCPSUM: DS      2               ; Their sum at cold boot
+CCPSP:  DS      2               ; Caller's SP during CCPCHK
+
+; I/O statistics block, found through the pointer at BIOS+33H and
+; cleared at cold boot. Byte 0 holds NSTATS, then NSTATS 32-bit
+; counters (low byte first) in this order. The BDOS counts directory
+; sector reads, directory cache hits and ALV rebuilds here; the other
+; counters are kept by the BIOS entries named.
+NSTATS  EQU     10              ; Number of counters
+IOSTAT: DS      1               ; NSTATS
+STREAD: DS      4               ; READ calls
+STWRIT: DS      4               ; WRITE calls
+STDWR:  DS      4               ; WRITE calls with C=1 (directory)
+STSEL:  DS      4               ; SELDSK calls
+STHOME: DS      4               ; HOME calls
+STCIN:  DS      4               ; CONIN calls
+STCOUT: DS      4               ; CONOUT calls
+STDRD:  DS      4               ; BDOS directory sector reads (READDIR misses)
+STDHIT: DS      4               ; BDOS directory cache hits (READDIR)
+STLOG:  DS      4               ; BDOS ALV rebuilds (INITALV)
+
+        IF      TRKCACHE
+TRKDSK: DS      1               ; Drive in TRKBUF (FFH = none)
+TRKTRK: DS      1               ; Track in TRKBUF
+        ENDIF
+
+        IF      TRACE
+TRLSEC: DS      1               ; Last logical sector given to SECTRAN
+        ENDIF
 
 DIRBUF: DS      128             ; Directory buffer (shared)
 
@@ -699,4 +1143,9 @@ ALL01:  DS      31
 ALL02:  DS      31
 ALL03:  DS      31
 
+; Allocation vector for drive I: (255 bytes for 2040 blocks)
+ALL08:  DS      255
+
+BIOSEND:                        ; End of BIOS data (tools/layout.py packs to here)
+
         END
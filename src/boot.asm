@@ -16,7 +16,7 @@
 ;   0000H-007FH : This boot loader during load
 ;   0080H       : Stack pointer during load
 ;   CCP         : Destination for system load (MSIZE-dependent)
-;   BIOS        : Cold boot entry point (CCP + 1600H)
+;   BIOS        : Cold boot entry point (page aligned, above the BDOS)
 ;
 ; Disk Layout (8" SSSD, 26 sectors/track):
 ;   Track 0, Sector 1  : This boot loader
@@ -26,16 +26,13 @@
 ;   1. Initialize stack and select drive A, track 0
 ;   2. Loop: Set DMA, set sector, read, advance address
 ;   3. Wrap sector 26->1 and increment track
-;   4. After NSECTS sectors, jump to BIOS cold boot
+;   4. After SYSSECS sectors, jump to BIOS cold boot
 ;
 ;===============================================================================
 
-MSIZE   EQU     64
-BIAS    EQU     (MSIZE-20)*1024
-CCP     EQU     3400H+BIAS
-BIOS    EQU     CCP+1600H
-
-NSECTS  EQU     52              ; Sectors to load (CCP+BDOS+BIOS)
+; Memory layout: CCP, BIOS and SYSSECS, the sectors to load
+; (generated by tools/layout.py)
+        INCLUDE layout.inc
 
 ; z80pack I/O ports (decimal values)
 FDCD    EQU     10              ; FDC drive select
@@ -70,7 +67,7 @@ BOOT:
         MVI     C, 2            ; Current sector
         MVI     D, 0            ; Current track (must initialize!)
         LXI     H, CCP          ; Load address
-        MVI     B, NSECTS       ; Sector count
+        MVI     B, SYSSECS      ; Sector count
 
 LDLP:
         ; Set DMA
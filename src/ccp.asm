@@ -5,14 +5,11 @@
 ;===============================================================================
 
 ;-------------------------------------------------------------------------------
-; System Constants (must match BIOS/BDOS)
+; System Constants
 ;-------------------------------------------------------------------------------
 
-MSIZE   EQU     64
-BIAS    EQU     (MSIZE-20)*1024
-CCP     EQU     3400H+BIAS
-BDOS    EQU     CCP+0800H
-BIOS    EQU     CCP+1600H
+; Memory layout: MSIZE, CCP, BDOS, BIOS (generated by tools/layout.py)
+        INCLUDE layout.inc
 
 ; Page zero locations
 WBOOT   EQU     0000H           ; Warm boot vector
@@ -54,6 +51,7 @@ B_SETDMA EQU    26
 B_GETALL EQU    27
 B_SETATT EQU    30
 B_USER   EQU    32
+B_MULTI  EQU    44
 
 ;-------------------------------------------------------------------------------
 ; CCP Entry Point
@@ -61,6 +59,9 @@ B_USER   EQU    32
 
         ORG     CCP
 
+        JMP     CCPENT          ; BIOS cold and warm boot enter here
+        DB      (CURDSK-CCP)/16 ; 16-byte groups checked by BIOS WBOOT
+
 ;-------------------------------------------------------------------------------
 ; CCPENT - CCP warm boot entry point
 ;-------------------------------------------------------------------------------
@@ -112,6 +113,8 @@ CCPRET:
         LXI     D, DBUFF
         MVI     C, B_SETDMA
         CALL    ENTRY
+        ; One record per F20/F21 again
+        CALL    MULT1
 
 ; CCPLP - Main command loop
 ; Prompts, reads command, parses, and executes
@@ -595,7 +598,9 @@ EXSK2:
 ;-------------------------------------------------------------------------------
 ; Description:
 ;   Loads a .COM file from disk into the TPA (0100H) and executes it.
-;   Sets up FCBs and command tail before transferring control.
+;   Reads up to 128 records per F20 call (multi-sector count, F44),
+;   never past the CCP. Sets up FCBs and command tail before
+;   transferring control.
 ;
 ; Input:
 ;   DFCB    - [REQ] Program name (extension set to .COM)
@@ -629,22 +634,54 @@ EXTRAN:
         SHLD    LOADAD
 
 EXTLP:
+        ; Records that fit below the CCP, at most 128
+        LHLD    LOADAD
+        MOV     A, L
+        CMA
+        MOV     L, A
+        MOV     A, H
+        CMA
+        MOV     H, A
+        INX     H               ; HL = -LOADAD
+        LXI     D, CCP
+        DAD     D               ; HL = bytes left below CCP
+        MVI     E, 128
+        MOV     A, H
+        CPI     40H             ; 16K or more left
+        JNC     EXTCNT
+        DAD     H
+        MOV     E, H            ; Bytes / 128
+EXTCNT:
+        MOV     A, E
+        STA     RECCNT
+        MVI     C, B_MULTI
+        CALL    BDOSCL
+
         ; Set DMA to load address
         LHLD    LOADAD
         XCHG
         MVI     C, B_SETDMA
         CALL    BDOSCL
 
-        ; Read next record
+        ; Read the next chunk
         LXI     D, DFCB
         MVI     C, B_READ
-        CALL    BDOSCL
+        CALL    ENTRY           ; H = records read if A is not 0
         ORA     A
         JNZ     EXTRUN          ; EOF or error - done loading
 
-        ; Advance load address
+        ; Advance load address by the chunk
         LHLD    LOADAD
-        LXI     D, 128
+        LDA     RECCNT
+        MOV     D, A
+        MVI     E, 0
+        ORA     A
+        MOV     A, D
+        RAR
+        MOV     D, A
+        MOV     A, E
+        RAR
+        MOV     E, A            ; DE = records * 128
         DAD     D
         SHLD    LOADAD
 
@@ -657,11 +694,14 @@ EXTLP:
         JC      EXTLP           ; Still below CCP
 
         ; Program too large
+        CALL    MULT1
         LXI     D, MSGTL
         CALL    PRTSTR
         RET
 
 EXTRUN:
+        CALL    MULT1           ; Transients start with one record per call
+
         ; Close file
         LXI     D, DFCB
         MVI     C, B_CLOSE
@@ -1095,7 +1135,8 @@ RENNF:
 ;-------------------------------------------------------------------------------
 ; Description:
 ;   Displays the contents of a text file to the console. Stops at ^Z
-;   (EOF marker) or end of file. Can be aborted with ^C.
+;   (EOF marker) or end of file. Can be aborted with ^C. Reads one
+;   record per F20 call into DBUFF, so the TPA is left intact for SAVE.
 ;
 ; Input:
 ;   DBUFF   - [REQ] Command line with filename
@@ -1168,10 +1209,8 @@ TYPCHR:
         JNZ     TYPCHR
 
         ; Check for ^C to abort
-        PUSH    B
         MVI     C, B_CONST
         CALL    BDOSCL
-        POP     B
         ORA     A
         JZ      TYPLP
         MVI     C, B_CONIN
@@ -1209,6 +1248,10 @@ CMDSAV:
         ; Parse number of pages from command line
         LXI     H, DBUFF+1
         CALL    SKIPSPC
+        ; Skip "SAVE"
+        LXI     D, 4
+        DAD     D
+        CALL    SKIPSPC
         CALL    GETNUM
         ORA     A
         JZ      SAVERR          ; No number
@@ -1380,6 +1423,12 @@ BDOSCL:
         POP     H
         RET
 
+; MULT1 - Set the BDOS multi-sector count (F44) back to 1 record
+MULT1:
+        MVI     E, 1
+        MVI     C, B_MULTI
+        JMP     BDOSCL
+
 ; GETDSK - Select current disk via BDOS
 ; Input: CURDSK  Output: (disk selected)  Clobbers: A, C, E, flags
 GETDSK:
@@ -1449,12 +1498,17 @@ MSGWER: DB      'Write Error$'
 MSGTL:  DB      'Too Large$'
 MSGCNF: DB      'All (Y/N)?$'
 
+        DS      (CCP-$) & 15    ; Checked image ends on a 16-byte group
+
 ;-------------------------------------------------------------------------------
 ; Data Area
 ;-------------------------------------------------------------------------------
+; Everything the CCP writes lives from CURDSK on. The bytes before it are
+; the image the BIOS checksums at warm boot (group count at CCP+3).
 
 CURDSK: DS      1               ; Current disk
 LOADAD: DS      2               ; Load address for transient
+RECCNT: DS      1               ; Records in the current load chunk
 SAVPGS: DS      1               ; Pages to save
 CMDTAIL: DS     2               ; Pointer to command tail (after command name)
 
@@ -0,0 +1,181 @@
+; Directory Fill Benchmark
+; Times: F22 create until the directory is full, F19 delete, F17 search
+;
+; Creates empty files BDxx.DAT (xx = 00, 01, ...) until F22 reports
+; the directory full or MAXF files exist, deletes them one by one, and
+; checks with F17 that none are left. Run under pysim --stats (or
+; run_tests.py --bench) for instruction, cycle and BIOS call counts.
+
+        ORG     0100H
+
+        JMP     START
+
+; BDOS Functions
+BDOS    EQU     0005H
+F_CONOUT EQU    2
+F_PRTSTR EQU    9
+F_SFIRST EQU    17
+F_DELETE EQU    19
+F_MAKE  EQU     22
+
+; Benchmark size
+MAXF    EQU     64              ; Files at most (directory entries on A:)
+
+; ASCII
+CR      EQU     0DH
+LF      EQU     0AH
+
+START:
+        LXI     D, MSGHDR
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        ; Create files until the directory is full
+        XRA     A
+        STA     FILES
+MKLOOP:
+        LDA     FILES
+        CALL    SETNAM
+        LXI     D, FCB
+        MVI     C, F_MAKE
+        CALL    BDOS
+        INR     A
+        JZ      FULL
+        LDA     FILES
+        INR     A
+        STA     FILES
+        CPI     MAXF
+        JNZ     MKLOOP
+FULL:
+        LDA     FILES
+        ORA     A
+        JZ      ERRNONE         ; Directory was full already
+
+        ; Delete them one by one
+        XRA     A
+        STA     INDEX
+DELOOP:
+        LDA     INDEX
+        CALL    SETNAM
+        LXI     D, FCB
+        MVI     C, F_DELETE
+        CALL    BDOS
+        INR     A
+        JZ      ERRDEL
+        LDA     FILES
+        MOV     B, A
+        LDA     INDEX
+        INR     A
+        STA     INDEX
+        CMP     B
+        JNZ     DELOOP
+
+        ; None may be left
+        LXI     D, WILD
+        MVI     C, F_SFIRST
+        CALL    BDOS
+        INR     A
+        JNZ     ERRLEFT
+
+        ; Report
+        LXI     D, MSGFILE
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        LDA     FILES
+        CALL    PRTHEX
+        CALL    CRLF
+        LXI     D, MSGPASS
+        JMP     DONE
+
+ERRNONE:
+        LXI     D, MSGNONE
+        JMP     DONE
+ERRDEL:
+        LXI     D, MSGDEL
+        JMP     DONE
+ERRLEFT:
+        LXI     D, MSGLEFT
+
+DONE:
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        RET
+
+;---------------------------------------------------------------
+; SETNAM - Set FCB to BDxx.DAT for file number A (xx in hex)
+; and clear its other fields
+;---------------------------------------------------------------
+SETNAM:
+        PUSH    PSW
+        RRC
+        RRC
+        RRC
+        RRC
+        CALL    HEXDIG
+        STA     FCB+3
+        POP     PSW
+        CALL    HEXDIG
+        STA     FCB+4
+        LXI     H, FCB+12
+        MVI     B, 36-12
+        XRA     A
+SNLP:
+        MOV     M, A
+        INX     H
+        DCR     B
+        JNZ     SNLP
+        RET
+
+; HEXDIG - ASCII hex digit for the low nibble of A
+HEXDIG:
+        ANI     0FH
+        ADI     '0'
+        CPI     '9'+1
+        RC
+        ADI     7
+        RET
+
+;---------------------------------------------------------------
+; Helper routines
+;---------------------------------------------------------------
+CRLF:
+        MVI     E, CR
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        MVI     E, LF
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        RET
+
+PRTHEX:
+        PUSH    PSW
+        RRC
+        RRC
+        RRC
+        RRC
+        CALL    PRTNYB
+        POP     PSW
+PRTNYB:
+        CALL    HEXDIG
+        MOV     E, A
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        RET
+
+; Storage
+FILES:  DB      0               ; Files created
+INDEX:  DB      0               ; File being deleted
+FCB:    DB      0, 'BDxx    DAT'
+        DS      24
+WILD:   DB      0, 'BD??????DAT'
+        DS      24
+
+; Messages
+MSGHDR: DB      'BDIRFUL: Directory fill benchmark', CR, LF, '$'
+MSGFILE: DB     'Files: ', '$'
+MSGPASS: DB     'PASS', CR, LF, '$'
+MSGNONE: DB     'FAIL: Directory already full', CR, LF, '$'
+MSGDEL: DB      'FAIL: Delete failed', CR, LF, '$'
+MSGLEFT: DB     'FAIL: Files left after delete', CR, LF, '$'
+
+        END     START
@@ -0,0 +1,298 @@
+; Drive Login Benchmark
+; Times: F13 + F14 re-login, then a search that reads the whole
+; directory and rebuilds the ALV (INITALV)
+;
+; Each pass changes a free directory entry through the BIOS, behind
+; the BDOS, so the search's checksum check fails and the ALV is
+; rebuilt. The rebuilt ALV must match the first pass. Run under
+; pysim --stats (or run_tests.py) for instruction and cycle counts; an
+; even pass count leaves the directory as it was.
+
+        ORG     0100H
+
+        JMP     START
+
+; BDOS Functions
+BDOS    EQU     0005H
+F_CONOUT EQU    2
+F_PRTSTR EQU    9
+F_RESETDSK EQU  13
+F_SELDSK EQU    14
+F_SFIRST EQU    17
+F_GETALV EQU    27
+
+; BIOS entry offsets (from BIOS base)
+B_SELDSK EQU    1BH
+B_SETTRK EQU    1EH
+B_SETSEC EQU    21H
+B_SETDMA EQU    24H
+B_READ  EQU     27H
+B_WRITE EQU     2AH
+B_SECTRN EQU    30H
+
+; Benchmark size
+PASSES  EQU     16              ; Logins timed (even)
+ALVLEN  EQU     31              ; ALV bytes for drive A (DSM 242)
+
+; ASCII
+CR      EQU     0DH
+LF      EQU     0AH
+
+START:
+        LXI     D, MSGHDR
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        ; Log in A: and take the reference ALV checksum
+        MVI     C, F_RESETDSK
+        CALL    BDOS
+        MVI     E, 0
+        MVI     C, F_SELDSK
+        CALL    BDOS
+        CALL    ALVSUM
+        SHLD    REFSUM
+
+        ; Find a free directory entry to change
+        CALL    FINDE5
+        JNZ     NOFREE
+
+        MVI     A, PASSES
+        STA     COUNT
+LOOP:
+        ; Change the entry, then reset and log in again
+        CALL    FLIPE5
+        JNZ     IOERR
+        MVI     C, F_RESETDSK
+        CALL    BDOS
+        MVI     E, 0
+        MVI     C, F_SELDSK
+        CALL    BDOS
+        ; A search for a missing file reads every directory sector
+        LXI     D, NOFCB
+        MVI     C, F_SFIRST
+        CALL    BDOS
+
+        ; The rebuilt ALV must match
+        CALL    ALVSUM
+        XCHG
+        LHLD    REFSUM
+        MOV     A, L
+        CMP     E
+        JNZ     BADALV
+        MOV     A, H
+        CMP     D
+        JNZ     BADALV
+
+        LDA     LOGINS
+        INR     A
+        STA     LOGINS
+        LDA     COUNT
+        DCR     A
+        STA     COUNT
+        JNZ     LOOP
+
+        ; Report
+        LXI     D, MSGLOG
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        LDA     LOGINS
+        CALL    PRTHEX
+        CALL    CRLF
+        LXI     D, MSGPASS
+        JMP     DONE
+
+NOFREE:
+        LXI     D, MSGNOFR
+        JMP     DONE
+IOERR:
+        LXI     D, MSGIOER
+        JMP     DONE
+BADALV:
+        LXI     D, MSGBAD
+
+DONE:
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        RET
+
+;---------------------------------------------------------------
+; ALVSUM - Sum the ALV bytes of the current drive
+; Returns HL = sum
+;---------------------------------------------------------------
+ALVSUM:
+        MVI     C, F_GETALV
+        CALL    BDOS            ; HL = ALV
+        LXI     D, 0
+        MVI     B, ALVLEN
+ASLP:
+        MOV     A, E
+        ADD     M
+        MOV     E, A
+        MOV     A, D
+        ACI     0
+        MOV     D, A
+        INX     H
+        DCR     B
+        JNZ     ASLP
+        XCHG
+        RET
+
+;---------------------------------------------------------------
+; BIOSCL - Call the BIOS entry at offset A, passing BC and DE
+;---------------------------------------------------------------
+BIOSCL:
+        PUSH    D
+        LHLD    0001H           ; HL = BIOS+3 (warm boot entry)
+        MOV     E, A
+        MVI     D, 0
+        DAD     D
+        DCX     H
+        DCX     H
+        DCX     H               ; HL = BIOS + offset
+        POP     D
+        PCHL
+
+;---------------------------------------------------------------
+; DIRRD - Select A:, track 2, and read directory sector SECNUM
+; into DIRSECT through the BIOS
+; Returns A = BIOS status
+;---------------------------------------------------------------
+DIRRD:
+        MVI     C, 0
+        MVI     E, 1            ; Not the first select
+        MVI     A, B_SELDSK
+        CALL    BIOSCL          ; HL = DPH
+        MOV     E, M
+        INX     H
+        MOV     D, M
+        XCHG
+        SHLD    XLTADR          ; Sector translation table
+        LXI     B, 2
+        MVI     A, B_SETTRK
+        CALL    BIOSCL
+        LXI     B, DIRSECT
+        MVI     A, B_SETDMA
+        CALL    BIOSCL
+        LDA     SECNUM
+        MOV     C, A
+        MVI     B, 0
+        LHLD    XLTADR
+        XCHG
+        MVI     A, B_SECTRN
+        CALL    BIOSCL          ; HL = physical sector
+        MOV     B, H
+        MOV     C, L
+        MVI     A, B_SETSEC
+        CALL    BIOSCL
+        MVI     A, B_READ
+        JMP     BIOSCL
+
+;---------------------------------------------------------------
+; FINDE5 - Find the first free entry in A:'s directory
+; Sets SECNUM and E5OFF (offset in the sector)
+; Returns Z if found
+;---------------------------------------------------------------
+FINDE5:
+        XRA     A
+        STA     SECNUM
+FELP:
+        CALL    DIRRD
+        ORA     A
+        RNZ
+        LXI     H, DIRSECT
+        LXI     D, 32
+        MVI     B, 4
+FEENT:
+        MOV     A, M
+        CPI     0E5H
+        JZ      FEHIT
+        DAD     D
+        DCR     B
+        JNZ     FEENT
+        LDA     SECNUM
+        INR     A
+        STA     SECNUM
+        CPI     16
+        JNZ     FELP
+        ORI     1               ; Directory full
+        RET
+FEHIT:
+        SHLD    E5OFF
+        XRA     A
+        RET
+
+;---------------------------------------------------------------
+; FLIPE5 - Toggle byte 1 of the free entry and write it back
+; Returns Z if the sector was written
+;---------------------------------------------------------------
+FLIPE5:
+        CALL    DIRRD
+        ORA     A
+        RNZ
+        LHLD    E5OFF
+        INX     H
+        MOV     A, M
+        XRI     01H
+        MOV     M, A
+        MVI     C, 1            ; Directory write
+        MVI     A, B_WRITE
+        CALL    BIOSCL
+        ORA     A
+        RET
+
+;---------------------------------------------------------------
+; Helper routines
+;---------------------------------------------------------------
+CRLF:
+        MVI     E, CR
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        MVI     E, LF
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        RET
+
+PRTHEX:
+        PUSH    PSW
+        RRC
+        RRC
+        RRC
+        RRC
+        CALL    PRTNYB
+        POP     PSW
+PRTNYB:
+        ANI     0FH
+        ADI     '0'
+        CPI     '9'+1
+        JC      PRN1
+        ADI     7
+PRN1:
+        MOV     E, A
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        RET
+
+; Storage
+COUNT:  DB      0               ; Passes left
+LOGINS: DB      0               ; Logins completed
+REFSUM: DW      0               ; ALV sum after the first login
+NOFCB:  DB      0, 'NOSUCH  $$$'    ; File that is not on the disk
+        DB      0, 0, 0, 0
+        DS      16
+        DB      0, 0, 0, 0
+XLTADR: DW      0               ; Drive A sector translation table
+SECNUM: DB      0               ; Directory sector holding the entry
+E5OFF:  DW      0               ; Free entry address in DIRSECT
+
+; Messages
+MSGHDR: DB      'BLOGIN: Drive login benchmark', CR, LF, '$'
+MSGLOG: DB      'Logins: ', '$'
+MSGPASS: DB     'PASS', CR, LF, '$'
+MSGNOFR: DB     'FAIL: No free directory entry', CR, LF, '$'
+MSGIOER: DB     'FAIL: BIOS error', CR, LF, '$'
+MSGBAD: DB      'FAIL: ALV differs after login', CR, LF, '$'
+
+; Directory sector read through the BIOS
+DIRSECT: DS     128
+
+        END     START
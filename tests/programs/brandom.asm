@@ -0,0 +1,232 @@
+; Random I/O Benchmark
+; Times: F34 random write and F33 random read across four extents
+;
+; Writes RECS records (64K) with F34 in a scattered order, so the
+; extents are created out of order, then reads them back with F33 in
+; a different order and checks each record's stamp. Both orders step
+; by an odd stride mod RECS, which visits every record once. The file
+; is deleted afterwards. Run under pysim --stats (or run_tests.py
+; --bench) for instruction, cycle and BIOS call counts.
+
+        ORG     0100H
+
+        JMP     START
+
+; BDOS Functions
+BDOS    EQU     0005H
+F_CONOUT EQU    2
+F_PRTSTR EQU    9
+F_CLOSE EQU     16
+F_DELETE EQU    19
+F_MAKE  EQU     22
+F_SETDMA EQU    26
+F_READRN EQU    33
+F_WRITERN EQU   34
+
+; Benchmark size
+RECS    EQU     512             ; 64K, extents 0-3 (power of two)
+WSTEP   EQU     197             ; Write order stride (odd)
+RSTEP   EQU     331             ; Read order stride (odd)
+RSTART  EQU     77              ; First record read
+
+; ASCII
+CR      EQU     0DH
+LF      EQU     0AH
+
+START:
+        LXI     D, MSGHDR
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LXI     D, BUFFER
+        MVI     C, F_SETDMA
+        CALL    BDOS
+
+        ; Create the file
+        CALL    CLRFCB
+        LXI     D, FCB
+        MVI     C, F_DELETE
+        CALL    BDOS
+        LXI     D, FCB
+        MVI     C, F_MAKE
+        CALL    BDOS
+        INR     A
+        JZ      ERRMAK
+
+        ; Write every record in stride order
+        LXI     H, 0
+        SHLD    RECNUM
+        SHLD    COUNT
+WRLOOP:
+        LHLD    RECNUM
+        SHLD    BUFFER          ; Stamp
+        SHLD    FCB+33          ; R0, R1
+        XRA     A
+        STA     FCB+35          ; R2
+        LXI     D, FCB
+        MVI     C, F_WRITERN
+        CALL    BDOS
+        ORA     A
+        JNZ     ERRWRT
+        LXI     D, WSTEP
+        CALL    NEXTREC
+        JNZ     WRLOOP
+
+        LXI     D, FCB
+        MVI     C, F_CLOSE
+        CALL    BDOS
+        INR     A
+        JZ      ERRCLS
+
+        ; Read them back in another order
+        LXI     H, RSTART
+        SHLD    RECNUM
+        LXI     H, 0
+        SHLD    COUNT
+RDLOOP:
+        LHLD    RECNUM
+        SHLD    FCB+33
+        XRA     A
+        STA     FCB+35
+        LXI     D, FCB
+        MVI     C, F_READRN
+        CALL    BDOS
+        ORA     A
+        JNZ     ERRRD
+        LHLD    BUFFER
+        XCHG
+        LHLD    RECNUM
+        MOV     A, L
+        CMP     E
+        JNZ     ERRDAT
+        MOV     A, H
+        CMP     D
+        JNZ     ERRDAT
+        LXI     D, RSTEP
+        CALL    NEXTREC
+        JNZ     RDLOOP
+
+        ; Clean up and report
+        CALL    CLRFCB
+        LXI     D, FCB
+        MVI     C, F_DELETE
+        CALL    BDOS
+
+        LXI     D, MSGRECS
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        LDA     COUNT+1
+        CALL    PRTHEX
+        LDA     COUNT
+        CALL    PRTHEX
+        CALL    CRLF
+        LXI     D, MSGPASS
+        JMP     DONE
+
+ERRMAK:
+        LXI     D, MSGMAK
+        JMP     DONE
+ERRWRT:
+        LXI     D, MSGWRT
+        JMP     DONE
+ERRCLS:
+        LXI     D, MSGCLS
+        JMP     DONE
+ERRRD:
+        LXI     D, MSGRD
+        JMP     DONE
+ERRDAT:
+        LXI     D, MSGDAT
+
+DONE:
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        RET
+
+;---------------------------------------------------------------
+; CLRFCB - Clear the extent, record and allocation fields of FCB
+;---------------------------------------------------------------
+CLRFCB:
+        LXI     H, FCB+12
+        MVI     B, 36-12
+        XRA     A
+CFLP:
+        MOV     M, A
+        INX     H
+        DCR     B
+        JNZ     CFLP
+        RET
+
+;---------------------------------------------------------------
+; NEXTREC - Step RECNUM by DE mod RECS and count a record
+; Returns NZ while fewer than RECS records have been done
+;---------------------------------------------------------------
+NEXTREC:
+        LHLD    RECNUM
+        DAD     D
+        MOV     A, H
+        ANI     (RECS-1) / 256
+        MOV     H, A
+        SHLD    RECNUM
+        LHLD    COUNT
+        INX     H
+        SHLD    COUNT
+        MOV     A, L
+        CPI     RECS AND 0FFH
+        RNZ
+        MOV     A, H
+        CPI     RECS / 256
+        RET
+
+;---------------------------------------------------------------
+; Helper routines
+;---------------------------------------------------------------
+CRLF:
+        MVI     E, CR
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        MVI     E, LF
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        RET
+
+PRTHEX:
+        PUSH    PSW
+        RRC
+        RRC
+        RRC
+        RRC
+        CALL    PRTNYB
+        POP     PSW
+PRTNYB:
+        ANI     0FH
+        ADI     '0'
+        CPI     '9'+1
+        JC      PRN1
+        ADI     7
+PRN1:
+        MOV     E, A
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        RET
+
+; Storage
+RECNUM: DW      0               ; Record being written or read
+COUNT:  DW      0               ; Records done
+FCB:    DB      0, 'BRANDOM TMP'
+        DS      24
+
+; Messages
+MSGHDR: DB      'BRANDOM: Random I/O benchmark', CR, LF, '$'
+MSGRECS: DB     'Records: ', '$'
+MSGPASS: DB     'PASS', CR, LF, '$'
+MSGMAK: DB      'FAIL: Make file failed', CR, LF, '$'
+MSGWRT: DB      'FAIL: Random write error', CR, LF, '$'
+MSGCLS: DB      'FAIL: Close failed', CR, LF, '$'
+MSGRD:  DB      'FAIL: Random read error', CR, LF, '$'
+MSGDAT: DB      'FAIL: Record stamp mismatch', CR, LF, '$'
+
+; Record buffer (the stamp is the first word)
+BUFFER: DS      128
+
+        END     START
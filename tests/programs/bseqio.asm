@@ -0,0 +1,232 @@
+; Sequential I/O Benchmark
+; Times: F21 sequential write and F20 sequential read of a 200K file
+;
+; Writes RECS records (13 extents), each stamped with its record
+; number, closes and reopens the file, then reads it back and checks
+; every stamp and the end of file. The file is deleted afterwards so
+; the run leaves the disk as it found it. Run under pysim --stats (or
+; run_tests.py --bench) for instruction, cycle and BIOS call counts.
+
+        ORG     0100H
+
+        JMP     START
+
+; BDOS Functions
+BDOS    EQU     0005H
+F_CONOUT EQU    2
+F_PRTSTR EQU    9
+F_OPEN  EQU     15
+F_CLOSE EQU     16
+F_DELETE EQU    19
+F_READ  EQU     20
+F_WRITE EQU     21
+F_MAKE  EQU     22
+F_SETDMA EQU    26
+
+; Benchmark size
+RECS    EQU     1600            ; 200K in 128-byte records
+
+; ASCII
+CR      EQU     0DH
+LF      EQU     0AH
+
+START:
+        LXI     D, MSGHDR
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LXI     D, BUFFER
+        MVI     C, F_SETDMA
+        CALL    BDOS
+
+        ; Create the file
+        CALL    CLRFCB
+        LXI     D, FCB
+        MVI     C, F_DELETE
+        CALL    BDOS
+        LXI     D, FCB
+        MVI     C, F_MAKE
+        CALL    BDOS
+        INR     A
+        JZ      ERRMAK
+
+        ; Write RECS stamped records
+        LXI     H, 0
+        SHLD    RECNUM
+WRLOOP:
+        LHLD    RECNUM
+        SHLD    BUFFER          ; Stamp
+        LXI     D, FCB
+        MVI     C, F_WRITE
+        CALL    BDOS
+        ORA     A
+        JNZ     ERRWRT
+        CALL    NEXTREC
+        JNZ     WRLOOP
+
+        LXI     D, FCB
+        MVI     C, F_CLOSE
+        CALL    BDOS
+        INR     A
+        JZ      ERRCLS
+
+        ; Reopen and read them back
+        CALL    CLRFCB
+        LXI     D, FCB
+        MVI     C, F_OPEN
+        CALL    BDOS
+        INR     A
+        JZ      ERROPN
+
+        LXI     H, 0
+        SHLD    RECNUM
+RDLOOP:
+        LXI     D, FCB
+        MVI     C, F_READ
+        CALL    BDOS
+        ORA     A
+        JNZ     ERRRD
+        LHLD    BUFFER
+        XCHG
+        LHLD    RECNUM
+        MOV     A, L
+        CMP     E
+        JNZ     ERRDAT
+        MOV     A, H
+        CMP     D
+        JNZ     ERRDAT
+        CALL    NEXTREC
+        JNZ     RDLOOP
+
+        ; The next read must be end of file
+        LXI     D, FCB
+        MVI     C, F_READ
+        CALL    BDOS
+        CPI     1
+        JNZ     ERREOF
+
+        ; Clean up and report
+        CALL    CLRFCB
+        LXI     D, FCB
+        MVI     C, F_DELETE
+        CALL    BDOS
+
+        LXI     D, MSGRECS
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        LDA     RECNUM+1
+        CALL    PRTHEX
+        LDA     RECNUM
+        CALL    PRTHEX
+        CALL    CRLF
+        LXI     D, MSGPASS
+        JMP     DONE
+
+ERRMAK:
+        LXI     D, MSGMAK
+        JMP     DONE
+ERRWRT:
+        LXI     D, MSGWRT
+        JMP     DONE
+ERRCLS:
+        LXI     D, MSGCLS
+        JMP     DONE
+ERROPN:
+        LXI     D, MSGOPN
+        JMP     DONE
+ERRRD:
+        LXI     D, MSGRD
+        JMP     DONE
+ERRDAT:
+        LXI     D, MSGDAT
+        JMP     DONE
+ERREOF:
+        LXI     D, MSGEOF
+
+DONE:
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        RET
+
+;---------------------------------------------------------------
+; CLRFCB - Clear the extent, record and allocation fields of FCB
+;---------------------------------------------------------------
+CLRFCB:
+        LXI     H, FCB+12
+        MVI     B, 36-12
+        XRA     A
+CFLP:
+        MOV     M, A
+        INX     H
+        DCR     B
+        JNZ     CFLP
+        RET
+
+;---------------------------------------------------------------
+; NEXTREC - Count a record
+; Returns NZ while fewer than RECS records have been done
+;---------------------------------------------------------------
+NEXTREC:
+        LHLD    RECNUM
+        INX     H
+        SHLD    RECNUM
+        MOV     A, L
+        CPI     RECS AND 0FFH
+        RNZ
+        MOV     A, H
+        CPI     RECS / 256
+        RET
+
+;---------------------------------------------------------------
+; Helper routines
+;---------------------------------------------------------------
+CRLF:
+        MVI     E, CR
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        MVI     E, LF
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        RET
+
+PRTHEX:
+        PUSH    PSW
+        RRC
+        RRC
+        RRC
+        RRC
+        CALL    PRTNYB
+        POP     PSW
+PRTNYB:
+        ANI     0FH
+        ADI     '0'
+        CPI     '9'+1
+        JC      PRN1
+        ADI     7
+PRN1:
+        MOV     E, A
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        RET
+
+; Storage
+RECNUM: DW      0               ; Records written or read
+FCB:    DB      0, 'BSEQIO  TMP'
+        DS      24
+
+; Messages
+MSGHDR: DB      'BSEQIO: Sequential I/O benchmark', CR, LF, '$'
+MSGRECS: DB     'Records: ', '$'
+MSGPASS: DB     'PASS', CR, LF, '$'
+MSGMAK: DB      'FAIL: Make file failed', CR, LF, '$'
+MSGWRT: DB      'FAIL: Write error', CR, LF, '$'
+MSGCLS: DB      'FAIL: Close failed', CR, LF, '$'
+MSGOPN: DB      'FAIL: Open failed', CR, LF, '$'
+MSGRD:  DB      'FAIL: Read error', CR, LF, '$'
+MSGDAT: DB      'FAIL: Record stamp mismatch', CR, LF, '$'
+MSGEOF: DB      'FAIL: No end of file after the last record', CR, LF, '$'
+
+; Record buffer (the stamp is the first word)
+BUFFER: DS      128
+
+        END     START
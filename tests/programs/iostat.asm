@@ -0,0 +1,215 @@
+; I/O Statistics Report
+; Prints the BIOS I/O statistics block, then clears it
+;
+; The BIOS keeps 32-bit counters of its disk and console calls, and the
+; BDOS of its directory reads and ALV rebuilds, in a block whose address
+; is stored at BIOS+33H, just past the jump table. The block starts with
+; the number of counters. IOSTAT prints each counter in decimal and
+; clears them all, so running it before and after a job shows what the
+; job cost (plus the CCP loading IOSTAT itself).
+
+        ORG     0100H
+
+        JMP     START
+
+; BDOS Functions
+BDOS    EQU     0005H
+F_CONOUT EQU    2
+F_PRTSTR EQU    9
+
+; BIOS statistics pointer, as an offset from the warm boot entry at (0001H)
+STATP   EQU     33H-3
+
+; Counters this program knows (IOSTAT header byte)
+NSTATS  EQU     10
+
+; ASCII
+CR      EQU     0DH
+LF      EQU     0AH
+
+START:
+        LXI     D, MSGHDR
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        ; Find the statistics block
+        LHLD    0001H           ; HL = BIOS+3
+        LXI     D, STATP
+        DAD     D
+        MOV     E, M
+        INX     H
+        MOV     D, M
+        XCHG                    ; HL = IOSTAT
+        MOV     A, M
+        CPI     NSTATS
+        JNZ     ERRNONE
+        INX     H
+        SHLD    STATS
+        SHLD    CTRPTR
+
+        ; One line per counter
+        LXI     H, LABELS
+        SHLD    LBLPTR
+        MVI     A, NSTATS
+        STA     LEFT
+PRLOOP:
+        LHLD    LBLPTR
+        XCHG
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        LHLD    LBLPTR
+PRSKIP:
+        MOV     A, M            ; Step past the label's '$'
+        INX     H
+        CPI     '$'
+        JNZ     PRSKIP
+        SHLD    LBLPTR
+        LHLD    CTRPTR
+        CALL    PRTDEC
+        CALL    CRLF
+        LHLD    CTRPTR
+        LXI     D, 4
+        DAD     D
+        SHLD    CTRPTR
+        LDA     LEFT
+        DCR     A
+        STA     LEFT
+        JNZ     PRLOOP
+
+        ; Clear the counters
+        LXI     D, MSGCLR
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        LHLD    STATS
+        MVI     B, NSTATS*4
+        XRA     A
+CLRLP:
+        MOV     M, A
+        INX     H
+        DCR     B
+        JNZ     CLRLP
+        RET
+
+ERRNONE:
+        LXI     D, MSGNONE
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        RET
+
+;---------------------------------------------------------------
+; PRTDEC - Print the 32-bit counter at HL in decimal, right
+; aligned in 10 columns
+;---------------------------------------------------------------
+PRTDEC:
+        LXI     D, NUM
+        MVI     B, 4
+PDCOPY:
+        MOV     A, M
+        STAX    D
+        INX     H
+        INX     D
+        DCR     B
+        JNZ     PDCOPY
+        ; Blank the digits, then fill them in from the right
+        LXI     H, DIGITS
+        MVI     B, 10
+        MVI     A, ' '
+PDBLNK:
+        MOV     M, A
+        INX     H
+        DCR     B
+        JNZ     PDBLNK
+        SHLD    DIGPTR          ; Just past the last digit
+PDLOOP:
+        CALL    DIV10
+        ADI     '0'
+        LHLD    DIGPTR
+        DCX     H
+        MOV     M, A
+        SHLD    DIGPTR
+        LXI     H, NUM          ; Until the quotient is 0
+        MOV     A, M
+        INX     H
+        ORA     M
+        INX     H
+        ORA     M
+        INX     H
+        ORA     M
+        JNZ     PDLOOP
+        LXI     D, DIGITS
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        RET
+
+;---------------------------------------------------------------
+; DIV10 - Divide the 32-bit NUM by 10 in place
+; Returns the remainder in A
+;---------------------------------------------------------------
+DIV10:
+        LXI     H, NUM+3        ; Most significant byte first
+        MVI     C, 4
+        MVI     B, 0            ; B = remainder
+D10BYT:
+        MOV     E, M
+        MVI     D, 8
+D10BIT:
+        MOV     A, E            ; Shift the next bit into the remainder
+        ADD     A
+        MOV     E, A
+        MOV     A, B
+        RAL
+        CPI     10
+        JC      D10NX
+        SUI     10
+        INR     E               ; Quotient bit
+D10NX:
+        MOV     B, A
+        DCR     D
+        JNZ     D10BIT
+        MOV     M, E
+        DCX     H
+        DCR     C
+        JNZ     D10BYT
+        MOV     A, B
+        RET
+
+;---------------------------------------------------------------
+; Helper routines
+;---------------------------------------------------------------
+CRLF:
+        MVI     E, CR
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        MVI     E, LF
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        RET
+
+; Storage
+STATS:  DW      0               ; First counter
+CTRPTR: DW      0               ; Counter being printed
+LBLPTR: DW      0               ; Its label
+LEFT:   DB      0               ; Counters left to print
+NUM:    DS      4               ; Number being printed
+DIGPTR: DW      0               ; Last digit stored
+DIGITS: DS      10              ; Decimal digits, right aligned
+        DB      '$'
+
+; Labels, in IOSTAT counter order
+LABELS: DB      'Disk reads       $'
+        DB      'Disk writes      $'
+        DB      'Directory writes $'
+        DB      'Disk selects     $'
+        DB      'Home             $'
+        DB      'Console input    $'
+        DB      'Console output   $'
+        DB      'Directory reads  $'
+        DB      'Directory hits   $'
+        DB      'ALV rebuilds     $'
+
+; Messages
+MSGHDR: DB      'IOSTAT: I/O since cold boot or the last IOSTAT', CR, LF, '$'
+MSGCLR: DB      'Counters cleared', CR, LF, '$'
+MSGNONE: DB     'No I/O statistics in this BIOS', CR, LF, '$'
+
+        END     START
@@ -2,6 +2,10 @@
 ; Tests: F27 (DRV_ALLOCVEC), F28 (DRV_SETRO), F29 (DRV_ROVEC)
 ;
 ; Enhanced tests for allocation tracking and R/O protection
+; T7-T8: F19 frees blocks, the first directory read after F13 finds a
+;        changed directory and rebuilds the ALV
+; T9-T10: F13 frees the blocks of a file written but never closed, even
+;        when another file was closed after it
 
         ORG     0100H
 
@@ -15,6 +19,7 @@ F_RESETDSK EQU  13
 F_SELDSK EQU    14
 F_OPEN  EQU     15
 F_CLOSE EQU     16
+F_SFIRST EQU    17
 F_DELETE EQU    19
 F_WRITE EQU     21
 F_MAKE  EQU     22
@@ -23,6 +28,15 @@ F_GETALV EQU    27
 F_WRTPROT EQU   28
 F_ROVEC EQU     29
 
+; BIOS entry offsets (from BIOS base)
+B_SELDSK EQU    1BH
+B_SETTRK EQU    1EH
+B_SETSEC EQU    21H
+B_SETDMA EQU    24H
+B_READ  EQU     27H
+B_WRITE EQU     2AH
+B_SECTRN EQU    30H
+
 ; ASCII
 CR      EQU     0DH
 LF      EQU     0AH
@@ -288,7 +302,7 @@ TEST6:
         JNZ     T6FAIL
 
         CALL    TPASS
-        JMP     CLEANUP
+        JMP     TEST7
 
 T6FAIL:
         CALL    TFAIL
@@ -296,6 +310,215 @@ T6FAIL:
         MVI     C, F_PRTSTR
         CALL    BDOS
 
+        ;---------------------------------------------------------------
+        ; Test 7: Delete frees the file's blocks
+        ; ALLOC.TST from T3 holds one block
+        ;---------------------------------------------------------------
+TEST7:
+        MVI     A, 7
+        STA     TESTNUM
+        LXI     D, MSG_T7
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        CALL    CNTALV
+        SHLD    USED
+
+        CALL    SETUPFCB
+        LXI     D, FCB
+        MVI     C, F_DELETE
+        CALL    BDOS
+        INR     A
+        JZ      T7FAIL          ; File not found
+
+        ; One block fewer in use
+        CALL    CNTALV
+        INX     H
+        CALL    CMPUSED
+        JNZ     T7FAIL
+
+        CALL    TPASS
+        JMP     TEST8
+
+T7FAIL:
+        CALL    TFAIL
+        LXI     D, MSGNOFRE
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        ;---------------------------------------------------------------
+        ; Test 8: A directory read rebuilds the ALV after the directory
+        ; changed. The file's entry is deleted through the BIOS, behind
+        ; the BDOS; F13 keeps the ALV, and the search that reads the
+        ; changed sector must free the file's block
+        ;---------------------------------------------------------------
+TEST8:
+        MVI     A, 8
+        STA     TESTNUM
+        LXI     D, MSG_T8
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        ; Create ALLOC.TST with one block
+        CALL    SETUPFCB
+        LXI     D, FCB
+        MVI     C, F_MAKE
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T8FAIL
+        LXI     D, WRBUF
+        MVI     C, F_DMAOFF
+        CALL    BDOS
+        LXI     D, FCB
+        MVI     C, F_WRITE
+        CALL    BDOS
+        ORA     A
+        JNZ     T8FAIL
+        LXI     D, FCB
+        MVI     C, F_CLOSE
+        CALL    BDOS
+
+        ; Log in again so the ALV is rebuilt after the write, then keep it
+        CALL    RELOG
+        CALL    CNTALV
+        SHLD    USED
+
+        ; Delete the entry behind the BDOS
+        CALL    ZAPENT
+        JNZ     T8FAIL
+
+        ; Reset and log in again: the ALV is kept until the search
+        ; below reads the changed sector
+        CALL    RELOG
+        LXI     D, FCB
+        MVI     C, F_SFIRST
+        CALL    BDOS
+        CPI     0FFH
+        JNZ     T8FAIL          ; Entry is gone
+
+        CALL    CNTALV
+        INX     H
+        CALL    CMPUSED
+        JNZ     T8FAIL
+
+        CALL    TPASS
+        JMP     TEST9
+
+T8FAIL:
+        CALL    TFAIL
+        LXI     D, MSGNOCHG
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        ;---------------------------------------------------------------
+        ; Test 9: Reset frees the blocks of an unclosed file
+        ; A program stopped with ^C leaves its blocks in the ALV but
+        ; not in the directory; the warm boot's F13 must rebuild
+        ;---------------------------------------------------------------
+TEST9:
+        MVI     A, 9
+        STA     TESTNUM
+        LXI     D, MSG_T9
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        CALL    CNTALV
+        SHLD    USED
+
+        ; Make ALLOC.TST and write one record, without closing it
+        CALL    SETUPFCB
+        LXI     D, FCB
+        MVI     C, F_MAKE
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T9FAIL
+        LXI     D, WRBUF
+        MVI     C, F_DMAOFF
+        CALL    BDOS
+        LXI     D, FCB
+        MVI     C, F_WRITE
+        CALL    BDOS
+        ORA     A
+        JNZ     T9FAIL
+
+        ; One block more in use
+        CALL    CNTALV
+        DCX     H
+        CALL    CMPUSED
+        JNZ     T9FAIL
+
+        ; Reset and log in again, as the CCP does after ^C
+        MVI     C, F_RESETDSK
+        CALL    BDOS
+        MVI     E, 0
+        MVI     C, F_SELDSK
+        CALL    BDOS
+
+        CALL    CNTALV
+        CALL    CMPUSED
+        JNZ     T9FAIL
+
+        CALL    TPASS
+        JMP     TEST10
+
+T9FAIL:
+        CALL    TFAIL
+        LXI     D, MSGLEAK
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        ;---------------------------------------------------------------
+        ; Test 10: Closing another file does not keep unclosed blocks
+        ; ALLOC.TST gets a record and is left open, then ROTST.TST is
+        ; written and closed; after F13 only ROTST.TST's block is used
+        ;---------------------------------------------------------------
+TEST10:
+        MVI     A, 10
+        STA     TESTNUM
+        LXI     D, MSG_T10
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        ; Start from a directory without ALLOC.TST
+        CALL    SETUPFCB
+        LXI     D, FCB
+        MVI     C, F_DELETE
+        CALL    BDOS
+        CALL    RELOG
+        CALL    CNTALV
+        SHLD    USED
+
+        CALL    SETUPFCB
+        CALL    MKWR1
+        JNZ     T10FAIL
+        CALL    SETUPFCB2
+        CALL    MKWR1
+        JNZ     T10FAIL
+        LXI     D, FCB
+        MVI     C, F_CLOSE
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T10FAIL
+
+        CALL    RELOG
+        CALL    CNTALV
+        DCX     H               ; ROTST.TST's block
+        CALL    CMPUSED
+        JNZ     T10FAIL
+
+        CALL    SETUPFCB2
+        LXI     D, FCB
+        MVI     C, F_DELETE
+        CALL    BDOS
+        CALL    TPASS
+        JMP     CLEANUP
+
+T10FAIL:
+        CALL    TFAIL
+        LXI     D, MSGLEAK
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
         ;---------------------------------------------------------------
         ; Cleanup
         ;---------------------------------------------------------------
@@ -351,6 +574,38 @@ ALLFAIL:
         CALL    BDOS
         RET
 
+;---------------------------------------------------------------
+; RELOG - Reset the disk system and select A:, as the CCP does after ^C
+;---------------------------------------------------------------
+RELOG:
+        MVI     C, F_RESETDSK
+        CALL    BDOS
+        MVI     E, 0
+        MVI     C, F_SELDSK
+        JMP     BDOS
+
+;---------------------------------------------------------------
+; MKWR1 - Make the file in FCB and write one record from WRBUF
+; Returns Z on success
+;---------------------------------------------------------------
+MKWR1:
+        LXI     D, FCB
+        MVI     C, F_MAKE
+        CALL    BDOS
+        CPI     0FFH
+        JZ      MKWERR
+        LXI     D, WRBUF
+        MVI     C, F_DMAOFF
+        CALL    BDOS
+        LXI     D, FCB
+        MVI     C, F_WRITE
+        CALL    BDOS
+        ORA     A
+        RET
+MKWERR:
+        ORA     A               ; NZ
+        RET
+
 ;---------------------------------------------------------------
 ; SETUPFCB - Initialize FCB for ALLOC.TST
 ;---------------------------------------------------------------
@@ -429,6 +684,134 @@ SF2CLR:
         MVI     M, 'T'
         RET
 
+;---------------------------------------------------------------
+; CNTALV - Count used blocks in drive A's ALV (DSM 242, 31 bytes)
+; Returns HL = count
+;---------------------------------------------------------------
+CNTALV:
+        MVI     C, F_GETALV
+        CALL    BDOS            ; HL = ALV
+        LXI     D, 0            ; DE = count
+        MVI     C, 31
+CALP:
+        MOV     A, M
+        MVI     B, 8
+CABIT:
+        ADD     A               ; Next bit into carry
+        JNC     CANX
+        INX     D
+CANX:
+        DCR     B
+        JNZ     CABIT
+        INX     H
+        DCR     C
+        JNZ     CALP
+        XCHG
+        RET
+
+;---------------------------------------------------------------
+; CMPUSED - Compare HL with USED, Z if equal
+;---------------------------------------------------------------
+CMPUSED:
+        XCHG
+        LHLD    USED
+        MOV     A, L
+        CMP     E
+        RNZ
+        MOV     A, H
+        CMP     D
+        RET
+
+;---------------------------------------------------------------
+; BIOSCL - Call the BIOS entry at offset A, passing BC and DE
+;---------------------------------------------------------------
+BIOSCL:
+        PUSH    D
+        LHLD    0001H           ; HL = BIOS+3 (warm boot entry)
+        MOV     E, A
+        MVI     D, 0
+        DAD     D
+        DCX     H
+        DCX     H
+        DCX     H               ; HL = BIOS + offset
+        POP     D
+        PCHL
+
+;---------------------------------------------------------------
+; ZAPENT - Mark ALLOC.TST's entry deleted using BIOS calls only
+; Scans drive A's directory (track 2, sectors 0-15)
+; Returns Z if the entry was found and written back
+;---------------------------------------------------------------
+ZAPENT:
+        MVI     C, 0
+        MVI     E, 1            ; Not the first select
+        MVI     A, B_SELDSK
+        CALL    BIOSCL          ; HL = DPH
+        MOV     E, M
+        INX     H
+        MOV     D, M
+        XCHG
+        SHLD    XLTADR          ; Sector translation table
+        LXI     B, 2
+        MVI     A, B_SETTRK
+        CALL    BIOSCL
+        LXI     B, DIRSECT
+        MVI     A, B_SETDMA
+        CALL    BIOSCL
+        XRA     A
+        STA     SECNUM
+ZPLP:
+        LDA     SECNUM
+        MOV     C, A
+        MVI     B, 0
+        LHLD    XLTADR
+        XCHG
+        MVI     A, B_SECTRN
+        CALL    BIOSCL          ; HL = physical sector
+        MOV     B, H
+        MOV     C, L
+        MVI     A, B_SETSEC
+        CALL    BIOSCL
+        MVI     A, B_READ
+        CALL    BIOSCL
+        ORA     A
+        RNZ
+        ; Look for user 0 'ALLOC   TST' in the 4 entries
+        LXI     H, DIRSECT
+        MVI     B, 4
+ZPENT:
+        PUSH    H
+        LXI     D, ZAPNAME
+        MVI     C, 12
+ZPCMP:
+        LDAX    D
+        CMP     M
+        JNZ     ZPNX
+        INX     H
+        INX     D
+        DCR     C
+        JNZ     ZPCMP
+        POP     H               ; Found
+        MVI     M, 0E5H
+        MVI     C, 1            ; Directory write
+        MVI     A, B_WRITE
+        CALL    BIOSCL
+        ORA     A
+        RET
+ZPNX:
+        POP     H
+        LXI     D, 32
+        DAD     D
+        DCR     B
+        JNZ     ZPENT
+        LDA     SECNUM
+        INR     A
+        STA     SECNUM
+        CPI     16
+        JNZ     ZPLP
+        ORI     1               ; Not found
+        RET
+
 ;---------------------------------------------------------------
 ; Helper routines
 ;---------------------------------------------------------------
@@ -482,6 +865,10 @@ PRN1:
 
 ; Storage
 ALVADDR: DW     0
+USED:   DW      0               ; Used block count
+XLTADR: DW      0               ; Drive A sector translation table
+SECNUM: DB      0               ; Directory sector being scanned
+ZAPNAME: DB     0, 'ALLOC   TST'
 
 ; FCB for file operations (36 bytes)
 FCB:    DS      36
@@ -495,6 +882,10 @@ MSG_T3: DB      'T3: File create + write... ', '$'
 MSG_T4: DB      'T4: F28 sets R/O, F29 shows... ', '$'
 MSG_T5: DB      'T5: Write to R/O fails... ', '$'
 MSG_T6: DB      'T6: Reset clears R/O... ', '$'
+MSG_T7: DB      'T7: Delete frees blocks... ', '$'
+MSG_T8: DB      'T8: Reset sees changed dir... ', '$'
+MSG_T9: DB      'T9: Reset frees unclosed... ', '$'
+MSG_T10: DB     'T10: Unclosed, then close... ', '$'
 
 MSGOK:  DB      'OK', CR, LF, '$'
 MSGNG:  DB      'NG', CR, LF, '$'
@@ -503,6 +894,9 @@ MSGALV0: DB     'ALV empty (no files?)', CR, LF, '$'
 MSGNOALC: DB    'ALV unchanged after file create', CR, LF, '$'
 MSGROWRT: DB    'Write not rejected on R/O', CR, LF, '$'
 MSGRSTRO: DB    'R/O not cleared after reset', CR, LF, '$'
+MSGNOFRE: DB    'Blocks not freed by delete', CR, LF, '$'
+MSGNOCHG: DB    'ALV not rebuilt after reset', CR, LF, '$'
+MSGLEAK: DB     'Unclosed blocks kept after reset', CR, LF, '$'
 
 MSGSUMM: DB     'Summary: ', '$'
 MSGOF:  DB      ' of ', '$'
@@ -513,4 +907,7 @@ MSGFAILED: DB   'FAIL', CR, LF, '$'
 ; Write buffer
 WRBUF:  DS      128
 
+; Directory sector read through the BIOS
+DIRSECT: DS     128
+
         END     START
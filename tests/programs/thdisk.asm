@@ -0,0 +1,571 @@
+; Hard Disk Test (z80pack 4MB drive I:)
+; Tests: F14/F31 DPB, F15 open past the first directory track,
+;        16-bit allocation map, F20/F21 across 2K blocks, F16, F19, F22,
+;        F33/F34 past 512K (S2)
+;
+; Needs I:HDREAD.DAT set up by the harness: 48 records where byte j of
+; record r is (r+j) AND 0FFH, with its directory entry past index 512
+; and its blocks above 255.
+
+        ORG     0100H
+
+; BDOS Functions
+BDOS    EQU     0005H
+F_CONOUT EQU    2
+F_PRTSTR EQU    9
+F_SELDSK EQU    14
+F_OPEN  EQU     15
+F_CLOSE EQU     16
+F_DELETE EQU    19
+F_READ  EQU     20
+F_WRITE EQU     21
+F_MAKE  EQU     22
+F_SETDMA EQU    26
+F_GETDPB EQU    31
+F_RDRAND EQU    33
+F_WRRAND EQU    34
+
+; Drive I: (FCB drive code 9, BDOS drive 8)
+HDRIVE  EQU     8
+NREAD   EQU     48              ; Records in HDREAD.DAT
+NWRITE  EQU     40              ; Records written to HDWRITE.DAT
+RNLOW   EQU     2               ; Random record in extent 0 of HDRAND.DAT
+RNHIGH  EQU     4096+RNLOW      ; Same EX and CR, S2 1
+
+; ASCII
+CR      EQU     0DH
+LF      EQU     0AH
+
+; Test tracking
+TESTNUM: DB     0
+PASSED: DB      0
+FAILED: DB      0
+
+START:
+        LXI     D, MSGHDR
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LXI     D, BUF
+        MVI     C, F_SETDMA
+        CALL    BDOS
+
+        ;---------------------------------------------------------------
+        ; Test 1: DPB of I: has SPT=128, DSM=2039, DRM=1023
+        ;---------------------------------------------------------------
+        MVI     A, 1
+        STA     TESTNUM
+        LXI     D, MSG_T1
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        MVI     E, HDRIVE
+        MVI     C, F_SELDSK
+        CALL    BDOS
+        MVI     C, F_GETDPB
+        CALL    BDOS
+        SHLD    DPBADR
+        ; Back to A: before checking, so a failure leaves the CCP on A:
+        MVI     E, 0
+        MVI     C, F_SELDSK
+        CALL    BDOS
+
+        LHLD    DPBADR
+        MOV     A, M            ; SPT low
+        CPI     128
+        JNZ     T1FAIL
+        INX     H
+        MOV     A, M            ; SPT high
+        ORA     A
+        JNZ     T1FAIL
+        LXI     D, 4
+        DAD     D               ; DSM
+        MOV     A, M
+        CPI     0F7H            ; 2039 = 07F7H
+        JNZ     T1FAIL
+        INX     H
+        MOV     A, M
+        CPI     07H
+        JNZ     T1FAIL
+        INX     H               ; DRM
+        MOV     A, M
+        CPI     0FFH            ; 1023 = 03FFH
+        JNZ     T1FAIL
+        INX     H
+        MOV     A, M
+        CPI     03H
+        JNZ     T1FAIL
+        CALL    TPASS
+        JMP     TEST2
+
+T1FAIL:
+        CALL    TFAIL
+
+        ;---------------------------------------------------------------
+        ; Test 2: Open I:HDREAD.DAT (entry on second directory track)
+        ;---------------------------------------------------------------
+TEST2:
+        MVI     A, 2
+        STA     TESTNUM
+        LXI     D, MSG_T2
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LXI     H, FCBRD
+        CALL    CLRFCB
+        LXI     D, FCBRD
+        MVI     C, F_OPEN
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T2FAIL
+        CALL    TPASS
+        JMP     TEST3
+
+T2FAIL:
+        CALL    TFAIL
+
+        ;---------------------------------------------------------------
+        ; Test 3: Allocation map holds 16-bit block numbers above 255
+        ;---------------------------------------------------------------
+TEST3:
+        MVI     A, 3
+        STA     TESTNUM
+        LXI     D, MSG_T3
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LDA     FCBRD+17        ; High byte of first block
+        ORA     A
+        JZ      T3FAIL
+        LDA     FCBRD+19        ; High byte of second block
+        ORA     A
+        JZ      T3FAIL
+        CALL    TPASS
+        JMP     TEST4
+
+T3FAIL:
+        CALL    TFAIL
+
+        ;---------------------------------------------------------------
+        ; Test 4: Read all records of HDREAD.DAT and verify, then EOF
+        ;---------------------------------------------------------------
+TEST4:
+        MVI     A, 4
+        STA     TESTNUM
+        LXI     D, MSG_T4
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LXI     H, FCBRD
+        MVI     B, NREAD
+        CALL    READALL
+        JNZ     T4FAIL
+        CALL    TPASS
+        JMP     TEST5
+
+T4FAIL:
+        CALL    TFAIL
+
+        ;---------------------------------------------------------------
+        ; Test 5: Make I:HDWRITE.DAT, write records, close
+        ;---------------------------------------------------------------
+TEST5:
+        MVI     A, 5
+        STA     TESTNUM
+        LXI     D, MSG_T5
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LXI     D, FCBWR
+        MVI     C, F_DELETE     ; Remove any leftover copy
+        CALL    BDOS
+        LXI     H, FCBWR
+        CALL    CLRFCB
+        LXI     D, FCBWR
+        MVI     C, F_MAKE
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T5FAIL
+
+        XRA     A
+        STA     RECNUM
+T5LP:
+        CALL    FILLBUF
+        LXI     D, FCBWR
+        MVI     C, F_WRITE
+        CALL    BDOS
+        ORA     A
+        JNZ     T5FAIL
+        LDA     RECNUM
+        INR     A
+        STA     RECNUM
+        CPI     NWRITE
+        JNZ     T5LP
+
+        LXI     D, FCBWR
+        MVI     C, F_CLOSE
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T5FAIL
+        LDA     FCBWR+17        ; New blocks are 16-bit too
+        ORA     A
+        JZ      T5FAIL
+        CALL    TPASS
+        JMP     TEST6
+
+T5FAIL:
+        CALL    TFAIL
+
+        ;---------------------------------------------------------------
+        ; Test 6: Reopen HDWRITE.DAT and verify records, then EOF
+        ;---------------------------------------------------------------
+TEST6:
+        MVI     A, 6
+        STA     TESTNUM
+        LXI     D, MSG_T6
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LXI     H, FCBWR
+        CALL    CLRFCB
+        LXI     D, FCBWR
+        MVI     C, F_OPEN
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T6FAIL
+        LXI     H, FCBWR
+        MVI     B, NWRITE
+        CALL    READALL
+        JNZ     T6FAIL
+        CALL    TPASS
+        JMP     TEST7
+
+T6FAIL:
+        CALL    TFAIL
+
+        ;---------------------------------------------------------------
+        ; Test 7: Delete HDWRITE.DAT, open then fails
+        ;---------------------------------------------------------------
+TEST7:
+        MVI     A, 7
+        STA     TESTNUM
+        LXI     D, MSG_T7
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LXI     D, FCBWR
+        MVI     C, F_DELETE
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T7FAIL
+        LXI     H, FCBWR
+        CALL    CLRFCB
+        LXI     D, FCBWR
+        MVI     C, F_OPEN
+        CALL    BDOS
+        CPI     0FFH
+        JNZ     T7FAIL
+        CALL    TPASS
+        JMP     TEST8
+
+T7FAIL:
+        CALL    TFAIL
+
+        ;---------------------------------------------------------------
+        ; Test 8: Random record 4096+n (S2 1) does not overwrite record
+        ; n, reads back after reopening, and an S2 past the disk is 6
+        ;---------------------------------------------------------------
+TEST8:
+        MVI     A, 8
+        STA     TESTNUM
+        LXI     D, MSG_T8
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LXI     D, FCBRN
+        MVI     C, F_DELETE     ; Remove any leftover copy
+        CALL    BDOS
+        LXI     H, FCBRN
+        CALL    CLRFCB
+        LXI     D, FCBRN
+        MVI     C, F_MAKE
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T8FAIL
+
+        MVI     A, RNLOW
+        STA     RECNUM
+        CALL    FILLBUF
+        LXI     H, RNLOW
+        MVI     C, F_WRRAND
+        CALL    RNDIO
+        JNZ     T8FAIL
+        MVI     A, 80H          ; Different pattern for the S2 1 record
+        STA     RECNUM
+        CALL    FILLBUF
+        LXI     H, RNHIGH
+        MVI     C, F_WRRAND
+        CALL    RNDIO
+        JNZ     T8FAIL
+
+        LXI     H, RNLOW
+        MVI     C, F_RDRAND
+        CALL    RNDIO
+        JNZ     T8FAIL
+        MVI     A, RNLOW
+        CALL    CHKBUF
+        JNZ     T8FAIL
+
+        LXI     H, 8000H        ; S2 8, past the 4MB of I:
+        MVI     C, F_RDRAND
+        CALL    RNDIO
+        CPI     6
+        JNZ     T8FAIL
+
+        LXI     D, FCBRN
+        MVI     C, F_CLOSE
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T8FAIL
+        LXI     H, FCBRN
+        CALL    CLRFCB
+        LXI     D, FCBRN
+        MVI     C, F_OPEN
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T8FAIL
+        LXI     H, RNHIGH
+        MVI     C, F_RDRAND
+        CALL    RNDIO
+        JNZ     T8FAIL
+        MVI     A, 80H
+        CALL    CHKBUF
+        JNZ     T8FAIL
+
+        LXI     D, FCBRN
+        MVI     C, F_DELETE
+        CALL    BDOS
+        CALL    TPASS
+        JMP     SUMMARY
+
+T8FAIL:
+        CALL    TFAIL
+
+        ;---------------------------------------------------------------
+        ; Summary
+        ;---------------------------------------------------------------
+SUMMARY:
+        LXI     D, 0080H        ; Restore default DMA
+        MVI     C, F_SETDMA
+        CALL    BDOS
+
+        LXI     D, MSGSUMM
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LDA     PASSED
+        CALL    PRTHEX
+        LXI     D, MSGOF
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LDA     TESTNUM
+        CALL    PRTHEX
+        LXI     D, MSGTESTS
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        LDA     FAILED
+        ORA     A
+        JNZ     ALLFAIL
+        LXI     D, MSGPASS
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        RET
+
+ALLFAIL:
+        LXI     D, MSGFAILED
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        RET
+
+;---------------------------------------------------------------
+; Helper routines
+;---------------------------------------------------------------
+
+; Clear extent, S1, S2, RC and CR of the FCB at HL
+CLRFCB:
+        LXI     D, 12
+        DAD     D
+        MVI     M, 0            ; EX
+        INX     H
+        MVI     M, 0            ; S1
+        INX     H
+        MVI     M, 0            ; S2
+        INX     H
+        MVI     M, 0            ; RC
+        LXI     D, 17
+        DAD     D
+        MVI     M, 0            ; CR
+        RET
+
+; Fill BUF with the pattern for record RECNUM
+FILLBUF:
+        LDA     RECNUM
+        LXI     H, BUF
+        MVI     B, 128
+FILLP:
+        MOV     M, A
+        INR     A
+        INX     H
+        DCR     B
+        JNZ     FILLP
+        RET
+
+; Check BUF against the pattern starting at A. Returns Z if it matches.
+CHKBUF:
+        LXI     H, BUF
+        MVI     B, 128
+CHKLP:
+        CMP     M
+        RNZ
+        INR     A
+        INX     H
+        DCR     B
+        JNZ     CHKLP
+        RET
+
+; Random read or write (function C) of record HL of HDRAND.DAT.
+; Returns A = BDOS result, Z if 0.
+RNDIO:
+        SHLD    FCBRN+33        ; R0, R1
+        XRA     A
+        STA     FCBRN+35        ; R2
+        LXI     D, FCBRN
+        CALL    BDOS
+        ORA     A
+        RET
+
+; Read B records from the open FCB at HL, checking each against the
+; pattern and that the next read is EOF. Returns Z if all good.
+READALL:
+        SHLD    FCBPTR
+        MOV     A, B
+        STA     RECMAX
+        XRA     A
+        STA     RECNUM
+RDLP:
+        LHLD    FCBPTR
+        XCHG
+        MVI     C, F_READ
+        CALL    BDOS
+        ORA     A
+        RNZ                     ; Early EOF or error
+        LDA     RECNUM
+        LXI     H, BUF
+        MVI     B, 128
+RDCHK:
+        CMP     M
+        RNZ                     ; Data mismatch
+        INR     A
+        INX     H
+        DCR     B
+        JNZ     RDCHK
+        LDA     RECNUM
+        INR     A
+        STA     RECNUM
+        LXI     H, RECMAX
+        CMP     M
+        JNZ     RDLP
+        ; Next read must be EOF
+        LHLD    FCBPTR
+        XCHG
+        MVI     C, F_READ
+        CALL    BDOS
+        CPI     1
+        RET
+
+TPASS:
+        LXI     D, MSGOK
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        LDA     PASSED
+        INR     A
+        STA     PASSED
+        RET
+
+TFAIL:
+        LXI     D, MSGNG
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+        LDA     FAILED
+        INR     A
+        STA     FAILED
+        RET
+
+PRTHEX:
+        PUSH    PSW
+        RRC
+        RRC
+        RRC
+        RRC
+        CALL    PRTNYB
+        POP     PSW
+PRTNYB:
+        ANI     0FH
+        ADI     '0'
+        CPI     '9'+1
+        JC      PRN1
+        ADI     7
+PRN1:
+        MOV     E, A
+        MVI     C, F_CONOUT
+        CALL    BDOS
+        RET
+
+; Storage
+DPBADR: DW      0
+FCBPTR: DW      0
+RECNUM: DB      0
+RECMAX: DB      0
+
+; FCBs on drive I: (36 bytes each)
+FCBRD:  DB      HDRIVE+1, 'HDREAD  DAT'
+        DB      0, 0, 0, 0
+        DS      16
+        DB      0, 0, 0, 0
+FCBWR:  DB      HDRIVE+1, 'HDWRITE DAT'
+        DB      0, 0, 0, 0
+        DS      16
+        DB      0, 0, 0, 0
+FCBRN:  DB      HDRIVE+1, 'HDRAND  DAT'
+        DB      0, 0, 0, 0
+        DS      16
+        DB      0, 0, 0, 0
+
+; Messages
+MSGHDR: DB      'Hard Disk Test (I:)', CR, LF
+        DB      '===================', CR, LF, '$'
+
+MSG_T1: DB      'T1: DPB geometry... ', '$'
+MSG_T2: DB      'T2: Open far entry... ', '$'
+MSG_T3: DB      'T3: 16-bit blocks... ', '$'
+MSG_T4: DB      'T4: Read/verify... ', '$'
+MSG_T5: DB      'T5: Make/write... ', '$'
+MSG_T6: DB      'T6: Reopen/verify... ', '$'
+MSG_T7: DB      'T7: Delete... ', '$'
+MSG_T8: DB      'T8: Random past 512K... ', '$'
+
+MSGOK:  DB      'OK', CR, LF, '$'
+MSGNG:  DB      'NG', CR, LF, '$'
+
+MSGSUMM: DB     CR, LF, 'Summary: ', '$'
+MSGOF:  DB      ' of ', '$'
+MSGTESTS: DB    ' tests', CR, LF, '$'
+MSGPASS: DB     'PASS', CR, LF, '$'
+MSGFAILED: DB   'FAIL', CR, LF, '$'
+
+; Record buffer
+BUF:    DS      128
+
+        END     START
@@ -18,6 +18,9 @@
 ; T9: F35 on empty file (size=0)
 ; T10: F40 write/read (zero fill not implemented yet)
 ; T11: R2 overflow error (code 6)
+; T12: Write/read record 255 (ext 1)
+; T13: Write/read record 256 (ext 2)
+; T14: Random I/O across extents without reopening
 
         ORG     0100H
 
@@ -1079,7 +1082,7 @@ T13VFY:
         JNZ     T13VFY
 
         CALL    TPASS
-        JMP     CLEANUP
+        JMP     TEST14
 
 T13FAIL:
         CALL    TFAIL
@@ -1087,6 +1090,95 @@ T13FAIL:
         MVI     C, F_PRTSTR
         CALL    BDOS
 
+        ;---------------------------------------------------------------
+        ; Test 14: Random I/O across extents without reopening
+        ; Records in extents 2, 0 and 1 are written and read back with
+        ; one open, an unwritten extent must give error 4, and the data
+        ; must survive a close and reopen
+        ;---------------------------------------------------------------
+TEST14:
+        MVI     A, 14
+        STA     TESTNUM
+        LXI     D, MSG_T14
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        ; Open main test file
+        LXI     H, FCB1
+        CALL    SETFCB
+        MVI     C, F_OPEN
+        CALL    BDOS
+        INR     A
+        JZ      T14FAIL
+
+        ; Write records 300 (ext 2), 20 (ext 0) and 200 (ext 1)
+        LXI     H, 300
+        MVI     A, 02CH
+        CALL    WRRND
+        JNZ     T14FAIL
+        LXI     H, 20
+        MVI     A, 014H
+        CALL    WRRND
+        JNZ     T14FAIL
+        LXI     H, 200
+        MVI     A, 0C8H
+        CALL    WRRND
+        JNZ     T14FAIL
+
+        ; Read them back in another order
+        LXI     H, 20
+        MVI     A, 014H
+        CALL    RDRND
+        JNZ     T14FAIL
+        LXI     H, 300
+        MVI     A, 02CH
+        CALL    RDRND
+        JNZ     T14FAIL
+        LXI     H, 200
+        MVI     A, 0C8H
+        CALL    RDRND
+        JNZ     T14FAIL
+
+        ; Record 700 is in extent 5, which was never written
+        LXI     H, 700
+        CALL    SETRR
+        LXI     D, DFCB
+        MVI     C, F_READRAND
+        CALL    BDOS
+        CPI     4
+        JNZ     T14FAIL
+
+        ; Close, reopen and read back
+        LXI     D, DFCB
+        MVI     C, F_CLOSE
+        CALL    BDOS
+        INR     A
+        JZ      T14FAIL
+        LXI     H, FCB1
+        CALL    SETFCB
+        MVI     C, F_OPEN
+        CALL    BDOS
+        INR     A
+        JZ      T14FAIL
+        LXI     H, 300
+        MVI     A, 02CH
+        CALL    RDRND
+        JNZ     T14FAIL
+        ; Record 0 from setup must be untouched by the other extents
+        LXI     H, 0
+        XRA     A
+        CALL    RDRND
+        JNZ     T14FAIL
+
+        CALL    TPASS
+        JMP     CLEANUP
+
+T14FAIL:
+        CALL    TFAIL
+        LXI     D, MSGXEXT
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
         ;---------------------------------------------------------------
         ; Cleanup
         ;---------------------------------------------------------------
@@ -1188,6 +1280,60 @@ CPFCB:
         LXI     D, DFCB
         RET
 
+;---------------------------------------------------------------
+; Helper: Set DFCB random record to HL (R2 = 0)
+;---------------------------------------------------------------
+SETRR:
+        SHLD    DFCB+33
+        XRA     A
+        STA     DFCB+35
+        RET
+
+;---------------------------------------------------------------
+; Helper: Write random record HL filled with A
+; Returns Z if the write succeeded
+;---------------------------------------------------------------
+WRRND:
+        PUSH    PSW
+        CALL    SETRR
+        POP     PSW
+        LXI     H, BUFFER
+        MVI     B, 128
+WRRNF:
+        MOV     M, A
+        INX     H
+        DCR     B
+        JNZ     WRRNF
+        LXI     D, DFCB
+        MVI     C, F_WRITERAND
+        CALL    BDOS
+        ORA     A
+        RET
+
+;---------------------------------------------------------------
+; Helper: Read random record HL and check it is filled with A
+; Returns Z if the read succeeded and every byte matched
+;---------------------------------------------------------------
+RDRND:
+        STA     PATTERN
+        CALL    SETRR
+        CALL    CLRBUF
+        LXI     D, DFCB
+        MVI     C, F_READRAND
+        CALL    BDOS
+        ORA     A
+        RNZ
+        LXI     H, BUFFER
+        MVI     B, 128
+        LDA     PATTERN
+RDRNV:
+        CMP     M
+        RNZ
+        INX     H
+        DCR     B
+        JNZ     RDRNV
+        RET
+
 ;---------------------------------------------------------------
 ; Helper: Clear buffer
 ;---------------------------------------------------------------
@@ -1256,6 +1402,7 @@ PRN1:
 ; Data
 ;---------------------------------------------------------------
 RECNUM: DB      0
+PATTERN: DB     0
 
 ; Filename for test file (11 bytes: 8+3 space-padded)
 FNAME:  DB      'RANDTST TMP'
@@ -1306,6 +1453,7 @@ MSG_T10: DB     'T10: F40 write/read... ', '$'
 MSG_T11: DB     'T11: R2 overflow error... ', '$'
 MSG_T12: DB     'T12: Write/read rec 255 (ext 1)... ', '$'
 MSG_T13: DB     'T13: Write/read rec 256 (ext 2)... ', '$'
+MSG_T14: DB     'T14: Random I/O across extents... ', '$'
 
 MSGOK:  DB      'OK', CR, LF, '$'
 MSGNG:  DB      'NG', CR, LF, '$'
@@ -1321,6 +1469,7 @@ MSG127: DB      'Record 127 failed', CR, LF, '$'
 MSG128: DB      'Record 128 failed', CR, LF, '$'
 MSG255: DB      'Record 255 failed', CR, LF, '$'
 MSG256: DB      'Record 256 failed', CR, LF, '$'
+MSGXEXT: DB     'Extent switch failed', CR, LF, '$'
 MSGEMPTY: DB    'Empty file size != 0', CR, LF, '$'
 MSGZF:  DB      'Zero fill failed', CR, LF, '$'
 MSGZFNZ: DB     'Gap record not zeroed', CR, LF, '$'
@@ -1,8 +1,9 @@
 ; Sequential I/O Test (Phase 11)
-; Tests: F20 (F_READ), F21 (F_WRITE)
+; Tests: F20 (F_READ), F21 (F_WRITE), F44 (F_MULTI)
 ;
 ; Tests sequential record read/write, CR increment, EOF handling,
 ; extent transitions, and data verification
+; T9-T11: multi-sector count (F44) for F20/F21
 
         ORG     0100H
 
@@ -17,6 +18,7 @@ F_READ  EQU     20
 F_WRITE EQU     21
 F_MAKE  EQU     22
 F_DMAOFF EQU    26
+F_MULTI EQU     44
 
 ; ASCII
 CR      EQU     0DH
@@ -535,12 +537,209 @@ VFY8:
         CALL    BDOS
 
         CALL    TPASS
-        JMP     CLEANUP
+        JMP     TEST9
 
 T8FAIL:
         STA     GOTVAL
         CALL    TFAIL
 
+        ;---------------------------------------------------------------
+        ; Test 9: F44 accepts counts 1-128 only
+        ;---------------------------------------------------------------
+TEST9:
+        MVI     A, 9
+        STA     TESTNUM
+        LXI     D, MSG_T9
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        MVI     E, 0
+        CALL    SETMC
+        CPI     0FFH
+        JNZ     T9FAIL
+        MVI     E, 129
+        CALL    SETMC
+        CPI     0FFH
+        JNZ     T9FAIL
+        MVI     E, 128
+        CALL    SETMC
+        ORA     A
+        JNZ     T9FAIL
+        MVI     E, 1
+        CALL    SETMC
+        ORA     A
+        JNZ     T9FAIL
+
+        CALL    TPASS
+        JMP     TEST10
+
+T9FAIL:
+        STA     GOTVAL
+        CALL    TFAIL
+
+        ;---------------------------------------------------------------
+        ; Test 10: 100 records per call, writes crossing an extent
+        ; Two F21 calls write records 0-199, two F20 calls read them
+        ; back, and a third F20 returns EOF with no records read
+        ;---------------------------------------------------------------
+TEST10:
+        MVI     A, 10
+        STA     TESTNUM
+        LXI     D, MSG_T10
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        CALL    SETUPFCB
+        LXI     D, FCB
+        MVI     C, F_DELETE
+        CALL    BDOS
+        CALL    SETUPFCB
+        LXI     D, FCB
+        MVI     C, F_MAKE
+        CALL    BDOS
+        CPI     0FFH
+        JZ      T10FAIL
+
+        LXI     D, BIGBUF
+        MVI     C, F_DMAOFF
+        CALL    BDOS
+        MVI     E, 100
+        CALL    SETMC
+
+        ; Records 0-99, then 100-199 (extent change at 128)
+        XRA     A
+        CALL    FILLBIG
+        LXI     D, FCB
+        MVI     C, F_WRITE
+        CALL    BDOS
+        ORA     A
+        JNZ     T10FAIL
+        MVI     A, 100
+        CALL    FILLBIG
+        LXI     D, FCB
+        MVI     C, F_WRITE
+        CALL    BDOS
+        ORA     A
+        JNZ     T10FAIL
+
+        MVI     E, 1
+        CALL    SETMC
+        LXI     D, FCB
+        MVI     C, F_CLOSE
+        CALL    BDOS
+
+        ; Read them back 100 at a time
+        CALL    SETUPFCB
+        LXI     D, FCB
+        MVI     C, F_OPEN
+        CALL    BDOS
+        CPI     4
+        JNC     T10FAIL
+        MVI     E, 100
+        CALL    SETMC
+
+        LXI     D, FCB
+        MVI     C, F_READ
+        CALL    BDOS
+        ORA     A
+        JNZ     T10FAIL
+        XRA     A
+        MVI     C, 100
+        CALL    VERBIG
+        JNZ     T10FAIL
+
+        LXI     D, FCB
+        MVI     C, F_READ
+        CALL    BDOS
+        ORA     A
+        JNZ     T10FAIL
+        MVI     A, 100
+        MVI     C, 100
+        CALL    VERBIG
+        JNZ     T10FAIL
+
+        ; Nothing left: EOF with H (returned in B) = 0 records
+        LXI     D, FCB
+        MVI     C, F_READ
+        CALL    BDOS
+        STA     GOTVAL
+        CPI     1
+        JNZ     T10FAIL
+        MOV     A, B
+        ORA     A
+        JNZ     T10FAIL
+
+        CALL    TPASS
+        JMP     TEST11
+
+T10FAIL:
+        CALL    TFAIL
+
+        ;---------------------------------------------------------------
+        ; Test 11: Read stopping at EOF part way through a chunk
+        ; 128 records, then 72 and EOF with H = 72
+        ;---------------------------------------------------------------
+TEST11:
+        MVI     A, 11
+        STA     TESTNUM
+        LXI     D, MSG_T11
+        MVI     C, F_PRTSTR
+        CALL    BDOS
+
+        MVI     E, 1
+        CALL    SETMC
+        LXI     D, FCB
+        MVI     C, F_CLOSE
+        CALL    BDOS
+        CALL    SETUPFCB
+        LXI     D, FCB
+        MVI     C, F_OPEN
+        CALL    BDOS
+        CPI     4
+        JNC     T11FAIL
+
+        MVI     E, 128
+        CALL    SETMC
+        LXI     D, FCB
+        MVI     C, F_READ
+        CALL    BDOS
+        ORA     A
+        JNZ     T11FAIL
+        XRA     A
+        MVI     C, 128
+        CALL    VERBIG
+        JNZ     T11FAIL
+
+        LXI     D, FCB
+        MVI     C, F_READ
+        CALL    BDOS
+        STA     GOTVAL
+        CPI     1
+        JNZ     T11FAIL
+        MOV     A, B
+        CPI     72
+        JNZ     T11FAIL
+        MVI     A, 128
+        MVI     C, 72
+        CALL    VERBIG
+        JNZ     T11FAIL
+
+        CALL    TPASS
+        JMP     T11END
+
+T11FAIL:
+        CALL    TFAIL
+T11END:
+        ; Back to single records and the default DMA
+        MVI     E, 1
+        CALL    SETMC
+        LXI     D, FCB
+        MVI     C, F_CLOSE
+        CALL    BDOS
+        LXI     D, 0080H
+        MVI     C, F_DMAOFF
+        CALL    BDOS
+
         ;---------------------------------------------------------------
         ; Cleanup and Summary
         ;---------------------------------------------------------------
@@ -623,6 +822,52 @@ SFCLR:
         MVI     M, 'T'
         RET
 
+;---------------------------------------------------------------
+; SETMC - Set the multi-sector count to E (F44)
+; Returns A from the BDOS
+;---------------------------------------------------------------
+SETMC:
+        MVI     C, F_MULTI
+        JMP     BDOS
+
+;---------------------------------------------------------------
+; FILLBIG - Fill 100 records of BIGBUF, each with its record
+; number, starting at A
+;---------------------------------------------------------------
+FILLBIG:
+        LXI     H, BIGBUF
+        MVI     C, 100
+FBREC:
+        MVI     B, 128
+FBBYTE:
+        MOV     M, A
+        INX     H
+        DCR     B
+        JNZ     FBBYTE
+        INR     A
+        DCR     C
+        JNZ     FBREC
+        RET
+
+;---------------------------------------------------------------
+; VERBIG - Check C records of BIGBUF hold record numbers from A
+; Returns Z if they all match
+;---------------------------------------------------------------
+VERBIG:
+        LXI     H, BIGBUF
+VBREC:
+        MVI     B, 128
+VBBYTE:
+        CMP     M
+        RNZ
+        INX     H
+        DCR     B
+        JNZ     VBBYTE
+        INR     A
+        DCR     C
+        JNZ     VBREC
+        RET
+
 ;---------------------------------------------------------------
 ; Helper routines
 ;---------------------------------------------------------------
@@ -691,6 +936,9 @@ MSG_T5: DB      'T5: Read past EOF (A=1)... ', '$'
 MSG_T6: DB      'T6: Extent transition write... ', '$'
 MSG_T7: DB      'T7: Extent transition read... ', '$'
 MSG_T8: DB      'T8: Verify DMA contents... ', '$'
+MSG_T9: DB      'T9: F44 count range... ', '$'
+MSG_T10: DB     'T10: F44 100-record write/read... ', '$'
+MSG_T11: DB     'T11: F44 read to EOF (H=72)... ', '$'
 
 MSGOK:  DB      'OK', CR, LF, '$'
 MSGNG:  DB      'NG', CR, LF, '$'
@@ -708,4 +956,7 @@ MSGFAILED: DB   'FAIL', CR, LF, '$'
 WRBUF:  DS      128
 RDBUF:  DS      128
 
+; Multi-sector buffer (128 records)
+BIGBUF: DS      128*128
+
         END     START
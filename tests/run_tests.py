@@ -5,7 +5,7 @@ LOLOS Test Harness
 Automated testing framework that:
 - Builds the CP/M system
 - Creates test disk images
-- Runs cpmsim with scripted commands
+- Runs cpmsim (or the in-process pysim machine) with scripted commands
 - Verifies output against expected results
 
 Cross-platform: Works on Linux and Windows.
@@ -13,10 +13,12 @@ Cross-platform: Works on Linux and Windows.
 
 import os
 import sys
+import json
+import hashlib
 import subprocess
 import shutil
-import tempfile
 import re
+import time
 import platform
 from pathlib import Path
 from dataclasses import dataclass
@@ -53,13 +55,126 @@ for loc in _z80pack_locations:
         CPMSIM_DIR = loc
         break
 
-if CPMSIM_DIR is None:
-    print("WARNING: cpmsim directory not found. Tests will fail.")
-    print("Searched:", [str(p) for p in _z80pack_locations])
+CPMSIM_FOUND = CPMSIM_DIR is not None
+if not CPMSIM_FOUND:
     CPMSIM_DIR = _z80pack_locations[0]  # Use first as fallback
 
 CPMSIM_BIN = CPMSIM_DIR / ("cpmsim.exe" if IS_WINDOWS else "cpmsim")
-CPMSIM_DISKS = CPMSIM_DIR / "disks"
+
+# Assembler flags (part of every build cache key)
+ZMAC_FLAGS = ["-8"]
+
+# Source hashes of the last successful assembly of each unit
+BUILD_CACHE = BUILD_DIR / "build_cache.json"
+
+# In-process machine (tools/pysim.py) keeps its disks under build/
+PYSIM_DIR = BUILD_DIR / "pysim"
+
+# System assembled with TRACE EQU 1 (FDC trace test)
+TRACE_DIR = BUILD_DIR / "trace"
+
+# Per-worker emulator directories for parallel runs (-j N)
+WORKERS_DIR = BUILD_DIR / "workers"
+
+# Benchmark runs (--bench) keep their disks under build/ too
+BENCH_DIR = BUILD_DIR / "bench"
+BENCH_OUT = BUILD_DIR / "bench.json"
+
+# Test programs in tests/programs: hello, file I/O, multi-extent, then
+# BDOS unit tests
+TEST_PROGRAMS = [
+    "hello",
+    "fileio",
+    "bigfile",
+    "tversion",
+    "tdisk",
+    "tsearch",
+    "tuser",
+    "trandom",
+    "tattrib",
+    "tiobyte",
+    "tconch",
+    "tconstr",
+    "trawio",
+    "tauxlst",
+    "topen",
+    "tdelete",
+    "tseqio",
+    "tmake",
+    "trename",
+    "tdma",
+    "talloc",
+    "thdisk",
+    "iostat",
+    "blogin",
+]
+
+# Benchmark programs, deployed only to the --bench disk (BLOGIN is also
+# the login test)
+BENCH_PROGRAMS = [
+    "bseqio",
+    "brandom",
+    "bdirful",
+    "blogin",
+]
+
+# Logins BLOGIN times (PASSES in blogin.asm)
+LOGIN_PASSES = 16
+
+# INCLUDE directive in an assembly source
+INCLUDE_RE = re.compile(r"^[^;\n]*?\bINCLUDE\s+['\"]?([^'\"\s;]+)", re.IGNORECASE | re.MULTILINE)
+
+# CCP prompt at the start of a line, e.g. "A>"
+PROMPT_RE = re.compile(r"(^|\n)[A-P]>")
+
+# Result line printed by the test programs ("PASS", "FAIL: reason")
+RESULT_PATTERN = r"(PASS|FAIL)[^\r\n]*\r?\n"
+
+sys.path.insert(0, str(TOOLS_DIR))
+import cpmfs  # noqa: E402
+import defrag  # noqa: E402
+import fdctrace  # noqa: E402
+import layout  # noqa: E402
+import mkdisk  # noqa: E402
+import pysim  # noqa: E402
+import symprof  # noqa: E402
+
+
+def source_hash(src_file: Path, include_dir: Path = BUILD_DIR) -> str:
+    """Hash an assembly source, the files it INCLUDEs and the zmac flags"""
+    digest = hashlib.sha256(" ".join(ZMAC_FLAGS).encode())
+    pending = [src_file]
+    seen = set()
+    while pending:
+        path = pending.pop(0)
+        if path in seen:
+            continue
+        seen.add(path)
+        digest.update(path.name.encode())
+        if not path.exists():
+            continue
+        data = path.read_bytes()
+        digest.update(data)
+        for match in INCLUDE_RE.finditer(data.decode("latin-1")):
+            # zmac looks next to the source first, then in -I include_dir
+            name = match.group(1)
+            found = path.parent / name
+            pending.append(found if found.exists() else include_dir / name)
+    return digest.hexdigest()
+
+
+def load_build_cache() -> dict:
+    """Load the build cache (empty if missing or unreadable)"""
+    try:
+        return json.loads(BUILD_CACHE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_build_cache(cache: dict):
+    """Write the build cache"""
+    BUILD_DIR.mkdir(exist_ok=True)
+    BUILD_CACHE.write_text(json.dumps(cache, indent=2, sort_keys=True))
 
 
 @dataclass
@@ -74,17 +189,45 @@ class TestResult:
 class CpmTester:
     """Test harness for CP/M system"""
 
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, backend: str = "pysim",
+                 sim_dir: Optional[Path] = None, reuse: bool = True):
         self.verbose = verbose
+        self.backend = backend
         self.results: list[TestResult] = []
 
+        # Emulator working directory; disk images live in its disks/ subdirectory
+        if sim_dir is None:
+            sim_dir = PYSIM_DIR if backend == "pysim" else CPMSIM_DIR
+        self.sim_dir = Path(sim_dir)
+        self.disks_dir = self.sim_dir / "disks"
+
+        # pysim: runs start from a snapshot of one cold boot (None = cold
+        # boot every run, and always on cpmsim)
+        self.session = (pysim.CpmSession(self.disks_dir)
+                        if backend == "pysim" and reuse else None)
+
+        # pysim: bios.lst symbols for the HLE BIOS (None = run the BIOS code)
+        self.hle: Optional[dict] = None
+
+        if backend == "cpmsim":
+            if not CPMSIM_FOUND:
+                print("WARNING: cpmsim directory not found. Tests will fail.")
+                print("Searched:", [str(p) for p in _z80pack_locations])
+
+    def set_hle(self, symbols: Optional[dict]):
+        """Run the console and disk BIOS entries in Python on pysim (None = off)"""
+        self.hle = symbols
+        if self.session is not None:
+            self.session.hle = symbols
+            self.session.snapshot = None
+
     def log(self, msg: str):
         """Print message if verbose"""
         if self.verbose:
             print(f"  {msg}")
 
-    def build(self) -> bool:
-        """Build the LOLOS system from source"""
+    def build(self, rebuild: bool = False, msize: int = layout.MSIZE) -> bool:
+        """Build the LOLOS system from source, skipping unchanged units"""
         print("Building LOLOS system...")
 
         zmac = TOOLS_DIR / ("zmac.exe" if IS_WINDOWS else "zmac")
@@ -94,193 +237,236 @@ class CpmTester:
 
         # Create build directory
         BUILD_DIR.mkdir(exist_ok=True)
+        cache = {} if rebuild else load_build_cache()
 
-        # Assemble each component
-        components = ["boot", "bios", "bdos", "ccp"]
-
-        for name in components:
-            src_file = SRC_DIR / f"{name}.asm"
+        try:
+            changed = self.assemble_system(BUILD_DIR, msize, cache)
+        except layout.LayoutError as e:
+            print(f"ERROR: {e}")
+            changed = None
+        if changed is None:
+            save_build_cache(cache)
+            return False
 
-            self.log(f"Assembling {name}...")
+        # Create disk image only when a system binary changed
+        if changed or not (PROJECT_ROOT / "drivea.dsk").exists():
+            self.log("Creating disk image...")
             result = subprocess.run(
-                [str(zmac), "-8", "--od", str(BUILD_DIR), "--oo", "cim,lst", str(src_file)],
+                [sys.executable, str(TOOLS_DIR / "mkdisk.py")],
                 capture_output=True,
-                text=True
+                text=True,
+                cwd=PROJECT_ROOT
             )
             if result.returncode != 0:
-                print(f"ERROR: Failed to assemble {name}")
+                print(f"ERROR: Failed to create disk image")
                 print(result.stderr)
+                save_build_cache(cache)
                 return False
-
-        # Create disk image
-        self.log("Creating disk image...")
-        result = subprocess.run(
-            [sys.executable, str(TOOLS_DIR / "mkdisk.py")],
-            capture_output=True,
-            text=True,
-            cwd=PROJECT_ROOT
-        )
-        if result.returncode != 0:
-            print(f"ERROR: Failed to create disk image")
-            print(result.stderr)
-            return False
+        else:
+            self.log("Disk image up to date")
 
         # Build test programs
-        if not self.build_test_programs():
+        ok = self.build_test_programs(cache)
+        save_build_cache(cache)
+        if not ok:
             return False
 
         print("Build complete.")
         return True
 
-    def build_test_programs(self) -> bool:
+    def assemble_system(self, build_dir: Path, msize: int, cache: dict,
+                        sources: Optional[dict] = None) -> Optional[list[str]]:
+        """
+        Assemble boot, BIOS, BDOS and CCP into build_dir at a packed layout.
+
+        Each component is assembled at build_dir/layout.inc, then the layout
+        is packed against the sizes just assembled. Sizes do not depend on
+        the load address, so at most one more pass is needed. sources maps
+        a component name to a source to use instead of src/<name>.asm (e.g.
+        a copy of the BIOS with a define added).
+
+        Returns:
+            Names of the units that were assembled, or None on failure
+
+        Raises:
+            layout.LayoutError: the system does not fit
+        """
+        sources = sources or {}
+        components = ["boot", "bios", "bdos", "ccp"]
+        units = [(sources.get(name, SRC_DIR / f"{name}.asm"), build_dir) for name in components]
+
+        changed = []
+        layout.update(build_dir, msize)
+        for _ in range(2):
+            assembled = self.assemble(units, cache, include_dir=build_dir)
+            if assembled is None:
+                return None
+            changed += assembled
+            if not layout.update(build_dir, msize):
+                return changed
+            self.log("Layout moved, assembling again...")
+        print("ERROR: Layout did not settle")
+        return None
+
+    def build_test_programs(self, cache: Optional[dict] = None) -> bool:
         """Build all test programs in tests/programs/"""
         test_programs_dir = PROJECT_ROOT / "tests" / "programs"
-        zmac = TOOLS_DIR / ("zmac.exe" if IS_WINDOWS else "zmac")
 
-        # List of test programs to build
-        test_programs = [
-            "hello",
-            "fileio",
-            "bigfile",
-            "tversion",
-            "tdisk",
-            "tsearch",
-            "tuser",
-            "trandom",
-            "tattrib",
-            "tiobyte",
-            "tconch",
-            "tconstr",
-            "trawio",
-            "tauxlst",
-            "topen",
-            "tdelete",
-            "tseqio",
-            "tmake",
-            "trename",
-            "tdma",
-            "talloc",
-        ]
-
-        for prog in test_programs:
+        units = []
+        for prog in dict.fromkeys(TEST_PROGRAMS + BENCH_PROGRAMS):
             src_file = test_programs_dir / f"{prog}.asm"
-            if not src_file.exists():
-                continue
+            if src_file.exists():
+                units.append((src_file, test_programs_dir))
 
-            self.log(f"Assembling {prog}...")
-            result = subprocess.run(
-                [str(zmac), "-8", "--od", str(test_programs_dir), "--oo", "cim,lst", str(src_file)],
+        if cache is None:
+            cache = load_build_cache()
+        return self.assemble(units, cache, ext="com") is not None
+
+    def assemble(self, units: list[tuple[Path, Path]], cache: dict,
+                 ext: str = "cim", include_dir: Path = BUILD_DIR) -> Optional[list[str]]:
+        """
+        Assemble units with zmac, skipping those whose sources are unchanged.
+
+        A unit is (source, output directory). Its cache key is a hash of the
+        source, every file it INCLUDEs and the zmac flags; it is skipped when
+        the hash matches the cache and its outputs exist. The rest run in a
+        worker pool. With ext="com" the .cim output is renamed to .com.
+        zmac looks for INCLUDEd files in include_dir (-I).
+
+        Returns:
+            Names of the units that were assembled, or None on failure
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        zmac = TOOLS_DIR / ("zmac.exe" if IS_WINDOWS else "zmac")
+
+        stale = []
+        for src_file, out_dir in units:
+            key = str(src_file.relative_to(PROJECT_ROOT).as_posix())
+            digest = source_hash(src_file, include_dir)
+            outputs = [out_dir / f"{src_file.stem}.{ext}", out_dir / f"{src_file.stem}.lst"]
+            if cache.get(key) == digest and all(f.exists() for f in outputs):
+                self.log(f"{src_file.stem} is up to date")
+                continue
+            stale.append((src_file, out_dir, key, digest))
+
+        def run_zmac(unit):
+            src_file, out_dir, _, _ = unit
+            self.log(f"Assembling {src_file.stem}...")
+            return subprocess.run(
+                [str(zmac), *ZMAC_FLAGS, "-I", str(include_dir), "--od", str(out_dir),
+                 "--oo", "cim,lst", str(src_file)],
                 capture_output=True,
                 text=True
             )
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            results = list(pool.map(run_zmac, stale))
+
+        ok = True
+        for (src_file, out_dir, key, digest), result in zip(stale, results):
             if result.returncode != 0:
-                print(f"ERROR: Failed to assemble {prog}")
+                print(f"ERROR: Failed to assemble {src_file.stem}")
                 print(result.stderr)
-                return False
-
-            # Rename .cim to .com
-            cim_file = test_programs_dir / f"{prog}.cim"
-            com_file = test_programs_dir / f"{prog}.com"
-            if cim_file.exists():
-                if com_file.exists():
-                    com_file.unlink()
-                cim_file.rename(com_file)
+                cache.pop(key, None)
+                ok = False
+                continue
 
-        return True
+            if ext != "cim":
+                # Rename .cim to .com
+                cim_file = out_dir / f"{src_file.stem}.cim"
+                com_file = out_dir / f"{src_file.stem}.{ext}"
+                if cim_file.exists():
+                    if com_file.exists():
+                        com_file.unlink()
+                    cim_file.rename(com_file)
+            cache[key] = digest
+
+        if not ok:
+            return None
+        return [src_file.stem for src_file, _, _, _ in stale]
+
+    def deploy_disk(self, programs: Optional[list[str]] = None) -> bool:
+        """
+        Copy disk image to the backend's disks directory and add test programs.
 
-    def deploy_disk(self) -> bool:
-        """Copy disk image to cpmsim directory and add test programs"""
+        programs names the tests/programs .COM files to add (default
+        TEST_PROGRAMS).
+        """
         src = PROJECT_ROOT / "drivea.dsk"
-        dst = CPMSIM_DISKS / "drivea.dsk"
+        dst = self.disks_dir / "drivea.dsk"
 
         if not src.exists():
             print(f"ERROR: Disk image not found: {src}")
             return False
 
-        shutil.copy(src, dst)
-        self.log(f"Deployed disk to {dst}")
+        self.disks_dir.mkdir(parents=True, exist_ok=True)
 
-        # Add hello.com test program if it exists
-        hello_com = PROJECT_ROOT / "tests" / "programs" / "hello.com"
-        if hello_com.exists():
-            self.add_file_to_disk(hello_com, "HELLO.COM")
-
-        # Add file I/O test program if it exists
-        fileio_com = PROJECT_ROOT / "tests" / "programs" / "fileio.com"
-        if fileio_com.exists():
-            self.add_file_to_disk(fileio_com, "FILEIO.COM")
-
-        # Add multi-extent test program if it exists
-        bigfile_com = PROJECT_ROOT / "tests" / "programs" / "bigfile.com"
-        if bigfile_com.exists():
-            self.add_file_to_disk(bigfile_com, "BIGFILE.COM")
-
-        # Add new BDOS unit test programs
-        unit_tests = [
-            "tversion.com",
-            "tdisk.com",
-            "tsearch.com",
-            "tuser.com",
-            "trandom.com",
-            "tattrib.com",
-            "tiobyte.com",
-            "tconch.com",
-            "tconstr.com",
-            "trawio.com",
-            "tauxlst.com",
-            "topen.com",
-            "tdelete.com",
-            "tseqio.com",
-            "tmake.com",
-            "trename.com",
-            "tdma.com",
-            "talloc.com",
-        ]
-        for test_name in unit_tests:
-            test_path = PROJECT_ROOT / "tests" / "programs" / test_name
-            if test_path.exists():
-                self.add_file_to_disk(test_path, test_name.upper())
+        if programs is None:
+            programs = TEST_PROGRAMS
+
+        # Build the image in memory and write it once
+        try:
+            disk = cpmfs.CpmDisk.open(src)
+            for prog in programs:
+                prog_path = PROJECT_ROOT / "tests" / "programs" / f"{prog}.com"
+                if prog_path.exists():
+                    disk.write_file(f"{prog.upper()}.COM", prog_path.read_bytes())
+                    self.log(f"Added {prog.upper()}.COM to disk")
+            disk.save(dst)
+        except (cpmfs.CpmError, OSError) as e:
+            print(f"ERROR: Failed to deploy disk: {e}")
+            return False
 
+        self.log(f"Deployed disk to {dst}")
         return True
 
     def add_file_to_disk(self, local_path: Path, cpm_name: str) -> bool:
-        """Add a file to the disk image using cpmcp"""
-        disk = CPMSIM_DISKS / "drivea.dsk"
+        """Add a file to the deployed disk image"""
+        return self.write_disk_file(cpm_name, local_path.read_bytes())
+
+    def write_disk_file(self, cpm_name: str, data: bytes, user: int = 0) -> bool:
+        """Write data as a file on the deployed disk image"""
+        disk_path = self.disks_dir / "drivea.dsk"
 
         # CP/M requires uppercase filenames
         cpm_name = cpm_name.upper()
 
-        result = subprocess.run(
-            ["cpmcp", "-f", "ibm-3740", str(disk), str(local_path), f"0:{cpm_name}"],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode != 0:
-            print(f"ERROR: Failed to copy {local_path} to disk")
-            print(result.stderr)
+        try:
+            disk = cpmfs.CpmDisk.open(disk_path)
+            disk.write_file(cpm_name, data, user)
+            disk.save()
+        except (cpmfs.CpmError, OSError) as e:
+            print(f"ERROR: Failed to write {cpm_name} to disk: {e}")
             return False
 
         self.log(f"Added {cpm_name} to disk")
         return True
 
-    def create_text_file(self, cpm_name: str, content: str) -> bool:
-        """Create a text file on the disk"""
-        # CP/M text files end with Ctrl-Z (0x1A)
-        cpm_content = content.replace("\n", "\r\n")
-        if not cpm_content.endswith("\x1a"):
-            cpm_content += "\x1a"
+    def create_hd_disk(self, files: list[tuple[str, bytes]]) -> bool:
+        """Create the I: hard disk image in the disks directory with the given files"""
+        disk_path = self.disks_dir / "drivei.dsk"
+        try:
+            disk = cpmfs.CpmDisk(b"", cpmfs.Z80PACK_HD)
+            for cpm_name, data in files:
+                disk.write_file(cpm_name.upper(), data)
+            disk.save(disk_path)
+        except (cpmfs.CpmError, OSError) as e:
+            print(f"ERROR: Failed to create {disk_path}: {e}")
+            return False
 
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-            f.write(cpm_content)
-            temp_path = Path(f.name)
+        self.log(f"Created {disk_path} with {len(files)} files")
+        return True
 
-        try:
-            return self.add_file_to_disk(temp_path, cpm_name)
-        finally:
-            temp_path.unlink()
+    def create_text_file(self, cpm_name: str, content: str) -> bool:
+        """Create a text file on the disk"""
+        # CP/M text files use CRLF and end with Ctrl-Z (0x1A)
+        return self.write_disk_file(cpm_name, cpmfs.text_to_cpm(content))
 
     def run_cpmsim(self, commands: list[str], timeout: int = 10,
-                    program_input: str = "") -> tuple[bool, str]:
+                    program_input: str = "",
+                    until: Optional[str] = None,
+                    cold: bool = False) -> tuple[bool, str]:
         """
         Run cpmsim with scripted commands and optional program input.
 
@@ -290,6 +476,10 @@ class CpmTester:
             program_input: Raw input data for programs to read via F1/F6/F10.
                           This is appended after commands, so the program receives
                           it when it reads from console.
+            until: Optional regex; the session ends as soon as it matches the
+                   output (e.g. RESULT_PATTERN for test programs)
+            cold: Boot from scratch even if a booted pysim session could be
+                  reused (cpmsim always boots from scratch)
 
         Returns:
             (success, output) tuple
@@ -302,6 +492,9 @@ class CpmTester:
         # Commands are separated by newlines, then program_input is appended
         cmd_input = "\n".join(commands) + "\n" + program_input
 
+        if self.backend == "pysim":
+            return self.run_pysim(cmd_input, timeout, cold)
+
         try:
             if IS_WINDOWS:
                 # Windows: use Popen with stdin pipe
@@ -311,7 +504,7 @@ class CpmTester:
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
-                    cwd=CPMSIM_DIR
+                    cwd=self.sim_dir
                 )
                 try:
                     stdout, stderr = proc.communicate(input=cmd_input, timeout=timeout)
@@ -323,30 +516,164 @@ class CpmTester:
                     if "A>" not in output:
                         return False, "TIMEOUT: cpmsim did not respond"
             else:
-                # Linux/Mac: use printf with pipe for reliable EOF handling
-                # Escape special chars for shell
-                escaped = cmd_input.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
-                shell_cmd = f'printf "{escaped}" | timeout {timeout} ./cpmsim -8'
-
-                result = subprocess.run(
-                    shell_cmd,
-                    shell=True,
-                    capture_output=True,
-                    cwd=CPMSIM_DIR,
-                    executable='/bin/bash'
-                )
-                # Decode with replacement for any binary garbage
-                output = result.stdout.decode('utf-8', errors='replace') + result.stderr.decode('utf-8', errors='replace')
-
-                # timeout returns 124 when it kills the process
-                # But we still have valid output if cpmsim ran, so check for that
-                if result.returncode == 124 and "A>" not in output:
+                # Linux/Mac: stream a pty session and stop as soon as done
+                output, timed_out = self.run_cpmsim_session(
+                    commands, program_input, timeout, until)
+                if timed_out and "A>" not in output:
                     return False, "TIMEOUT: cpmsim did not respond"
 
             return True, output
         except Exception as e:
             return False, f"ERROR: {e}"
 
+    def run_cpmsim_session(self, commands: list[str], program_input: str,
+                           timeout: int, until: Optional[str]) -> tuple[str, bool]:
+        """
+        Drive cpmsim through a pty, one command per CCP prompt.
+
+        Each command is sent once the prompt appears, program_input follows
+        the last command, and cpmsim is killed as soon as the prompt returns
+        after the last command or the until pattern matches. Only a hung
+        session runs into the timeout.
+
+        Returns:
+            (output, timed_out) tuple
+        """
+        import pty
+        import select
+        import termios
+        import tty
+
+        master, slave = pty.openpty()
+        # Raw mode: no echo or CR/LF translation, cpmsim sees the bytes as sent
+        tty.setraw(slave, termios.TCSANOW)
+        proc = subprocess.Popen(
+            [str(CPMSIM_BIN), "-8"],
+            stdin=slave,
+            stdout=slave,
+            stderr=slave,
+            cwd=self.sim_dir,
+            start_new_session=True
+        )
+        os.close(slave)
+
+        pending = [cmd + "\n" for cmd in commands]
+        if program_input:
+            pending[-1] += program_input
+        until_re = re.compile(until) if until else None
+
+        buf = bytearray()
+        mark = 0            # Output offset where the next prompt is expected
+        done = False
+        timed_out = False
+        deadline = time.monotonic() + timeout
+
+        try:
+            while not done:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                ready, _, _ = select.select([master], [], [], remaining)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(master, 4096)
+                except OSError:
+                    data = b""
+                if not data:
+                    break       # cpmsim exited
+                buf += data
+                text = buf.decode('utf-8', errors='replace')
+
+                if until_re and until_re.search(text):
+                    done = True
+                elif PROMPT_RE.search(text, mark):
+                    if pending:
+                        mark = len(text)
+                        os.write(master, pending.pop(0).encode('latin-1'))
+                    else:
+                        done = True
+        finally:
+            proc.kill()
+            proc.wait()
+            os.close(master)
+
+        self.log(f"cpmsim session {'timed out' if timed_out else 'finished'}")
+        return buf.decode('utf-8', errors='replace'), timed_out
+
+    def run_pysim(self, cmd_input: str, timeout: int,
+                  cold: bool = False) -> tuple[bool, str]:
+        """
+        Run scripted input on the in-process 8080 machine.
+
+        The run ends as soon as the input is used up and the system is
+        waiting at the console again, so no time is spent on timeouts.
+        With a session only the first run boots; later runs start from a
+        snapshot of the booted system (see pysim.CpmSession).
+        """
+        try:
+            if self.session is not None:
+                output, reason = self.session.run(cmd_input, timeout=timeout, cold=cold)
+            else:
+                output, reason = pysim.run_session(self.disks_dir, cmd_input, timeout=timeout,
+                                                   hle=self.hle)
+        except Exception as e:
+            return False, f"ERROR: {e}"
+
+        self.log(f"pysim stopped: {reason}")
+        if reason == "nodisk":
+            return False, f"ERROR: {self.disks_dir / 'drivea.dsk'} not found"
+        if reason == "timeout" and "A>" not in output:
+            return False, "TIMEOUT: pysim did not respond"
+
+        return True, output
+
+    def run_benchmark(self, image: bytes, setup, command: str, expected: str,
+                      timeout: int = 120) -> dict:
+        """
+        Time one command on the in-process machine.
+
+        The disk is a fresh copy of image, prepared by setup(disk) if given.
+        The machine boots to the prompt first, so the counts cover only the
+        command, from the moment it is typed to the next prompt.
+
+        Returns:
+            Dict with ok (expected text seen), wall time in seconds, and the
+            machine's counter deltas (instructions, cycles, FDC sector
+            transfers, calls per BIOS entry); ok False with a reason
+            (nolayout, nodisk) if the machine could not be started
+        """
+        disk = cpmfs.CpmDisk(image)
+        if setup is not None:
+            setup(disk)
+        self.disks_dir.mkdir(parents=True, exist_ok=True)
+        disk.save(self.disks_dir / "drivea.dsk")
+
+        lay = layout.read(BUILD_DIR)
+        if lay is None:
+            return {"ok": False, "reason": "nolayout"}
+        machine = pysim.Machine(self.disks_dir, hle=self.hle)
+        machine.bios_base = lay.bios
+        if not machine.boot():
+            return {"ok": False, "reason": "nodisk"}
+        machine.run_until_idle(timeout=timeout)
+        mark = len(machine.console_out)
+        before = machine.counters()
+
+        start = time.perf_counter()
+        machine.feed(f"{command}\r".encode("latin-1"))
+        reason = machine.run_until_idle(timeout=timeout)
+        wall = time.perf_counter() - start
+
+        after = machine.counters()
+        output = machine.console_out[mark:].decode("utf-8", errors="replace")
+        self.log(f"{command}: {reason}")
+        result = {"ok": reason == "idle" and expected in output,
+                  "wall": round(wall, 3)}
+        result.update((key, after[key] - before[key]) for key in after)
+        return result
+
     def expect_in_output(self, output: str, expected: str) -> bool:
         """Check if expected string is in output"""
         return expected in output
@@ -358,12 +685,20 @@ class CpmTester:
     def run_test(self, name: str, test_func) -> TestResult:
         """Run a single test and record result"""
         print(f"  Running: {name}...", end=" ")
+        result = self.execute_test(name, test_func)
+        self.record_result(result)
+        return result
+
+    def execute_test(self, name: str, test_func) -> TestResult:
+        """Run a single test function and return its result"""
         try:
-            passed, message, output = test_func()
-            result = TestResult(name, passed, message, output)
+            passed, message, output = test_func(self)
+            return TestResult(name, passed, message, output)
         except Exception as e:
-            result = TestResult(name, False, f"Exception: {e}")
+            return TestResult(name, False, f"Exception: {e}")
 
+    def record_result(self, result: TestResult):
+        """Append a result and print its outcome"""
         self.results.append(result)
 
         if result.passed:
@@ -377,7 +712,38 @@ class CpmTester:
                     for line in result.output.split('\n')[:20]:
                         print(f"      {line}")
 
-        return result
+    def run_parallel(self, tests: list[tuple[str, object]], jobs: int):
+        """
+        Run tests across a process pool of isolated workers.
+
+        Each worker gets its own emulator directory with a private copy of
+        the deployed disk image. On pysim the system is booted once here and
+        every worker starts from that snapshot. Results are recorded in test
+        order.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        shutil.rmtree(WORKERS_DIR, ignore_errors=True)
+        image = self.disks_dir / "drivea.dsk"
+
+        snapshot = None
+        if self.session is not None:
+            if self.session.snapshot is None:
+                self.session.boot(timeout=10)
+            snapshot = self.session.snapshot
+
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(self.backend, self.verbose, image,
+                                           self.session is not None, snapshot,
+                                           self.hle)) as pool:
+            futures = [pool.submit(_run_worker_test, name) for name, _ in tests]
+            for (name, _), future in zip(tests, futures):
+                print(f"  Running: {name}...", end=" ", flush=True)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = TestResult(name, False, f"Exception: {e}")
+                self.record_result(result)
 
     def print_summary(self):
         """Print test summary"""
@@ -402,9 +768,37 @@ class CpmTester:
 # Test Definitions
 # =============================================================================
 
+# Tester owned by a parallel worker process (see CpmTester.run_parallel)
+_worker_tester: Optional[CpmTester] = None
+
+
+def _init_worker(backend: str, verbose: bool, image: Path, reuse: bool,
+                 snapshot: Optional[pysim.Snapshot], hle: Optional[dict]):
+    """
+    Set up a worker's emulator directory with a copy of the deployed image.
+
+    With a snapshot of the booted system, the worker's runs start from it
+    instead of booting again.
+    """
+    global _worker_tester
+    sim_dir = WORKERS_DIR / str(os.getpid())
+    (sim_dir / "disks").mkdir(parents=True, exist_ok=True)
+    shutil.copy(image, sim_dir / "disks" / "drivea.dsk")
+    _worker_tester = CpmTester(verbose=verbose, backend=backend, sim_dir=sim_dir,
+                               reuse=reuse)
+    _worker_tester.set_hle(hle)
+    if _worker_tester.session is not None:
+        _worker_tester.session.snapshot = snapshot
+
+
+def _run_worker_test(name: str) -> TestResult:
+    """Run one named test on this worker's tester"""
+    return _worker_tester.execute_test(name, dict(ALL_TESTS)[name])
+
+
 def test_boot(tester: CpmTester):
     """Test that system boots correctly"""
-    success, output = tester.run_cpmsim(["DIR"], timeout=5)
+    success, output = tester.run_cpmsim(["DIR"], timeout=5, cold=True)
     if not success:
         return False, output, output
 
@@ -439,10 +833,20 @@ def test_type_command(tester: CpmTester):
     if not success:
         return False, output, output
 
-    if "Hello from test file!" in output:
+    if "Hello from test file!" not in output:
+        return False, "Expected content not found in TYPE output", output
+
+    # 700 lines run past the first extent
+    lines = [f"Line {i:03d} of the long file" for i in range(700)]
+    tester.create_text_file("LONG.TXT", "\n".join(lines) + "\n")
+    success, output = tester.run_cpmsim(["TYPE LONG.TXT"], timeout=10)
+    if not success:
+        return False, output, output
+
+    if "Line 000 of" in output and "Line 699 of" in output:
         return True, "TYPE displays file correctly", output
 
-    return False, "Expected content not found in TYPE output", output
+    return False, "Long file not typed to the end", output
 
 
 def test_era_command(tester: CpmTester):
@@ -493,19 +897,65 @@ def test_hello_program(tester: CpmTester):
     if not success:
         return False, output, output
 
-    if "Hello" in output or "hello" in output:
+    if "Hello" not in output and "hello" not in output:
+        return False, "Expected hello output not found", output
+
+    # A 20K program is loaded in two F20 calls (128 records each)
+    code_at = 0x5000
+    message = b"Loaded past 16K$"
+    code = bytes([0x11, (code_at + 9) & 0xFF, (code_at + 9) >> 8,  # LXI D,msg
+                  0x0E, 0x09,                                      # MVI C,9
+                  0xCD, 0x05, 0x00,                                # CALL 5
+                  0xC9])                                           # RET
+    image = bytearray(code_at - 0x100)
+    image[0:3] = bytes([0xC3, code_at & 0xFF, code_at >> 8])     # JMP code
+    tester.write_disk_file("BIGLOAD.COM", bytes(image) + code + message)
+    success, output = tester.run_cpmsim(["BIGLOAD"], timeout=5)
+    if not success:
+        return False, output, output
+
+    if "Loaded past 16K" in output:
         return True, "hello.com executes correctly", output
 
-    return False, "Expected hello output not found", output
+    return False, "20K program did not load", output
+
+
+def test_wboot(tester: CpmTester):
+    """Test that warm boot reloads a CCP a program wrote over"""
+    # SMASH fills the CCP (up to the BDOS) with HLT, then JMP 0
+    lay = layout.read(BUILD_DIR)
+    size = lay.bdos - lay.ccp
+    code = bytes([0x21, lay.ccp & 0xFF, lay.ccp >> 8,  # LXI H,CCP
+                  0x01, size & 0xFF, size >> 8,        # LXI B,BDOS-CCP
+                  0x36, 0x76,              # fill: MVI M,76H
+                  0x23,                    # INX H
+                  0x0B,                    # DCX B
+                  0x78,                    # MOV A,B
+                  0xB1,                    # ORA C
+                  0xC2, 0x06, 0x01,        # JNZ fill
+                  0xC3, 0x00, 0x00])       # JMP 0000H
+    tester.write_disk_file("SMASH.COM", code)
+    success, output = tester.run_cpmsim(["SMASH", "HELLO", "SMASH", "DIR SMASH.COM"],
+                                        timeout=5)
+    if not success:
+        return False, output, output
+
+    if "Hello" in output and "SMASH" in output.split("DIR SMASH.COM", 1)[-1]:
+        return True, "CCP reloaded after being overwritten", output
+
+    return False, "CCP did not survive SMASH", output
 
 
 def test_save_command(tester: CpmTester):
     """Test SAVE command creates files from memory"""
     # First run HELLO to load something at 0100h
+    # Then TYPE a file, which must not touch the TPA
     # Then save 1 page (256 bytes) to a new file
     # Then verify the file exists and can run
+    tester.create_text_file("SAVETYPE.TXT", "Typed between load and SAVE")
     success, output = tester.run_cpmsim([
         "HELLO",           # Load hello.com at 0100h
+        "TYPE SAVETYPE.TXT",
         "SAVE 1 COPY.COM", # Save 1 page to COPY.COM
         "DIR COPY.COM",    # Verify file exists
         "COPY"             # Try to run it
@@ -519,20 +969,16 @@ def test_save_command(tester: CpmTester):
         return False, "SAVE did not create file", output
 
     # Check that running COPY produces hello output
-    # (since it's a copy of hello.com)
+    # (since it's a copy of hello.com, kept in the TPA across TYPE)
     if output.count("Hello") >= 2 or output.count("hello") >= 2:
         return True, "SAVE creates runnable copy", output
 
-    # Even if copy doesn't run perfectly, if file was created it's a pass
-    if "COPY" in output and "COM" in output:
-        return True, "SAVE creates file", output
-
-    return False, "SAVE test failed", output
+    return False, "Saved copy does not run", output
 
 
 def test_fileio(tester: CpmTester):
     """Test file I/O operations (create, write, read, verify)"""
-    success, output = tester.run_cpmsim(["FILEIO"], timeout=10)
+    success, output = tester.run_cpmsim(["FILEIO"], timeout=10, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -551,7 +997,7 @@ def test_bigfile(tester: CpmTester):
     """Test multi-extent file operations (>16K file spanning 2 extents)"""
     # This test writes 200 records (25K) which spans 2 extents
     # Give it more time since it writes a lot of data
-    success, output = tester.run_cpmsim(["BIGFILE"], timeout=60)
+    success, output = tester.run_cpmsim(["BIGFILE"], timeout=60, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -567,7 +1013,7 @@ def test_bigfile(tester: CpmTester):
 
 def test_version(tester: CpmTester):
     """Test BDOS function 12 - Version number"""
-    success, output = tester.run_cpmsim(["TVERSION"], timeout=10)
+    success, output = tester.run_cpmsim(["TVERSION"], timeout=10, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -580,7 +1026,7 @@ def test_version(tester: CpmTester):
 
 def test_disk_mgmt(tester: CpmTester):
     """Test disk management functions (F13,14,24,25,27,29,31,37)"""
-    success, output = tester.run_cpmsim(["TDISK"], timeout=15)
+    success, output = tester.run_cpmsim(["TDISK"], timeout=15, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -593,7 +1039,7 @@ def test_disk_mgmt(tester: CpmTester):
 
 def test_search(tester: CpmTester):
     """Test search functions (F17, F18)"""
-    success, output = tester.run_cpmsim(["TSEARCH"], timeout=15)
+    success, output = tester.run_cpmsim(["TSEARCH"], timeout=15, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -606,7 +1052,7 @@ def test_search(tester: CpmTester):
 
 def test_user(tester: CpmTester):
     """Test user number function (F32)"""
-    success, output = tester.run_cpmsim(["TUSER"], timeout=10)
+    success, output = tester.run_cpmsim(["TUSER"], timeout=10, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -619,7 +1065,7 @@ def test_user(tester: CpmTester):
 
 def test_random(tester: CpmTester):
     """Test random access functions (F33-36, F40)"""
-    success, output = tester.run_cpmsim(["TRANDOM"], timeout=30)
+    success, output = tester.run_cpmsim(["TRANDOM"], timeout=30, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -632,7 +1078,7 @@ def test_random(tester: CpmTester):
 
 def test_attrib(tester: CpmTester):
     """Test file attributes function (F30)"""
-    success, output = tester.run_cpmsim(["TATTRIB"], timeout=15)
+    success, output = tester.run_cpmsim(["TATTRIB"], timeout=15, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -645,7 +1091,7 @@ def test_attrib(tester: CpmTester):
 
 def test_iobyte(tester: CpmTester):
     """Test IOBYTE and write protect (F7, F8, F28)"""
-    success, output = tester.run_cpmsim(["TIOBYTE"], timeout=10)
+    success, output = tester.run_cpmsim(["TIOBYTE"], timeout=10, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -660,7 +1106,7 @@ def test_conch(tester: CpmTester):
     """Test console character I/O (F1, F2) with input injection"""
     # F1 tests expect 'A' then 'B' to be read from console
     # We inject these after the TCONCH command
-    success, output = tester.run_cpmsim(["TCONCH"], timeout=10,
+    success, output = tester.run_cpmsim(["TCONCH"], timeout=10, until=RESULT_PATTERN,
                                          program_input="AB")
 
     if not success:
@@ -677,7 +1123,7 @@ def test_constr(tester: CpmTester):
     # F10 tests:
     # - T5 expects "HELLO" + CR (reads 5 chars)
     # - T6 expects just CR (reads 0 chars, empty line)
-    success, output = tester.run_cpmsim(["TCONSTR"], timeout=10,
+    success, output = tester.run_cpmsim(["TCONSTR"], timeout=10, until=RESULT_PATTERN,
                                          program_input="HELLO\r\r")
 
     if not success:
@@ -694,7 +1140,7 @@ def test_rawio(tester: CpmTester):
     # F6 tests:
     # - T3 expects 'X' (blocking read)
     # - T4 expects 'Y' (non-blocking read)
-    success, output = tester.run_cpmsim(["TRAWIO"], timeout=10,
+    success, output = tester.run_cpmsim(["TRAWIO"], timeout=10, until=RESULT_PATTERN,
                                          program_input="XY")
 
     if not success:
@@ -709,7 +1155,7 @@ def test_rawio(tester: CpmTester):
 def test_auxlst(tester: CpmTester):
     """Test auxiliary and list devices (F3, F4, F5)"""
     # No input injection needed - tests output devices and reader
-    success, output = tester.run_cpmsim(["TAUXLST"], timeout=10)
+    success, output = tester.run_cpmsim(["TAUXLST"], timeout=10, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -722,7 +1168,7 @@ def test_auxlst(tester: CpmTester):
 
 def test_open(tester: CpmTester):
     """Test file open/close functions (F15, F16)"""
-    success, output = tester.run_cpmsim(["TOPEN"], timeout=15)
+    success, output = tester.run_cpmsim(["TOPEN"], timeout=15, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -735,7 +1181,7 @@ def test_open(tester: CpmTester):
 
 def test_delete(tester: CpmTester):
     """Test file delete function (F19)"""
-    success, output = tester.run_cpmsim(["TDELETE"], timeout=15)
+    success, output = tester.run_cpmsim(["TDELETE"], timeout=15, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -749,7 +1195,7 @@ def test_delete(tester: CpmTester):
 def test_seqio(tester: CpmTester):
     """Test sequential I/O functions (F20, F21)"""
     # Give more time for extent transition tests (129 records)
-    success, output = tester.run_cpmsim(["TSEQIO"], timeout=60)
+    success, output = tester.run_cpmsim(["TSEQIO"], timeout=60, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -762,7 +1208,7 @@ def test_seqio(tester: CpmTester):
 
 def test_make(tester: CpmTester):
     """Test file create function (F22)"""
-    success, output = tester.run_cpmsim(["TMAKE"], timeout=15)
+    success, output = tester.run_cpmsim(["TMAKE"], timeout=15, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -775,7 +1221,7 @@ def test_make(tester: CpmTester):
 
 def test_rename(tester: CpmTester):
     """Test file rename function (F23)"""
-    success, output = tester.run_cpmsim(["TRENAME"], timeout=15)
+    success, output = tester.run_cpmsim(["TRENAME"], timeout=15, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -788,7 +1234,7 @@ def test_rename(tester: CpmTester):
 
 def test_dma(tester: CpmTester):
     """Test DMA address function (F26)"""
-    success, output = tester.run_cpmsim(["TDMA"], timeout=15)
+    success, output = tester.run_cpmsim(["TDMA"], timeout=15, until=RESULT_PATTERN)
 
     if not success:
         return False, output, output
@@ -803,7 +1249,7 @@ def test_alloc(tester: CpmTester):
     """Test allocation vector and R/O functions (F27, F28, F29)"""
     # BDOS may print error and wait for keypress on R/O violation
     # Provide input to dismiss any error prompts
-    success, output = tester.run_cpmsim(["TALLOC"], timeout=20,
+    success, output = tester.run_cpmsim(["TALLOC"], timeout=20, until=RESULT_PATTERN,
                                          program_input="\r\r\r")
 
     if not success:
@@ -815,27 +1261,439 @@ def test_alloc(tester: CpmTester):
     return False, "Allocation/R/O tests failed", output
 
 
+def test_hdisk(tester: CpmTester):
+    """Test the z80pack hard disk on I: (16-bit block pointers, 1024-entry directory)"""
+    # Empty files push HDREAD.DAT past directory entry 512 (second track)
+    # and the filler pushes its blocks above 255
+    files = [(f"DUMMY{i:03d}.DAT", b"") for i in range(600)]
+    files.append(("FILLER.DAT", bytes(300 * cpmfs.Z80PACK_HD.block_size)))
+    files.append(("HDREAD.DAT", bytes((r + j) & 0xFF for r in range(48) for j in range(128))))
+    if not tester.create_hd_disk(files):
+        return False, "Failed to create hard disk image", ""
+
+    success, output = tester.run_cpmsim(["THDISK"], timeout=30, until=RESULT_PATTERN)
+
+    if not success:
+        return False, output, output
+
+    if "PASS" in output:
+        return True, "Hard disk tests passed", output
+
+    return False, "Hard disk tests failed", output
+
+
+def test_iostat(tester: CpmTester):
+    """Test the BIOS I/O statistics block through IOSTAT (print and clear)"""
+    success, output = tester.run_cpmsim(["IOSTAT", "IOSTAT", "IOSTAT"], timeout=10)
+    if not success:
+        return False, output, output
+
+    reports = output.split("IOSTAT: ")[1:]
+    if len(reports) != 3 or "No I/O statistics" in output:
+        return False, "Expected three IOSTAT reports", output
+
+    # The later reports each count one load and run of IOSTAT, so they match
+    counts = [dict(re.findall(r"(\w[\w ]*?) +(\d+)\r?\n", r)) for r in reports[1:]]
+    if len(counts[0]) != 10 or "Counters cleared" not in reports[1]:
+        return False, "Incomplete IOSTAT report", output
+    if int(counts[0]["Disk reads"]) == 0 or int(counts[0]["Console output"]) == 0:
+        return False, "Loading IOSTAT was not counted", output
+    if counts[0] != counts[1]:
+        return False, "Counters not cleared between runs", output
+
+    return True, "I/O statistics counted and cleared", output
+
+
+def test_defrag(tester: CpmTester):
+    """Test that the OS reads and writes a disk rewritten by tools/defrag.py"""
+    disk_path = tester.disks_dir / "drivea.dsk"
+    lines = [f"Fragment line {i:03d}" for i in range(400)]
+    try:
+        # FRAG.TXT fills the holes left by erasing every other GAPnn.TMP
+        disk = cpmfs.CpmDisk.open(disk_path)
+        for i in range(12):
+            disk.write_file(f"GAP{i:02d}.TMP", bytes(1024))
+        for i in range(0, 12, 2):
+            disk.erase(f"GAP{i:02d}.TMP")
+        disk.write_file("FRAG.TXT", cpmfs.text_to_cpm("\n".join(lines) + "\n"))
+        for i in range(1, 12, 2):
+            disk.erase(f"GAP{i:02d}.TMP")
+        # SPARSE.DAT has a hole: its second block is unallocated, as a
+        # random write past the end of a file leaves it
+        block_bytes = disk.params.block_size
+        disk.write_file("SPARSE.DAT", b"".join(bytes([n]) * block_bytes for n in (1, 2, 3)))
+        sparse = next(disk.entry(i) for i in range(disk.params.drm + 1)
+                      if cpmfs.join_name(disk.entry(i)[1:12]) == "SPARSE.DAT")
+        sparse[17] = 0
+        expected = bytes([1]) * block_bytes + bytes(block_bytes) + bytes([3]) * block_bytes
+        if disk.read_file("SPARSE.DAT") != expected:
+            return False, "Sparse file misread before defragmenting", ""
+        before = defrag.fragmentation(disk)
+        defrag.defragment(disk, ("FRAG.TXT",))
+        after = defrag.fragmentation(disk)
+        if disk.read_file("SPARSE.DAT") != expected:
+            return False, "Sparse file misread after defragmenting", ""
+        disk.save()
+    except (cpmfs.CpmError, OSError) as e:
+        return False, f"Failed to defragment: {e}", ""
+
+    if before.fragments == before.files:
+        return False, f"Disk was not fragmented: {before}", ""
+    if after.fragments != after.files or after.seeks or after.split_files:
+        return False, f"Still fragmented: {after}", ""
+    if cpmfs.join_name(disk.entry(0)[1:12]) != "FRAG.TXT":
+        return False, "Hot file is not the first directory entry", ""
+
+    # Read the moved file, then write and read through the rebuilt ALV
+    success, output = tester.run_cpmsim(["TYPE FRAG.TXT"], timeout=10)
+    if not success:
+        return False, output, output
+
+    if "Fragment line 399" not in output:
+        return False, "Defragmented file not typed to the end", output
+
+    success, output = tester.run_cpmsim(["TSEQIO"], timeout=20, until=RESULT_PATTERN)
+    if not success:
+        return False, output, output
+
+    if "PASS" in output:
+        return True, f"Defragmented ({before.fragments} to {after.fragments} fragments)", output
+
+    return False, "Sequential I/O failed on the defragmented disk", output
+
+
+def test_login(tester: CpmTester):
+    """Benchmark drive re-login with a full directory rescan (F13, F14)"""
+    # BLOGIN forces LOGIN_PASSES ALV rebuilds. On pysim they are timed on a
+    # copy of the disk, as --bench does; other backends only check the result
+    if tester.backend != "pysim":
+        success, output = tester.run_cpmsim(["BLOGIN"], timeout=20, until=RESULT_PATTERN)
+        if not success:
+            return False, output, output
+        if "PASS" in output:
+            return True, "Login benchmark passed", output
+        return False, "Login benchmark failed", output
+
+    bench = CpmTester(verbose=tester.verbose, sim_dir=BENCH_DIR / "login", reuse=False)
+    bench.set_hle(tester.hle)
+    result = bench.run_benchmark((tester.disks_dir / "drivea.dsk").read_bytes(),
+                                 None, "BLOGIN", "PASS")
+    if not result["ok"]:
+        return False, f"Login benchmark failed: {result.get('reason', 'no PASS')}", ""
+
+    message = (f"{result['cycles'] // LOGIN_PASSES} cycles, "
+               f"{result['instructions'] // LOGIN_PASSES} instructions per login")
+    tester.log(message)
+    return True, message, ""
+
+
+def test_hle(tester: CpmTester):
+    """Test that the pysim HLE BIOS gives the same results as the BIOS code"""
+    hle = pysim.bios_symbols(BUILD_DIR)
+    if hle is None:
+        return False, "bios.lst lacks the HLE symbols", ""
+
+    commands = ["DIR", "TSEQIO", "TRANDOM", "TALLOC", "TCONSTR", "IOSTAT"]
+    differences = pysim.cross_check(tester.disks_dir, "\n".join(commands).encode() + b"\n",
+                                    hle, timeout=60)
+    if differences:
+        return False, "HLE differs: " + "; ".join(differences), "\n".join(differences)
+
+    return True, "HLE matches full emulation", ""
+
+
+def test_profile(tester: CpmTester):
+    """Test that the symbol profiler accounts for every cycle of a run"""
+    symbols = symprof.Symbols(BUILD_DIR)
+    symbols.add_program(PROJECT_ROOT / "tests" / "programs" / "tversion.lst",
+                        PROJECT_ROOT / "tests" / "programs" / "tversion.asm")
+    prof, output, reason = symprof.profile_commands(tester.disks_dir, ["TVERSION"],
+                                                    symbols, timeout=30)
+    if reason != "idle" or "PASS" not in output:
+        return False, f"TVERSION did not pass under the profiler ({reason})", output
+
+    # Exclusive cycles and collapsed stacks both split the whole run
+    if sum(prof.exclusive.values()) != prof.cycles or sum(prof.collapsed.values()) != prof.cycles:
+        return False, "Profile does not add up to the cycles run", prof.report()
+    version = prof.functions.get(12)
+    if not version or version[0] != "FUNC12" or not 0 < version[2] < prof.inclusive["BDOS"]:
+        return False, "F12 not profiled through FTABLE", prof.report()
+    if prof.inclusive["BDOS"] > prof.cycles or not prof.exclusive["CONOUT"]:
+        return False, "Inclusive cycles out of range", prof.report()
+
+    return True, f"{prof.cycles} cycles over {len(prof.exclusive)} routines", prof.report()
+
+
+def test_fdctrace(tester: CpmTester):
+    """Test the FDC trace of a TRACE BIOS against the BIOS calls it records"""
+    # Assemble the system with a copy of the BIOS that defines TRACE
+    TRACE_DIR.mkdir(parents=True, exist_ok=True)
+    bios_src = TRACE_DIR / "bios.asm"
+    bios_src.write_text("TRACE   EQU     1\n" + (SRC_DIR / "bios.asm").read_text())
+    msize = layout.read(BUILD_DIR).msize
+    try:
+        if tester.assemble_system(TRACE_DIR, msize, {}, {"bios": bios_src}) is None:
+            return False, "TRACE system did not assemble", ""
+    except layout.LayoutError as e:
+        return False, f"TRACE system does not fit: {e}", ""
+    system_dsk = TRACE_DIR / "system.dsk"
+    result = subprocess.run(
+        [sys.executable, str(TOOLS_DIR / "mkdisk.py"), str(system_dsk),
+         *(str(TRACE_DIR / f"{name}.cim") for name in ("boot", "ccp", "bdos", "bios"))],
+        capture_output=True, text=True, cwd=PROJECT_ROOT)
+    if result.returncode != 0:
+        return False, "TRACE system image failed", result.stdout + result.stderr
+
+    # Boot the test disks with the traced system tracks
+    disks = TRACE_DIR / "disks"
+    if disks.exists():
+        shutil.rmtree(disks)
+    shutil.copytree(tester.disks_dir, disks)
+    system_size = mkdisk.RESERVED_SECTORS * mkdisk.SECTOR_SIZE
+    image = bytearray((disks / "drivea.dsk").read_bytes())
+    image[:system_size] = system_dsk.read_bytes()[:system_size]
+    (disks / "drivea.dsk").write_bytes(image)
+
+    machine = pysim.Machine(disks, b"TSEQIO\n")
+    machine.bios_base = layout.read(TRACE_DIR).bios
+    if not machine.boot():
+        return False, "TRACE disk did not boot", ""
+    reason = machine.run_until_idle(timeout=60)
+    machine.flush()
+    output = machine.output()
+    if reason != "idle" or "PASS" not in output:
+        return False, f"TSEQIO did not pass on the TRACE system ({reason})", output
+
+    # One record per call, with XLAT's sectors
+    try:
+        records = fdctrace.decode(bytes(machine.punch_out))
+    except fdctrace.TraceError as e:
+        return False, f"Bad trace: {e}", output
+    stats = fdctrace.analyze(records, skews=(1, 6))
+    calls = dict(zip(pysim.BIOS_ENTRIES, machine.bios_calls))
+    expected = (calls["read"], calls["write"], calls["seldsk"], calls["settrk"] + calls["home"])
+    counted = (stats.reads, stats.writes, stats.selects, stats.track_sets)
+    if counted != expected:
+        return False, f"Trace counts {counted}, BIOS calls {expected}", stats.report()
+    xlat = fdctrace.skew_table(6, 26)
+    if any(r.physical != xlat[r.logical] for r in records if r.op <= fdctrace.WRITE and r.drive == 0):
+        return False, "Trace sectors do not match XLAT", stats.report()
+    if stats.rotation != stats.skews[6] or \
+            stats.skews[6].efficiency <= stats.skews[1].efficiency:
+        return False, "Skew 6 rotation not as recorded or not better than no skew", stats.report()
+
+    # The HLE BIOS traces the same calls
+    differences = pysim.cross_check(disks, b"TSEQIO\n", pysim.bios_symbols(TRACE_DIR), timeout=60)
+    if differences:
+        return False, "HLE trace differs: " + "; ".join(differences), stats.report()
+
+    return True, (f"{len(records)} records, {stats.track_changes} seeks, "
+                  f"{stats.redundant_reads} redundant reads"), stats.report()
+
+
 # =============================================================================
 # Main
 # =============================================================================
 
+# All tests in run order: (name, function)
+ALL_TESTS = [
+    ("boot", test_boot),
+    ("dir", test_dir_command),
+    ("type", test_type_command),
+    ("era", test_era_command),
+    ("ren", test_ren_command),
+    ("hello", test_hello_program),
+    ("wboot", test_wboot),
+    ("save", test_save_command),
+    ("fileio", test_fileio),
+    ("bigfile", test_bigfile),
+    # BDOS unit tests
+    ("version", test_version),
+    ("disk_mgmt", test_disk_mgmt),
+    ("search", test_search),
+    ("user", test_user),
+    ("random", test_random),
+    ("attrib", test_attrib),
+    ("iobyte", test_iobyte),
+    ("conch", test_conch),
+    ("constr", test_constr),
+    ("rawio", test_rawio),
+    ("auxlst", test_auxlst),
+    ("open", test_open),
+    ("delete", test_delete),
+    ("seqio", test_seqio),
+    ("make", test_make),
+    ("rename", test_rename),
+    ("dma", test_dma),
+    ("alloc", test_alloc),
+    ("hdisk", test_hdisk),
+    ("iostat", test_iostat),
+    ("defrag", test_defrag),
+    # Benchmarks
+    ("login", test_login),
+    # pysim
+    ("hle", test_hle),
+    ("profile", test_profile),
+    ("fdctrace", test_fdctrace),
+]
+
+# Tests that drive pysim directly, skipped on other backends
+PYSIM_TESTS = {"hle", "profile", "fdctrace"}
+
+
+# =============================================================================
+# Benchmarks
+# =============================================================================
+
+def bench_fill_directory(disk: cpmfs.CpmDisk):
+    """Fill the rest of the directory with one-record files"""
+    for n in range(disk.params.drm + 1):
+        try:
+            disk.write_file(f"FILL{n:04d}.TXT", cpmfs.text_to_cpm(f"File {n}\n"))
+        except cpmfs.CpmError:
+            return
+
+
+def bench_text_file(disk: cpmfs.CpmDisk):
+    """A 48K text file for TYPE (1024 lines of 48 bytes)"""
+    text = "".join(f"{n:05d} The quick brown fox jumps over the lazy dog\n"
+                   for n in range(1024))
+    disk.write_file("BENCH.TXT", cpmfs.text_to_cpm(text))
+
+
+def bench_big_program(disk: cpmfs.CpmDisk):
+    """A 40K program whose code is at its end, so all of it must load"""
+    message = b"Loaded 40K$"
+    code_at = 0x100 + 40 * 1024 - 9 - len(message)
+    code = bytes([0x11, (code_at + 9) & 0xFF, (code_at + 9) >> 8,  # LXI D,msg
+                  0x0E, 0x09,                                      # MVI C,9
+                  0xCD, 0x05, 0x00,                                # CALL 5
+                  0xC9])                                           # RET
+    image = bytearray(code_at - 0x100)
+    image[0:3] = bytes([0xC3, code_at & 0xFF, code_at >> 8])     # JMP code
+    disk.write_file("BLOAD.COM", bytes(image) + code + message)
+
+
+# (name, disk setup, command, text the output must contain)
+BENCHMARKS = [
+    ("seqio", None, "BSEQIO", "PASS"),
+    ("random", None, "BRANDOM", "PASS"),
+    ("dirfill", None, "BDIRFUL", "PASS"),
+    ("dirlist", bench_fill_directory, "DIR", "FILL0000"),
+    ("type", bench_text_file, "TYPE BENCH.TXT", "01023 The quick"),
+    ("load", bench_big_program, "BLOAD", "Loaded 40K"),
+    ("login", None, "BLOGIN", "PASS"),
+]
+
+# Counters shown in the --bench table (all of them go to the JSON file)
+BENCH_COLUMNS = ["wall", "cycles", "seldsk", "read", "write"]
+
+
+def run_benchmarks(tester: CpmTester, names: Optional[list[str]], out: str,
+                   baseline: Optional[str]) -> bool:
+    """
+    Run BENCHMARKS on a disk holding only BENCH_PROGRAMS and write the
+    results as JSON to out.
+
+    With a baseline (JSON from an earlier run), each counter is also shown
+    as a change from it.
+
+    Returns:
+        True if every benchmark produced its expected output
+    """
+    lay = layout.read(BUILD_DIR)
+    if lay is None:
+        print(f"ERROR: {BUILD_DIR / layout.INCLUDE_NAME} not found (build first)")
+        return False
+    if not tester.deploy_disk(BENCH_PROGRAMS):
+        return False
+    image = (tester.disks_dir / "drivea.dsk").read_bytes()
+    base = json.loads(Path(baseline).read_text())["benchmarks"] if baseline else {}
+
+    results = {}
+    print(f"{'benchmark':<10}" + "".join(f"{col:>16}" for col in BENCH_COLUMNS))
+    for name, setup, command, expected in BENCHMARKS:
+        if names and name not in names:
+            continue
+        result = tester.run_benchmark(image, setup, command, expected)
+        results[name] = result
+        cells = []
+        for col in BENCH_COLUMNS:
+            cell = f"{result.get(col, 0)}"
+            old = base.get(name, {}).get(col)
+            if old:
+                cell += f" {(result.get(col, 0) - old) * 100 / old:+.0f}%"
+            cells.append(f"{cell:>16}")
+        print(f"{name:<10}" + "".join(cells) + ("" if result["ok"] else "  FAIL"))
+
+    report = {"msize": lay.msize, "ccp": lay.ccp, "bdos": lay.bdos, "bios": lay.bios,
+              "benchmarks": results}
+    Path(out).write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Wrote {out}")
+    return all(r["ok"] for r in results.values())
+
+
 def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="CP/M Test Harness")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
     parser.add_argument("--no-build", action="store_true", help="Skip build step")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Ignore the build cache and reassemble everything")
     parser.add_argument("--test", type=str, help="Run specific test only")
+    parser.add_argument("--backend", choices=["pysim", "cpmsim"], default="pysim",
+                        help="Machine to run tests on (default: in-process pysim)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Run tests in N parallel workers, each with its own disk image")
+    parser.add_argument("--msize", type=int, default=layout.MSIZE,
+                        help=f"Build for an MSIZE K system (default {layout.MSIZE})")
+    parser.add_argument("--cold", action="store_true",
+                        help="Cold boot pysim for every run instead of starting from a boot snapshot")
+    parser.add_argument("--hle", action="store_true",
+                        help="Run the console and disk BIOS entries in Python on pysim")
+    parser.add_argument("--bench", nargs="*", metavar="NAME",
+                        help="Run the benchmarks (all, or those named) instead of the tests")
+    parser.add_argument("--bench-out", default=str(BENCH_OUT),
+                        help="Benchmark JSON output file (default build/bench.json)")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="Benchmark JSON from an earlier run to compare against")
     args = parser.parse_args()
 
-    tester = CpmTester(verbose=args.verbose)
+    if args.bench is not None:
+        if args.backend != "pysim":
+            print("Benchmarks run on the pysim backend only")
+            sys.exit(1)
+        unknown = set(args.bench) - {name for name, _, _, _ in BENCHMARKS}
+        if unknown:
+            print(f"Unknown benchmark: {', '.join(sorted(unknown))}")
+            sys.exit(1)
+
+    tester = CpmTester(verbose=args.verbose, backend=args.backend, reuse=not args.cold)
 
     # Build system
     if not args.no_build:
-        if not tester.build():
+        if not tester.build(rebuild=args.rebuild, msize=args.msize):
             print("Build failed!")
             sys.exit(1)
 
+    hle = None
+    if args.hle:
+        hle = pysim.bios_symbols(BUILD_DIR)
+        if hle is None:
+            print(f"ERROR: {BUILD_DIR / 'bios.lst'} not found or lacks the HLE symbols")
+            sys.exit(1)
+        tester.set_hle(hle)
+
+    if args.bench is not None:
+        print()
+        print("Running benchmarks...")
+        print()
+        bench_tester = CpmTester(verbose=args.verbose, sim_dir=BENCH_DIR)
+        bench_tester.set_hle(hle)
+        ok = run_benchmarks(bench_tester, args.bench, args.bench_out, args.baseline)
+        sys.exit(0 if ok else 1)
+
     # Deploy disk
     if not tester.deploy_disk():
         print("Deploy failed!")
@@ -846,36 +1704,7 @@ def main():
     print()
 
     # Define all tests
-    all_tests = [
-        ("boot", lambda: test_boot(tester)),
-        ("dir", lambda: test_dir_command(tester)),
-        ("type", lambda: test_type_command(tester)),
-        ("era", lambda: test_era_command(tester)),
-        ("ren", lambda: test_ren_command(tester)),
-        ("hello", lambda: test_hello_program(tester)),
-        ("save", lambda: test_save_command(tester)),
-        ("fileio", lambda: test_fileio(tester)),
-        ("bigfile", lambda: test_bigfile(tester)),
-        # BDOS unit tests
-        ("version", lambda: test_version(tester)),
-        ("disk_mgmt", lambda: test_disk_mgmt(tester)),
-        ("search", lambda: test_search(tester)),
-        ("user", lambda: test_user(tester)),
-        ("random", lambda: test_random(tester)),
-        ("attrib", lambda: test_attrib(tester)),
-        ("iobyte", lambda: test_iobyte(tester)),
-        ("conch", lambda: test_conch(tester)),
-        ("constr", lambda: test_constr(tester)),
-        ("rawio", lambda: test_rawio(tester)),
-        ("auxlst", lambda: test_auxlst(tester)),
-        ("open", lambda: test_open(tester)),
-        ("delete", lambda: test_delete(tester)),
-        ("seqio", lambda: test_seqio(tester)),
-        ("make", lambda: test_make(tester)),
-        ("rename", lambda: test_rename(tester)),
-        ("dma", lambda: test_dma(tester)),
-        ("alloc", lambda: test_alloc(tester)),
-    ]
+    all_tests = ALL_TESTS
 
     # Filter tests if specific test requested
     if args.test:
@@ -884,9 +1713,19 @@ def main():
             print(f"Unknown test: {args.test}")
             sys.exit(1)
 
+    if args.backend != "pysim":
+        skipped = [n for n, _ in all_tests if n in PYSIM_TESTS]
+        if skipped:
+            print(f"Skipping pysim-only tests: {', '.join(skipped)}")
+            print()
+            all_tests = [(n, f) for n, f in all_tests if n not in PYSIM_TESTS]
+
     # Run tests
-    for name, test_func in all_tests:
-        tester.run_test(name, test_func)
+    if args.jobs > 1:
+        tester.run_parallel(all_tests, args.jobs)
+    else:
+        for name, test_func in all_tests:
+            tester.run_test(name, test_func)
 
     # Summary
     if tester.print_summary():
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+CP/M 2.2 filesystem access for LOLOS disk images.
+
+Opens a disk image into memory once, applies any number of file operations
+(create, read, erase, rename) and writes the image back in a single write.
+Replaces per-file cpmcp/cpmtools invocations in the test harness.
+
+The default disk parameters match DPB0 and XLAT in src/bios.asm
+(8" SSSD, IBM 3740 layout). Images the size of the z80pack 4MB hard disk
+are opened with DPBHD instead (16-bit block pointers).
+
+Usage:
+    python3 tools/cpmfs.py drivea.dsk ls
+    python3 tools/cpmfs.py drivei.dsk ls
+    python3 tools/cpmfs.py drivea.dsk put hello.com HELLO.COM [user]
+    python3 tools/cpmfs.py drivea.dsk get HELLO.COM hello.com [user]
+    python3 tools/cpmfs.py drivea.dsk rm HELLO.COM [user]
+    python3 tools/cpmfs.py drivea.dsk ren OLD.TXT NEW.TXT [user]
+"""
+
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+SECTOR_SIZE = 128
+DIR_ENTRY_SIZE = 32
+RECORDS_PER_EXTENT = 128        # 16K logical extent
+EMPTY = 0xE5                    # Deleted/unused directory entry
+EOF_MARK = 0x1A                 # Ctrl-Z, pads the last record
+
+
+class CpmError(Exception):
+    """Filesystem error (file not found, disk full, directory full, ...)"""
+
+
+@dataclass(frozen=True)
+class DiskParams:
+    """Disk geometry and CP/M disk parameter block fields"""
+    spt: int                    # Sectors per track
+    bsh: int                    # Block shift (block = 128 << BSH)
+    exm: int                    # Extent mask
+    dsm: int                    # Highest block number
+    drm: int                    # Highest directory entry number
+    off: int                    # Reserved tracks
+    tracks: int                 # Tracks on the image
+    skew: Optional[tuple] = None    # 1-based physical sector per logical sector
+
+    @property
+    def block_size(self) -> int:
+        return SECTOR_SIZE << self.bsh
+
+    @property
+    def records_per_block(self) -> int:
+        return 1 << self.bsh
+
+    @property
+    def wide_blocks(self) -> bool:
+        """Block pointers are 16-bit when DSM > 255"""
+        return self.dsm > 255
+
+    @property
+    def pointers_per_entry(self) -> int:
+        return 8 if self.wide_blocks else 16
+
+    @property
+    def dir_blocks(self) -> int:
+        """Blocks reserved for the directory (AL0/AL1)"""
+        return ((self.drm + 1) * DIR_ENTRY_SIZE + self.block_size - 1) // self.block_size
+
+    @property
+    def records_per_entry(self) -> int:
+        return min((self.exm + 1) * RECORDS_PER_EXTENT,
+                   self.pointers_per_entry * self.records_per_block)
+
+    @property
+    def image_size(self) -> int:
+        return self.tracks * self.spt * SECTOR_SIZE
+
+
+# Sector translation table (XLAT in src/bios.asm, skew factor 6)
+XLAT = (1, 7, 13, 19, 25, 5, 11, 17, 23, 3, 9, 15, 21,
+        2, 8, 14, 20, 26, 6, 12, 18, 24, 4, 10, 16, 22)
+
+# 8" SSSD - DPB0 in src/bios.asm
+IBM_3740 = DiskParams(spt=26, bsh=3, exm=0, dsm=242, drm=63, off=2,
+                      tracks=77, skew=XLAT)
+
+# z80pack 4MB hard disk (drives I: and J:) - DPBHD in src/bios.asm
+Z80PACK_HD = DiskParams(spt=128, bsh=4, exm=0, dsm=2039, drm=1023, off=0,
+                        tracks=255)
+
+
+def params_for_size(size: int) -> DiskParams:
+    """Pick disk parameters from an image's size (3740 unless it is a hard disk)."""
+    return Z80PACK_HD if size == Z80PACK_HD.image_size else IBM_3740
+
+
+def split_name(name: str) -> bytes:
+    """Convert "NAME.EXT" to the 11-byte space-padded FCB form."""
+    base, _, ext = name.upper().partition(".")
+    if not base or len(base) > 8 or len(ext) > 3:
+        raise CpmError(f"Invalid CP/M filename: {name}")
+    return (base.ljust(8) + ext.ljust(3)).encode("ascii")
+
+
+def join_name(raw: bytes) -> str:
+    """Convert an 11-byte FCB name (attribute bits ignored) to "NAME.EXT"."""
+    base = bytes(b & 0x7F for b in raw[0:8]).decode("ascii").rstrip()
+    ext = bytes(b & 0x7F for b in raw[8:11]).decode("ascii").rstrip()
+    return f"{base}.{ext}" if ext else base
+
+
+class CpmDisk:
+    """In-memory CP/M 2.2 disk image"""
+
+    def __init__(self, image: bytes, params: DiskParams = IBM_3740):
+        self.params = params
+        self.image = bytearray(image)
+        if len(self.image) < params.image_size:
+            self.image += bytes([EMPTY]) * (params.image_size - len(self.image))
+        self.path: Optional[Path] = None
+        self.directory = bytearray()
+        for record in range(self._dir_records()):
+            self.directory += self.read_record(record)
+
+    @classmethod
+    def open(cls, path, params: Optional[DiskParams] = None) -> "CpmDisk":
+        """Load a disk image file (parameters chosen by size if not given)."""
+        image = Path(path).read_bytes()
+        disk = cls(image, params or params_for_size(len(image)))
+        disk.path = Path(path)
+        return disk
+
+    def save(self, path=None):
+        """Write the directory back into the image and the image to a file."""
+        for record in range(self._dir_records()):
+            start = record * SECTOR_SIZE
+            self.write_record(record, self.directory[start:start + SECTOR_SIZE])
+        path = Path(path) if path is not None else self.path
+        path.write_bytes(self.image)
+
+    # --- Sector and block access ---------------------------------------------
+
+    def _dir_records(self) -> int:
+        return (self.params.drm + 1) * DIR_ENTRY_SIZE // SECTOR_SIZE
+
+    def _record_offset(self, record: int) -> int:
+        """Image offset of a logical record counted from the first data track."""
+        p = self.params
+        track = p.off + record // p.spt
+        sector = record % p.spt
+        physical = p.skew[sector] if p.skew else sector + 1
+        return (track * p.spt + physical - 1) * SECTOR_SIZE
+
+    def read_record(self, record: int) -> bytes:
+        """Return a logical record counted from the first data track."""
+        pos = self._record_offset(record)
+        return bytes(self.image[pos:pos + SECTOR_SIZE])
+
+    def write_record(self, record: int, data: bytes):
+        """Overwrite a logical record counted from the first data track."""
+        pos = self._record_offset(record)
+        self.image[pos:pos + SECTOR_SIZE] = data
+
+    # --- Directory -----------------------------------------------------------
+
+    def entry(self, index: int) -> memoryview:
+        """Directory entry index, as a writable view of the directory."""
+        start = index * DIR_ENTRY_SIZE
+        return memoryview(self.directory)[start:start + DIR_ENTRY_SIZE]
+
+    def entry_pointers(self, entry) -> list[int]:
+        """All block pointers of a directory entry, zeros (holes) included."""
+        if self.params.wide_blocks:
+            return [entry[16 + i] | (entry[17 + i] << 8) for i in range(0, 16, 2)]
+        return list(entry[16:32])
+
+    def entry_blocks(self, entry) -> list[int]:
+        """Non-zero block pointers of a directory entry."""
+        return [b for b in self.entry_pointers(entry) if b]
+
+    def _matching(self, name: str, user: int) -> list[int]:
+        """Directory indexes of all extents of a file."""
+        raw = split_name(name)
+        found = []
+        for index in range(self.params.drm + 1):
+            entry = self.entry(index)
+            if entry[0] == user and bytes(b & 0x7F for b in entry[1:12]) == raw:
+                found.append(index)
+        return found
+
+    def extent_number(self, entry) -> int:
+        """Logical extent number of a directory entry (S2 * 32 + EX)."""
+        return (entry[14] << 5) | (entry[12] & 0x1F)
+
+    def used_blocks(self) -> set[int]:
+        """Blocks taken by the directory and by all files."""
+        used = set(range(self.params.dir_blocks))
+        for index in range(self.params.drm + 1):
+            entry = self.entry(index)
+            if entry[0] < 32:
+                used.update(self.entry_blocks(entry))
+        return used
+
+    def free_blocks(self) -> int:
+        return self.params.dsm + 1 - len(self.used_blocks())
+
+    def list(self, user: Optional[int] = None) -> list[tuple[int, str]]:
+        """Return (user, name) for every file, optionally for one user only."""
+        files = []
+        for index in range(self.params.drm + 1):
+            entry = self.entry(index)
+            if entry[0] >= 32 or (user is not None and entry[0] != user):
+                continue
+            key = (entry[0], join_name(entry[1:12]))
+            if key not in files:
+                files.append(key)
+        return sorted(files)
+
+    def exists(self, name: str, user: int = 0) -> bool:
+        return bool(self._matching(name, user))
+
+    # --- File operations -----------------------------------------------------
+
+    def read_file(self, name: str, user: int = 0) -> bytes:
+        """Return a file's contents (whole records, ^Z padding included; holes read as zeros)."""
+        extents = self._matching(name, user)
+        if not extents:
+            raise CpmError(f"File not found: {user}:{name}")
+        p = self.params
+        data = bytearray()
+        for index in sorted(extents, key=lambda i: self.extent_number(self.entry(i))):
+            entry = self.entry(index)
+            ext = self.extent_number(entry)
+            base = (ext & ~p.exm) * RECORDS_PER_EXTENT
+            count = (ext & p.exm) * RECORDS_PER_EXTENT + entry[15]
+            if len(data) < (base + count) * SECTOR_SIZE:
+                data += bytes((base + count) * SECTOR_SIZE - len(data))
+            pointers = self.entry_pointers(entry)
+            for i in range(count):
+                block = pointers[i // p.records_per_block]
+                if not block:
+                    continue            # Hole left by a random write: zeros
+                record = block * p.records_per_block + i % p.records_per_block
+                pos = (base + i) * SECTOR_SIZE
+                data[pos:pos + SECTOR_SIZE] = self.read_record(record)
+        return bytes(data)
+
+    def write_file(self, name: str, data: bytes, user: int = 0):
+        """Create a file, replacing any existing file of the same name."""
+        p = self.params
+        raw = split_name(name)
+        if self._matching(name, user):
+            self.erase(name, user)
+
+        if len(data) % SECTOR_SIZE:
+            data = data + bytes([EOF_MARK]) * (SECTOR_SIZE - len(data) % SECTOR_SIZE)
+        records = len(data) // SECTOR_SIZE
+
+        used = self.used_blocks()
+        free = (b for b in range(p.dsm + 1) if b not in used)
+        slots = (i for i in range(p.drm + 1) if self.entry(i)[0] == EMPTY)
+
+        start = 0
+        while True:
+            count = min(p.records_per_entry, records - start)
+            blocks = []
+            for i in range(0, count, p.records_per_block):
+                block = next(free, None)
+                if block is None:
+                    raise CpmError(f"Disk full writing {user}:{name}")
+                blocks.append(block)
+                for j in range(min(p.records_per_block, count - i)):
+                    pos = (start + i + j) * SECTOR_SIZE
+                    self.write_record(block * p.records_per_block + j,
+                                      data[pos:pos + SECTOR_SIZE])
+
+            index = next(slots, None)
+            if index is None:
+                raise CpmError(f"Directory full writing {user}:{name}")
+            # Extent number of the last logical extent held by this entry
+            ext = (start + max(count, 1) - 1) // RECORDS_PER_EXTENT
+            rc = start + count - ext * RECORDS_PER_EXTENT
+            entry = bytearray([user]) + raw + bytes([ext & 0x1F, 0, ext >> 5, rc])
+            if p.wide_blocks:
+                for block in blocks:
+                    entry += bytes([block & 0xFF, block >> 8])
+            else:
+                entry += bytes(blocks)
+            entry += bytes(DIR_ENTRY_SIZE - len(entry))
+            self.entry(index)[:] = entry
+
+            start += count
+            if start >= records:
+                break
+
+    def erase(self, name: str, user: int = 0):
+        """Delete all extents of a file."""
+        extents = self._matching(name, user)
+        if not extents:
+            raise CpmError(f"File not found: {user}:{name}")
+        for index in extents:
+            self.entry(index)[0] = EMPTY
+
+    def rename(self, old: str, new: str, user: int = 0):
+        """Rename a file, keeping its attribute bits."""
+        extents = self._matching(old, user)
+        if not extents:
+            raise CpmError(f"File not found: {user}:{old}")
+        if self._matching(new, user):
+            raise CpmError(f"File exists: {user}:{new}")
+        raw = split_name(new)
+        for index in extents:
+            entry = self.entry(index)
+            for i in range(11):
+                entry[1 + i] = raw[i] | (entry[1 + i] & 0x80)
+
+
+def text_to_cpm(content: str) -> bytes:
+    """Convert text to a CP/M text file: CRLF line ends, ^Z terminated."""
+    cpm_content = content.replace("\n", "\r\n")
+    if not cpm_content.endswith("\x1a"):
+        cpm_content += "\x1a"
+    return cpm_content.encode("latin-1")
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    image, command, args = sys.argv[1], sys.argv[2], sys.argv[3:]
+    try:
+        disk = CpmDisk.open(image)
+        if command == "ls":
+            for user, name in disk.list():
+                print(f"{user}:{name}")
+            print(f"{disk.free_blocks()} blocks free")
+        elif command == "put" and len(args) >= 2:
+            disk.write_file(args[1], Path(args[0]).read_bytes(),
+                            int(args[2]) if len(args) > 2 else 0)
+            disk.save()
+        elif command == "get" and len(args) >= 2:
+            Path(args[1]).write_bytes(
+                disk.read_file(args[0], int(args[2]) if len(args) > 2 else 0))
+        elif command == "rm" and len(args) >= 1:
+            disk.erase(args[0], int(args[1]) if len(args) > 1 else 0)
+            disk.save()
+        elif command == "ren" and len(args) >= 2:
+            disk.rename(args[0], args[1], int(args[2]) if len(args) > 2 else 0)
+            disk.save()
+        else:
+            print(__doc__.strip())
+            sys.exit(1)
+    except (CpmError, OSError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Defragment a LOLOS disk image.
+
+Rewrites the data area so every file's blocks are contiguous and in
+extent order, and compacts the directory so each file's extents are
+adjacent, in extent order, with no free entries between files. Files
+named with --hot are placed first, so they sit in the first directory
+sectors (found by the first sectors an open or search reads) and on the
+first data tracks. Other files keep the order they first appear in.
+
+Blocks are numbered in logical sector order, which cpmfs maps through
+XLAT, so consecutive blocks are the order a sequential read wants: a
+block's records are spread by the skew within its track, and the next
+block follows on the same or the next track. Entries are rewritten with
+their block pointers renumbered; names, attribute bits, user numbers,
+extent numbers and record counts are kept, and so are the holes in
+files written randomly. Free blocks are filled with E5h.
+
+Usage:
+    python3 tools/defrag.py drivea.dsk
+    python3 tools/defrag.py drivea.dsk --hot HELLO.COM "*.COM"
+    python3 tools/defrag.py drivea.dsk -o packed.dsk
+    python3 tools/defrag.py drivea.dsk --report
+"""
+
+import argparse
+import fnmatch
+import sys
+from dataclasses import dataclass
+
+import cpmfs
+from cpmfs import CpmDisk, CpmError, DIR_ENTRY_SIZE, EMPTY, SECTOR_SIZE
+
+
+@dataclass
+class Fragmentation:
+    """How scattered a disk's files and directory are"""
+    files: int = 0
+    extents: int = 0
+    fragments: int = 0          # Runs of consecutive blocks, over all files
+    seeks: int = 0              # Track moves other than 0 or +1 reading files in order
+    split_files: int = 0        # Files whose extents are not adjacent entries
+    last_entry: int = -1        # Highest used directory entry
+
+    def __str__(self) -> str:
+        return (f"{self.files} files, {self.extents} extents, "
+                f"{self.fragments} fragments, {self.seeks} seeks, "
+                f"{self.split_files} split in the directory, "
+                f"last entry {self.last_entry}")
+
+
+def _files(disk: CpmDisk) -> dict:
+    """Directory indexes of every file's extents, by (user, name), in extent order.
+
+    Files are in the order they first appear in the directory.
+    """
+    files = {}
+    for index in range(disk.params.drm + 1):
+        entry = disk.entry(index)
+        if entry[0] < 32:
+            key = (entry[0], bytes(b & 0x7F for b in entry[1:12]))
+            files.setdefault(key, []).append(index)
+    for extents in files.values():
+        extents.sort(key=lambda i: disk.extent_number(disk.entry(i)))
+    return files
+
+
+def _track(disk: CpmDisk, block: int) -> int:
+    """Track holding the first record of a block."""
+    p = disk.params
+    return p.off + block * p.records_per_block // p.spt
+
+
+def fragmentation(disk: CpmDisk) -> Fragmentation:
+    """Measure how far a disk is from what defragment() leaves."""
+    frag = Fragmentation()
+    for extents in _files(disk).values():
+        frag.files += 1
+        frag.extents += len(extents)
+        if extents != list(range(extents[0], extents[0] + len(extents))):
+            frag.split_files += 1
+        frag.last_entry = max(frag.last_entry, *extents)
+        blocks = [b for i in extents for b in disk.entry_blocks(disk.entry(i))]
+        for prev, block in zip([None] + blocks, blocks):
+            if prev is None or block != prev + 1:
+                frag.fragments += 1
+            if prev is not None and _track(disk, block) - _track(disk, prev) not in (0, 1):
+                frag.seeks += 1
+    return frag
+
+
+def defragment(disk: CpmDisk, hot: tuple = ()):
+    """
+    Rewrite a disk's data blocks and directory in file order.
+
+    hot lists names or wildcard patterns ("*.COM") of files to put first,
+    in that order; a file matching several patterns goes with the first.
+    Entries that are not files (user 32 and up, other than E5h) keep
+    their contents and go after the files.
+    """
+    p = disk.params
+    files = _files(disk)
+
+    def rank(key):
+        name = cpmfs.join_name(key[1])
+        for n, pattern in enumerate(hot):
+            if fnmatch.fnmatchcase(name, pattern.upper()):
+                return n
+        return len(hot)
+    order = sorted(files, key=rank)         # Stable: directory order within a rank
+
+    others = [bytes(disk.entry(i)) for i in range(p.drm + 1)
+              if 32 <= disk.entry(i)[0] != EMPTY]
+
+    # Renumber blocks in file order and copy their records
+    block_bytes = p.records_per_block * SECTOR_SIZE
+    old = {b: b"".join(disk.read_record(b * p.records_per_block + r)
+                       for r in range(p.records_per_block))
+           for b in disk.used_blocks() if b >= p.dir_blocks}
+    entries = []
+    moved = {}
+    next_block = p.dir_blocks
+    for key in order:
+        for index in files[key]:
+            entry = bytearray(disk.entry(index))
+            pointers = []
+            for block in disk.entry_pointers(entry):
+                if block and block not in moved:
+                    if block > p.dsm or block < p.dir_blocks:
+                        raise CpmError(f"Bad block {block} in {cpmfs.join_name(key[1])}")
+                    moved[block] = next_block
+                    next_block += 1
+                pointers.append(moved.get(block, 0))
+            if p.wide_blocks:
+                entry[16:32] = b"".join(bytes([b & 0xFF, b >> 8]) for b in pointers)
+            else:
+                entry[16:32] = bytes(pointers)
+            entries.append(bytes(entry))
+
+    source = {dst: src for src, dst in moved.items()}
+    for block in range(p.dir_blocks, p.dsm + 1):
+        data = old[source[block]] if block in source else bytes([EMPTY]) * block_bytes
+        for r in range(p.records_per_block):
+            disk.write_record(block * p.records_per_block + r,
+                              data[r * SECTOR_SIZE:(r + 1) * SECTOR_SIZE])
+
+    # Files first, then other entries, then free entries
+    entries += others
+    entries += [bytes([EMPTY]) * DIR_ENTRY_SIZE] * (p.drm + 1 - len(entries))
+    disk.directory[:] = b"".join(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Defragment a LOLOS disk image")
+    parser.add_argument("image", help="Disk image (3740 or z80pack hard disk)")
+    parser.add_argument("--hot", nargs="+", default=[], metavar="NAME",
+                        help="Files to put first (wildcards allowed), in order")
+    parser.add_argument("-o", "--output", help="Write here instead of over the image")
+    parser.add_argument("--report", action="store_true",
+                        help="Only show the fragmentation, change nothing")
+    args = parser.parse_args()
+
+    try:
+        disk = CpmDisk.open(args.image)
+        before = fragmentation(disk)
+        print(f"Before: {before}")
+        if args.report:
+            return
+        defragment(disk, tuple(args.hot))
+        print(f"After:  {fragmentation(disk)}")
+        disk.save(args.output)
+    except (CpmError, OSError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
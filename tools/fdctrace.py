@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Decode and analyze the FDC access trace of a TRACE build of the BIOS.
+
+A BIOS assembled with TRACE EQU 1 sends a 5-byte record to the punch
+port (AUXDAT) from each SELDSK, SETTRK (and so HOME), READ and WRITE:
+
+    op, drive, track, logical sector, physical sector
+
+The low nibble of op is the entry (0 READ, 1 WRITE, 2 SELDSK, 3 SETTRK)
+and, for WRITE, the high nibble is the write type in C (0 normal,
+1 directory, 2 first block of a file). Each record holds the values
+after the call: SELDSK's record has the new drive and SETTRK's the new
+track; the sector fields are those given to the last SECTRAN and SETSEC.
+pysim saves the punch output with --punch; on cpmsim it goes to the
+auxiliary output file.
+
+The report covers:
+- Calls: reads, writes (directory writes), selects and track sets
+- Redundant reads: a READ of the sector the previous transfer read, and
+  repeat reads of a sector read before and not written since (what a
+  cache could have saved); the most read sectors
+- Seeks: transfers on a drive whose track differs from its last
+  transfer's, and the tracks moved
+- Rotation: for each transfer that follows one on the same drive and
+  track, the sector times until the wanted sector reaches the head. The
+  host needs --gap sector times between transfers (BDOS and program
+  work); a sector that comes round sooner is missed and costs a whole
+  revolution. This is worked out for the recorded physical sectors and
+  again for the logical sectors under other skew factors, so a skew can
+  be judged on the same access sequence.
+
+Usage:
+    printf 'TSEQIO\\n' | python3 tools/pysim.py --disks build/pysim/disks --punch build/fdc.trace
+    python3 tools/fdctrace.py build/fdc.trace
+    python3 tools/fdctrace.py build/fdc.trace --gap 3 --skew 1 3 6
+    python3 tools/fdctrace.py build/fdc.trace --list
+"""
+
+import argparse
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+
+from pysim import DISK_GEOMETRY
+
+RECORD_SIZE = 5
+
+# Ops, as TRREAD ... in bios.asm
+READ, WRITE, SELDSK, SETTRK = range(4)
+OP_NAMES = ("READ", "WRITE", "SELDSK", "SETTRK")
+
+# Sector times the host needs between two transfers (the 6-sector skew
+# of the 8" SSSD XLAT table allows 5)
+DEFAULT_GAP = 5
+
+
+class TraceError(Exception):
+    """Data that is not an FDC trace"""
+
+
+@dataclass(frozen=True)
+class Record:
+    """One trace record"""
+    op: int
+    drive: int
+    track: int
+    logical: int
+    physical: int
+    write_type: int = 0
+
+    def __str__(self) -> str:
+        name = OP_NAMES[self.op]
+        if self.op == SELDSK:
+            return f"{name:7} {chr(ord('A') + self.drive)}:"
+        if self.op == SETTRK:
+            return f"{name:7} {chr(ord('A') + self.drive)}: track {self.track}"
+        kind = f" type {self.write_type}" if self.op == WRITE else ""
+        return (f"{name:7} {chr(ord('A') + self.drive)}: track {self.track} "
+                f"sector {self.logical} -> {self.physical}{kind}")
+
+
+@dataclass
+class Rotation:
+    """Rotational cost of transfers that follow one on the same track"""
+    pairs: int = 0
+    wait: int = 0               # Sector times spent waiting for the sector
+    missed: int = 0             # Revolutions lost to a sector that came too soon
+    gap: int = DEFAULT_GAP
+
+    @property
+    def efficiency(self) -> float:
+        """Ideal waits over actual: 1.0 when each sector arrives just as the host is ready"""
+        if not self.pairs:
+            return 1.0
+        return self.pairs * (self.gap + 1) / (self.wait + self.pairs)
+
+    def add(self, previous: int, sector: int, spt: int):
+        """Count the wait from physical sector previous to sector."""
+        wait = (sector - previous - 1) % spt
+        if wait < self.gap:
+            wait += spt
+            self.missed += 1
+        self.pairs += 1
+        self.wait += wait
+
+    def __str__(self) -> str:
+        average = self.wait / self.pairs if self.pairs else 0.0
+        return (f"{self.pairs} same-track transfers, {average:.1f} sector times "
+                f"wait on average, {self.missed} missed revolutions, "
+                f"{self.efficiency * 100:.0f}% efficient")
+
+
+@dataclass
+class TraceStats:
+    """What a trace shows about the disk accesses of a session"""
+    reads: int = 0
+    writes: int = 0
+    dir_writes: int = 0
+    selects: int = 0
+    track_sets: int = 0
+    redundant_reads: int = 0    # Same sector as the previous transfer, which was a read
+    repeat_reads: int = 0       # Sector read before and not written since
+    track_changes: int = 0
+    seek_tracks: int = 0
+    longest_seek: int = 0
+    sector_reads: Counter = field(default_factory=Counter)
+    rotation: Rotation = field(default_factory=Rotation)
+    skews: dict = field(default_factory=dict)       # Skew factor -> Rotation
+
+    def report(self, top: int = 5) -> str:
+        """The statistics as text."""
+        lines = [
+            f"Reads:      {self.reads} ({self.redundant_reads} redundant, "
+            f"{self.repeat_reads} repeats of a sector read before)",
+            f"Writes:     {self.writes} ({self.dir_writes} directory)",
+            f"Calls:      {self.selects} SELDSK, {self.track_sets} SETTRK",
+            f"Seeks:      {self.track_changes} track changes, {self.seek_tracks} tracks moved"
+            f" (longest {self.longest_seek})",
+            f"Rotation:   {self.rotation} (gap {self.rotation.gap})",
+        ]
+        for skew, rotation in sorted(self.skews.items()):
+            lines.append(f"  skew {skew:<3} {rotation}")
+        if self.sector_reads and top:
+            lines.append("Most read sectors:")
+            for (drive, track, sector), count in self.sector_reads.most_common(top):
+                lines.append(f"  {chr(ord('A') + drive)}: track {track:3} "
+                             f"sector {sector:3}  {count} reads")
+        return "\n".join(lines)
+
+
+def decode(data: bytes) -> list[Record]:
+    """Split trace bytes into records."""
+    if len(data) % RECORD_SIZE:
+        raise TraceError(f"{len(data)} bytes is not a whole number of {RECORD_SIZE}-byte records")
+    records = []
+    for offset in range(0, len(data), RECORD_SIZE):
+        op, drive, track, logical, physical = data[offset:offset + RECORD_SIZE]
+        write_type = op >> 4
+        op &= 0x0F
+        if op >= len(OP_NAMES) or (write_type and op != WRITE) or write_type > 2:
+            raise TraceError(f"Bad op {data[offset]:02X}h at byte {offset}")
+        records.append(Record(op, drive, track, logical, physical, write_type))
+    return records
+
+
+def spt(drive: int) -> int:
+    """Sectors per track of a z80pack drive."""
+    return DISK_GEOMETRY.get(drive, DISK_GEOMETRY[0])[1]
+
+
+def skew_table(skew: int, sectors: int) -> list[int]:
+    """Physical sector (from 1) for each logical sector, as CP/M skew tables are built."""
+    table = []
+    used = set()
+    sector = 0
+    for _ in range(sectors):
+        while sector in used:
+            sector = (sector + 1) % sectors
+        used.add(sector)
+        table.append(sector + 1)
+        sector = (sector + skew) % sectors
+    return table
+
+
+def analyze(records: list[Record], gap: int = DEFAULT_GAP, skews: tuple = ()) -> TraceStats:
+    """Count the calls, redundant reads, seeks and rotational waits of a trace."""
+    stats = TraceStats(rotation=Rotation(gap=gap),
+                       skews={skew: Rotation(gap=gap) for skew in skews})
+    tables = {}
+    heads = {}                  # Drive -> track of its last transfer
+    cached = set()              # Sectors read and not written since
+    previous = None             # Last transfer
+    for record in records:
+        if record.op == SELDSK:
+            stats.selects += 1
+            continue
+        if record.op == SETTRK:
+            stats.track_sets += 1
+            continue
+
+        sector = (record.drive, record.track, record.physical)
+        if record.op == READ:
+            stats.reads += 1
+            stats.sector_reads[sector] += 1
+            if previous and previous.op == READ and \
+                    (previous.drive, previous.track, previous.physical) == sector:
+                stats.redundant_reads += 1
+            if sector in cached:
+                stats.repeat_reads += 1
+            cached.add(sector)
+        else:
+            stats.writes += 1
+            if record.write_type == 1:
+                stats.dir_writes += 1
+            cached.discard(sector)
+
+        head = heads.get(record.drive)
+        if head is not None and head != record.track:
+            stats.track_changes += 1
+            stats.seek_tracks += abs(record.track - head)
+            stats.longest_seek = max(stats.longest_seek, abs(record.track - head))
+        heads[record.drive] = record.track
+
+        if previous and previous.drive == record.drive and previous.track == record.track:
+            sectors = spt(record.drive)
+            stats.rotation.add(previous.physical, record.physical, sectors)
+            for skew, rotation in stats.skews.items():
+                table = tables.setdefault((skew, sectors), skew_table(skew, sectors))
+                if previous.logical < sectors and record.logical < sectors:
+                    rotation.add(table[previous.logical], table[record.logical], sectors)
+        previous = record
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a TRACE BIOS's FDC access trace")
+    parser.add_argument("trace", help="Punch output of a TRACE build (pysim --punch FILE)")
+    parser.add_argument("--gap", type=int, default=DEFAULT_GAP,
+                        help=f"Sector times the host needs between transfers (default {DEFAULT_GAP})")
+    parser.add_argument("--skew", type=int, nargs="+", default=[1, 2, 3, 4, 5, 6, 7, 8],
+                        help="Skew factors to compare (default 1-8)")
+    parser.add_argument("--top", type=int, default=5, help="Most read sectors to show")
+    parser.add_argument("--list", action="store_true", help="Print every record first")
+    args = parser.parse_args()
+
+    try:
+        with open(args.trace, "rb") as f:
+            records = decode(f.read())
+    except (TraceError, OSError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    if args.list:
+        for record in records:
+            print(record)
+        print()
+    print(analyze(records, args.gap, tuple(args.skew)).report(args.top))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+LOLOS memory layout - where the CCP, BDOS and BIOS are assembled.
+
+This is the one place the layout is defined. It writes build/layout.inc,
+which boot.asm, ccp.asm, bdos.asm and bios.asm INCLUDE (zmac -I build),
+and mkdisk.py reads the same file back to place the images on disk.
+
+The system is packed against the top of an MSIZE KB memory:
+- the BIOS starts on the highest page that still holds its code and data
+  (the jump table stays page aligned; programs patch L to reach an entry)
+- the BDOS ends where the BIOS starts
+- the CCP ends where the BDOS starts
+so the TPA gets every byte below the CCP. Module sizes are read from the
+listings of the last assembly (END_SYMBOLS). They do not depend on the
+load address, so assembling again at the packed addresses settles it.
+
+Build order (build.sh and run_tests.py do this):
+    python3 tools/layout.py             # from the last listings, or defaults
+    zmac ... ccp.asm bdos.asm bios.asm  # with -I build
+    python3 tools/layout.py             # pack against the new sizes
+    zmac ... boot.asm bios.asm bdos.asm ccp.asm
+    python3 tools/mkdisk.py
+
+Usage:
+    python3 tools/layout.py [--msize KB] [--build DIR]
+"""
+
+import argparse
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+MSIZE = 64                      # Default memory size in KB
+
+# System tracks: boot loader in track 0 sector 1, system image from sector 2
+SECTOR_SIZE = 128
+SECTORS_PER_TRACK = 26
+RESERVED_TRACKS = 2
+SYSTEM_SECTORS = RESERVED_TRACKS * SECTORS_PER_TRACK - 1   # 51
+
+# Last label of each module; its address is the end of the module's data
+END_SYMBOLS = {"ccp": "CCPSTK", "bdos": "BDOSSK", "bios": "BIOSEND"}
+
+# Sizes assumed before the first assembly (CCP 2K, BDOS 3.5K, BIOS 1.5K
+# of which the first 768 bytes are code)
+DEFAULT_SIZES = {"ccp": 0x0800, "bdos": 0x0E00, "bios": 0x0600}
+DEFAULT_BIOS_IMAGE = 0x0300
+
+INCLUDE_NAME = "layout.inc"
+
+# Symbol table entry in a zmac listing, e.g. "ccpstk          eb99"
+SYMBOL_RE = re.compile(r"([A-Za-z_?@.][\w?@.$]*)\s+[=+]?\s*([0-9a-fA-F]{4,5})\b")
+
+# EQU line in layout.inc (hex values end in H)
+EQU_RE = re.compile(r"^(\w+)\s+EQU\s+([0-9A-F]+H?)", re.MULTILINE)
+
+
+class LayoutError(Exception):
+    """The system does not fit in memory or on the system tracks"""
+
+
+@dataclass(frozen=True)
+class Layout:
+    """Load addresses of the system modules"""
+    msize: int
+    ccp: int
+    bdos: int
+    bios: int
+    syssecs: int                # Sectors the boot loader reads
+
+    def include_text(self) -> str:
+        return (
+            "; Generated by tools/layout.py - do not edit\n"
+            f"MSIZE   EQU     {self.msize:d}              ; Memory size in KB\n"
+            f"CCP     EQU     {self.ccp:05X}H          ; CCP base\n"
+            f"BDOS    EQU     {self.bdos:05X}H          ; BDOS base (serial, then entry)\n"
+            f"BIOS    EQU     {self.bios:05X}H          ; BIOS jump table\n"
+            f"SYSSECS EQU     {self.syssecs:d}              ; System image sectors from track 0, sector 2\n"
+        )
+
+
+def pack(msize: int, sizes: dict, bios_image: int) -> Layout:
+    """
+    Pack the modules against the top of memory.
+
+    sizes holds each module's length including its data (DS) area;
+    bios_image is the length of bios.cim, the part loaded from disk.
+    """
+    top = msize * 1024
+    bios = (top - sizes["bios"]) & ~0xFF
+    bdos = bios - sizes["bdos"]
+    ccp = bdos - sizes["ccp"]
+    image = bios + bios_image - ccp
+    syssecs = (image + SECTOR_SIZE - 1) // SECTOR_SIZE
+    if syssecs > SYSTEM_SECTORS:
+        raise LayoutError(f"System needs {syssecs} sectors, the system tracks hold {SYSTEM_SECTORS}")
+    if ccp < 0x0100 or ccp + syssecs * SECTOR_SIZE > 0x10000:
+        raise LayoutError(f"System does not fit in {msize}K (CCP at {ccp:04X}h)")
+    return Layout(msize, ccp, bdos, bios, syssecs)
+
+
+def lst_symbols(lst_file: Path) -> dict:
+    """Symbol values from the table at the end of a zmac listing (lower-case names)"""
+    text = lst_file.read_text(encoding="latin-1")
+    start = text.rfind("Symbol Table")
+    if start < 0:
+        return {}
+    return {name.lower(): int(value, 16)
+            for name, value in SYMBOL_RE.findall(text[start:])}
+
+
+def module_sizes(build_dir: Path) -> Optional[dict]:
+    """Module lengths from the last listings, or None if there are none yet"""
+    sizes = {}
+    for name, symbol in END_SYMBOLS.items():
+        lst_file = build_dir / f"{name}.lst"
+        if not lst_file.exists():
+            return None
+        symbols = lst_symbols(lst_file)
+        if symbol.lower() not in symbols or name not in symbols:
+            return None         # Listing from an older source
+        # A module assembled too high runs past FFFFh; its length still holds
+        sizes[name] = (symbols[symbol.lower()] - symbols[name]) & 0xFFFF
+    return sizes
+
+
+def read(build_dir: Path) -> Optional[Layout]:
+    """Layout from build_dir/layout.inc, or None if it has not been written"""
+    inc = build_dir / INCLUDE_NAME
+    if not inc.exists():
+        return None
+    values = {name: int(value[:-1], 16) if value.endswith("H") else int(value)
+              for name, value in EQU_RE.findall(inc.read_text())}
+    return Layout(values["MSIZE"], values["CCP"], values["BDOS"],
+                  values["BIOS"], values["SYSSECS"])
+
+
+def update(build_dir: Path, msize: int = MSIZE) -> bool:
+    """
+    Pack against the last assembly and write layout.inc if it changed.
+
+    Before the first assembly the default sizes are used; the next call
+    corrects them.
+
+    Returns:
+        True if layout.inc was (re)written, so the system must be assembled again
+    """
+    sizes = module_sizes(build_dir)
+    bios_cim = build_dir / "bios.cim"
+    if sizes is None or not bios_cim.exists():
+        sizes, bios_image = DEFAULT_SIZES, DEFAULT_BIOS_IMAGE
+    else:
+        bios_image = bios_cim.stat().st_size
+    new = pack(msize, sizes, bios_image)
+    if new == read(build_dir):
+        return False
+    build_dir.mkdir(parents=True, exist_ok=True)
+    (build_dir / INCLUDE_NAME).write_text(new.include_text())
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write build/layout.inc for an MSIZE K system")
+    parser.add_argument("--msize", type=int, default=MSIZE, help=f"Memory size in KB (default {MSIZE})")
+    parser.add_argument("--build", default=str(Path(__file__).resolve().parent.parent / "build"),
+                        help="Build directory holding the listings and layout.inc")
+    args = parser.parse_args()
+
+    build_dir = Path(args.build)
+    try:
+        changed = update(build_dir, args.msize)
+    except LayoutError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    layout = read(build_dir)
+    print(f"{'Wrote' if changed else 'Unchanged'} {build_dir / INCLUDE_NAME}: "
+          f"{layout.msize}K, CCP {layout.ccp:04X}h, BDOS {layout.bdos:04X}h, "
+          f"BIOS {layout.bios:04X}h, {layout.syssecs} system sectors, "
+          f"TPA {layout.ccp - 0x100} bytes")
+
+
+if __name__ == '__main__':
+    main()
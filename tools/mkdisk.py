@@ -2,10 +2,18 @@
 """
 Create a bootable LOLOS disk image for z80pack.
 Combines boot loader, CCP, BDOS, and BIOS into an 8" SSSD disk image.
+The load addresses come from build/layout.inc (see layout.py).
+
+With --hd, creates an empty z80pack 4MB hard disk image instead
+(drive I: or J:, 255 tracks of 128 sectors):
+    python3 tools/mkdisk.py --hd drivei.dsk
 """
 
 import sys
 import os
+from pathlib import Path
+
+import layout
 
 # Disk geometry (8" SSSD - IBM 3740)
 TRACKS = 77
@@ -13,10 +21,10 @@ SECTORS_PER_TRACK = 26
 SECTOR_SIZE = 128
 DISK_SIZE = TRACKS * SECTORS_PER_TRACK * SECTOR_SIZE  # 256,256 bytes
 
-# Memory layout (64K system)
-CCP_ADDR = 0xE400
-BDOS_ADDR = 0xEC00
-BIOS_ADDR = 0xFA00
+# z80pack 4MB hard disk (DPBHD in bios.asm)
+HD_TRACKS = 255
+HD_SECTORS_PER_TRACK = 128
+HD_DISK_SIZE = HD_TRACKS * HD_SECTORS_PER_TRACK * SECTOR_SIZE  # 4,177,920 bytes
 
 # Reserved tracks for system
 RESERVED_TRACKS = 2
@@ -29,10 +37,10 @@ def read_binary(filename, expected_org=0):
         return f.read()
 
 
-def create_system_image(boot_file, ccp_file, bdos_file, bios_file):
+def create_system_image(boot_file, ccp_file, bdos_file, bios_file, lay):
     """
     Create a combined system image.
-    The system image contains CCP, BDOS, and BIOS concatenated.
+    The system image contains CCP, BDOS, and BIOS at their lay addresses.
     """
     # Read all components
     boot = read_binary(boot_file)
@@ -41,15 +49,19 @@ def create_system_image(boot_file, ccp_file, bdos_file, bios_file):
     bios = read_binary(bios_file)
 
     print(f"Boot loader: {len(boot)} bytes")
-    print(f"CCP: {len(ccp)} bytes (at {CCP_ADDR:04X}h)")
-    print(f"BDOS: {len(bdos)} bytes (at {BDOS_ADDR:04X}h)")
-    print(f"BIOS: {len(bios)} bytes (at {BIOS_ADDR:04X}h)")
+    print(f"CCP: {len(ccp)} bytes (at {lay.ccp:04X}h)")
+    print(f"BDOS: {len(bdos)} bytes (at {lay.bdos:04X}h)")
+    print(f"BIOS: {len(bios)} bytes (at {lay.bios:04X}h)")
+
+    if lay.ccp + len(ccp) > lay.bdos or lay.bdos + len(bdos) > lay.bios:
+        raise layout.LayoutError("Images overlap; rebuild after tools/layout.py")
 
     # Create memory image from CCP to end of BIOS
-    # This needs to start at CCP_ADDR and include everything up to BIOS end
-    system_start = CCP_ADDR
-    system_end = BIOS_ADDR + len(bios)
+    system_start = lay.ccp
+    system_end = lay.bios + len(bios)
     system_size = system_end - system_start
+    if (system_size + SECTOR_SIZE - 1) // SECTOR_SIZE != lay.syssecs:
+        raise layout.LayoutError(f"Boot loader reads {lay.syssecs} sectors; rebuild after tools/layout.py")
 
     print(f"System spans {system_start:04X}h to {system_end:04X}h ({system_size} bytes)")
 
@@ -57,15 +69,15 @@ def create_system_image(boot_file, ccp_file, bdos_file, bios_file):
     system = bytearray(system_size)
 
     # Place CCP
-    ccp_offset = 0  # CCP_ADDR - CCP_ADDR
+    ccp_offset = 0
     system[ccp_offset:ccp_offset + len(ccp)] = ccp
 
     # Place BDOS
-    bdos_offset = BDOS_ADDR - CCP_ADDR
+    bdos_offset = lay.bdos - lay.ccp
     system[bdos_offset:bdos_offset + len(bdos)] = bdos
 
     # Place BIOS
-    bios_offset = BIOS_ADDR - CCP_ADDR
+    bios_offset = lay.bios - lay.ccp
     system[bios_offset:bios_offset + len(bios)] = bios
 
     return boot, bytes(system)
@@ -113,7 +125,22 @@ def create_disk_image(boot, system, output_file):
     print(f"Disk image written: {output_file} ({len(disk)} bytes)")
 
 
+def create_hd_image(output_file):
+    """
+    Create an empty z80pack hard disk image.
+    No reserved tracks, so the directory starts at track 0, sector 1.
+    """
+    with open(output_file, 'wb') as f:
+        f.write(bytes([0xE5] * HD_DISK_SIZE))
+
+    print(f"Hard disk image written: {output_file} ({HD_DISK_SIZE} bytes)")
+
+
 def main():
+    if len(sys.argv) == 3 and sys.argv[1] == '--hd':
+        create_hd_image(sys.argv[2])
+        return
+
     if len(sys.argv) < 2:
         # Use default paths
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -132,12 +159,18 @@ def main():
     print("Creating LOLOS disk image...")
     print()
 
+    # layout.inc sits with the images it was assembled into
+    lay = layout.read(Path(ccp_file).parent)
+    if lay is None:
+        print(f"Error: no {layout.INCLUDE_NAME} next to {ccp_file} (run tools/layout.py)")
+        sys.exit(1)
+
     try:
-        boot, system = create_system_image(boot_file, ccp_file, bdos_file, bios_file)
+        boot, system = create_system_image(boot_file, ccp_file, bdos_file, bios_file, lay)
         create_disk_image(boot, system, output_file)
         print()
         print("Done! Boot with z80pack: cpmsim")
-    except FileNotFoundError as e:
+    except (FileNotFoundError, layout.LayoutError) as e:
         print(f"Error: {e}")
         sys.exit(1)
 
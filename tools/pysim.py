@@ -0,0 +1,1226 @@
+#!/usr/bin/env python3
+"""
+In-process 8080 machine for running LOLOS without z80pack.
+
+Emulates the parts of z80pack's cpmsim that boot.asm and bios.asm use:
+- Console on ports 0 (status) and 1 (data)
+- Printer on ports 2 (status) and 3 (data)
+- Auxiliary reader/punch on port 5
+- FDC on ports 10-17 with DMA transfers to/from memory
+
+Disk images are read from a cpmsim-style disks/ directory (drivea.dsk,
+driveb.dsk, ...) and written back when the run finishes.
+
+Unlike cpmsim, a run ends as soon as the scripted console input is used up
+and the system is blocked waiting for more (normally the CCP at its prompt),
+so scripted sessions finish as fast as the emulated work allows.
+
+A machine's state can be saved as a Snapshot and restored into others;
+CpmSession uses this to start every run from one cold boot.
+
+Usage (mirrors `printf ... | cpmsim -8`):
+    printf 'DIR\\n' | python3 tools/pysim.py --disks ~/z80pack/cpmsim/disks
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import layout
+
+SECTOR_SIZE = 128
+
+# z80pack disk geometry by drive number: (tracks, sectors per track)
+DISK_GEOMETRY = {
+    0: (77, 26),                # A: 8" SSSD
+    1: (77, 26),                # B:
+    2: (77, 26),                # C:
+    3: (77, 26),                # D:
+    8: (255, 128),              # I: 4 MB hard disk
+    9: (255, 128),              # J: 4 MB hard disk
+    15: (256, 16384),           # P: 512 MB hard disk
+}
+
+# z80pack I/O ports (decimal, as in simio.c)
+CONSTA = 0
+CONDAT = 1
+PRTSTA = 2
+PRTDAT = 3
+AUXDAT = 5
+FDCD = 10
+FDCT = 11
+FDCS = 12
+FDCOP = 13
+FDCST = 14
+DMAL = 15
+DMAH = 16
+FDCSH = 17
+
+# FDC status codes
+FDC_OK = 0
+FDC_BAD_DRIVE = 1
+FDC_BAD_TRACK = 2
+FDC_BAD_SECTOR = 3
+FDC_SEEK_ERROR = 4
+FDC_READ_ERROR = 5
+FDC_WRITE_ERROR = 6
+FDC_BAD_COMMAND = 7
+
+# Consecutive empty console status polls before the machine counts as idle
+IDLE_POLLS = 64
+
+# Key that warm boots from the CCP prompt
+CTRL_C = b"\x03"
+
+# bios.lst symbols the HLE handlers use: the jump table, the BIOS state
+# they share with the assembly code, and the DPH table
+HLE_SYMBOLS = ("bios", "sekdsk", "sektrk", "seksec", "dmaadr", "dph0", "dph8",
+               "ndisks", "hddsk", "iostat", "trace")
+
+# BIOS symbols that only TRACE builds have
+HLE_TRACE_SYMBOLS = ("trlsec",)
+
+# Counters in the BIOS I/O statistics block (IOSTAT), in order
+IOSTAT_COUNTERS = ("read", "write", "dirwrite", "seldsk", "home", "conin",
+                   "conout", "dirread", "dirhit", "login")
+
+# FDC trace record ops in a TRACE build (TRREAD ... in bios.asm)
+TRACE_READ, TRACE_WRITE, TRACE_SELDSK, TRACE_SETTRK = range(4)
+
+# BIOS jump table entries, in order (counted when bios_base is set)
+BIOS_ENTRIES = ("boot", "wboot", "const", "conin", "conout", "list", "punch",
+                "reader", "home", "seldsk", "settrk", "setsec", "setdma",
+                "read", "write", "listst", "sectran")
+
+# Flag bits (8080 PSW layout)
+FLAG_S = 0x80
+FLAG_Z = 0x40
+FLAG_AC = 0x10
+FLAG_P = 0x04
+FLAG_C = 0x01
+
+# Sign, zero and parity flags for every result byte (bit 1 is always set)
+SZP = []
+for _i in range(256):
+    _f = 0x02 | (_i & FLAG_S)
+    if _i == 0:
+        _f |= FLAG_Z
+    if bin(_i).count("1") % 2 == 0:
+        _f |= FLAG_P
+    SZP.append(_f)
+
+
+def _cycle_table():
+    """Base 8080 cycle counts per opcode (untaken conditional CALL/RET)."""
+    cyc = [4] * 256
+    for op in range(0x40, 0x80):
+        cyc[op] = 7 if (op & 7) == 6 or (op >> 3) & 7 == 6 else 5
+    cyc[0x76] = 7
+    for op in range(0x80, 0xC0):
+        cyc[op] = 7 if (op & 7) == 6 else 4
+    for op in range(0x00, 0x40):
+        z = op & 7
+        if z == 1:
+            cyc[op] = 10
+        elif z == 2:
+            cyc[op] = {0x22: 16, 0x2A: 16, 0x32: 13, 0x3A: 13}.get(op, 7)
+        elif z == 3:
+            cyc[op] = 5
+        elif z in (4, 5):
+            cyc[op] = 10 if op in (0x34, 0x35) else 5
+        elif z == 6:
+            cyc[op] = 10 if op == 0x36 else 7
+    for op in range(0xC0, 0x100):
+        z = op & 7
+        if z == 0:
+            cyc[op] = 5
+        elif z == 1:
+            cyc[op] = 5 if op in (0xE9, 0xF9) else 10
+        elif z == 2:
+            cyc[op] = 10
+        elif z == 3:
+            cyc[op] = {0xE3: 18}.get(op, 10 if op in (0xC3, 0xCB, 0xD3, 0xDB) else 4)
+        elif z == 4:
+            cyc[op] = 11
+        elif z == 5:
+            cyc[op] = 17 if op & 8 else 11
+        elif z == 6:
+            cyc[op] = 7
+        else:
+            cyc[op] = 11
+    return cyc
+
+
+CYCLES = _cycle_table()
+
+
+class Cpu8080:
+    """Intel 8080 CPU core with a flat 64K memory."""
+
+    def __init__(self):
+        self.mem = bytearray(65536)
+        # B, C, D, E, H, L, (unused), A - indexed by the 8080 register field
+        self.r = [0] * 8
+        self.f = 0x02
+        self.pc = 0
+        self.sp = 0
+        self.inte = False
+        self.halted = False
+        self.cycles = 0
+        self.steps = 0
+        self.stop = False
+        # BIOS call counts: every call lands on a JMP in the jump table
+        self.bios_base: Optional[int] = None
+        self.bios_calls = [0] * len(BIOS_ENTRIES)
+        # Python handlers per BIOS entry, run instead of the JMP (None = none)
+        self.hle: Optional[list] = None
+
+    def port_in(self, port: int) -> int:
+        """Read from an I/O port (overridden by the machine)."""
+        return 0xFF
+
+    def port_out(self, port: int, value: int):
+        """Write to an I/O port (overridden by the machine)."""
+
+    def run(self, max_steps: int) -> int:
+        """
+        Execute up to max_steps instructions.
+
+        Stops early on HLT or when a port handler sets self.stop.
+        Returns the number of instructions executed.
+        """
+        mem = self.mem
+        R = self.r
+        f = self.f
+        pc = self.pc
+        sp = self.sp
+        cycles = self.cycles
+        szp = SZP
+        cyc = CYCLES
+        blo = 0x10000 if self.bios_base is None else self.bios_base
+        bhi = blo + 3 * len(BIOS_ENTRIES)
+        bcalls = self.bios_calls
+        hle = self.hle
+        n = 0
+        self.stop = False
+
+        while n < max_steps:
+            op = mem[pc]
+            n += 1
+            cycles += cyc[op]
+
+            if op >= 0x80:
+                if op < 0xC0:
+                    # ALU A,r
+                    s = op & 7
+                    v = mem[(R[4] << 8) | R[5]] if s == 6 else R[s]
+                    pc = (pc + 1) & 0xFFFF
+                    kind = (op >> 3) & 7
+                else:
+                    z = op & 7
+                    if z == 6:
+                        v = mem[(pc + 1) & 0xFFFF]
+                        pc = (pc + 2) & 0xFFFF
+                        kind = (op >> 3) & 7
+                    else:
+                        kind = -1
+                        y = (op >> 3) & 7
+                        if z == 0 or z == 2 or z == 4:
+                            if y == 0:
+                                take = not f & FLAG_Z
+                            elif y == 1:
+                                take = f & FLAG_Z
+                            elif y == 2:
+                                take = not f & FLAG_C
+                            elif y == 3:
+                                take = f & FLAG_C
+                            elif y == 4:
+                                take = not f & FLAG_P
+                            elif y == 5:
+                                take = f & FLAG_P
+                            elif y == 6:
+                                take = not f & FLAG_S
+                            else:
+                                take = f & FLAG_S
+                            if z == 0:
+                                # Rcc
+                                if take:
+                                    cycles += 6
+                                    pc = mem[sp] | (mem[(sp + 1) & 0xFFFF] << 8)
+                                    sp = (sp + 2) & 0xFFFF
+                                else:
+                                    pc = (pc + 1) & 0xFFFF
+                            elif z == 2:
+                                # Jcc
+                                if take:
+                                    pc = mem[(pc + 1) & 0xFFFF] | (mem[(pc + 2) & 0xFFFF] << 8)
+                                else:
+                                    pc = (pc + 3) & 0xFFFF
+                            else:
+                                # Ccc
+                                if take:
+                                    cycles += 6
+                                    ret = (pc + 3) & 0xFFFF
+                                    pc = mem[(pc + 1) & 0xFFFF] | (mem[(pc + 2) & 0xFFFF] << 8)
+                                    sp = (sp - 2) & 0xFFFF
+                                    mem[sp] = ret & 0xFF
+                                    mem[(sp + 1) & 0xFFFF] = ret >> 8
+                                else:
+                                    pc = (pc + 3) & 0xFFFF
+                        elif z == 1:
+                            if op == 0xC9 or op == 0xD9:
+                                pc = mem[sp] | (mem[(sp + 1) & 0xFFFF] << 8)
+                                sp = (sp + 2) & 0xFFFF
+                            elif op == 0xE9:
+                                pc = (R[4] << 8) | R[5]
+                            elif op == 0xF9:
+                                sp = (R[4] << 8) | R[5]
+                                pc = (pc + 1) & 0xFFFF
+                            else:
+                                lo = mem[sp]
+                                hi = mem[(sp + 1) & 0xFFFF]
+                                sp = (sp + 2) & 0xFFFF
+                                if y == 6:
+                                    f = (lo & 0xD5) | 0x02
+                                    R[7] = hi
+                                else:
+                                    R[y] = hi
+                                    R[y + 1] = lo
+                                pc = (pc + 1) & 0xFFFF
+                        elif z == 5:
+                            if op & 8:
+                                # CALL (CD and its DD/ED/FD aliases)
+                                ret = (pc + 3) & 0xFFFF
+                                pc = mem[(pc + 1) & 0xFFFF] | (mem[(pc + 2) & 0xFFFF] << 8)
+                                sp = (sp - 2) & 0xFFFF
+                                mem[sp] = ret & 0xFF
+                                mem[(sp + 1) & 0xFFFF] = ret >> 8
+                            else:
+                                if y == 6:
+                                    hi = R[7]
+                                    lo = (f & 0xD5) | 0x02
+                                else:
+                                    hi = R[y]
+                                    lo = R[y + 1]
+                                sp = (sp - 2) & 0xFFFF
+                                mem[sp] = lo
+                                mem[(sp + 1) & 0xFFFF] = hi
+                                pc = (pc + 1) & 0xFFFF
+                        elif z == 3:
+                            if op == 0xC3 or op == 0xCB:
+                                if blo <= pc < bhi:
+                                    entry = (pc - blo) // 3
+                                    bcalls[entry] += 1
+                                    if hle is not None and hle[entry] is not None:
+                                        # The handler does the work and the RET
+                                        self.pc, self.sp, self.f, self.cycles = pc, sp, f, cycles
+                                        hle[entry]()
+                                        pc, sp, f = self.pc, self.sp, self.f
+                                        if self.stop:
+                                            break
+                                        continue
+                                pc = mem[(pc + 1) & 0xFFFF] | (mem[(pc + 2) & 0xFFFF] << 8)
+                            elif op == 0xEB:
+                                R[2], R[4] = R[4], R[2]
+                                R[3], R[5] = R[5], R[3]
+                                pc = (pc + 1) & 0xFFFF
+                            elif op == 0xDB:
+                                port = mem[(pc + 1) & 0xFFFF]
+                                pc = (pc + 2) & 0xFFFF
+                                self.pc, self.sp, self.f, self.cycles = pc, sp, f, cycles
+                                R[7] = self.port_in(port) & 0xFF
+                                if self.stop:
+                                    break
+                            elif op == 0xD3:
+                                port = mem[(pc + 1) & 0xFFFF]
+                                pc = (pc + 2) & 0xFFFF
+                                self.pc, self.sp, self.f, self.cycles = pc, sp, f, cycles
+                                self.port_out(port, R[7])
+                                if self.stop:
+                                    break
+                            elif op == 0xE3:
+                                lo = mem[sp]
+                                hi = mem[(sp + 1) & 0xFFFF]
+                                mem[sp] = R[5]
+                                mem[(sp + 1) & 0xFFFF] = R[4]
+                                R[4] = hi
+                                R[5] = lo
+                                pc = (pc + 1) & 0xFFFF
+                            else:
+                                # DI / EI
+                                self.inte = op == 0xFB
+                                pc = (pc + 1) & 0xFFFF
+                        else:
+                            # RST n
+                            ret = (pc + 1) & 0xFFFF
+                            sp = (sp - 2) & 0xFFFF
+                            mem[sp] = ret & 0xFF
+                            mem[(sp + 1) & 0xFFFF] = ret >> 8
+                            pc = op & 0x38
+
+                if kind >= 0:
+                    a = R[7]
+                    if kind == 0 or kind == 1:
+                        # ADD / ADC
+                        res = a + v + (f & FLAG_C if kind == 1 else 0)
+                        f = szp[res & 0xFF] | (res >> 8) | ((a ^ v ^ res) & FLAG_AC)
+                        R[7] = res & 0xFF
+                    elif kind == 2 or kind == 3 or kind == 7:
+                        # SUB / SBB / CMP
+                        borrow = f & FLAG_C if kind == 3 else 0
+                        res = a - v - borrow
+                        f = szp[res & 0xFF] | (1 if res < 0 else 0)
+                        if (a & 0x0F) + ((~v) & 0x0F) + (1 - borrow) > 0x0F:
+                            f |= FLAG_AC
+                        if kind != 7:
+                            R[7] = res & 0xFF
+                    elif kind == 4:
+                        res = a & v
+                        f = szp[res] | (FLAG_AC if (a | v) & 0x08 else 0)
+                        R[7] = res
+                    elif kind == 5:
+                        res = a ^ v
+                        f = szp[res]
+                        R[7] = res
+                    else:
+                        res = a | v
+                        f = szp[res]
+                        R[7] = res
+
+            elif op >= 0x40:
+                # MOV group (76 = HLT)
+                if op == 0x76:
+                    self.halted = True
+                    pc = (pc + 1) & 0xFFFF
+                    break
+                s = op & 7
+                d = (op >> 3) & 7
+                v = mem[(R[4] << 8) | R[5]] if s == 6 else R[s]
+                if d == 6:
+                    mem[(R[4] << 8) | R[5]] = v
+                else:
+                    R[d] = v
+                pc = (pc + 1) & 0xFFFF
+
+            else:
+                z = op & 7
+                y = op >> 3
+                if z == 6:
+                    # MVI
+                    v = mem[(pc + 1) & 0xFFFF]
+                    if y == 6:
+                        mem[(R[4] << 8) | R[5]] = v
+                    else:
+                        R[y] = v
+                    pc = (pc + 2) & 0xFFFF
+                elif z == 4 or z == 5:
+                    # INR / DCR (carry unaffected)
+                    if y == 6:
+                        addr = (R[4] << 8) | R[5]
+                        v = mem[addr]
+                    else:
+                        v = R[y]
+                    if z == 4:
+                        v = (v + 1) & 0xFF
+                        f = szp[v] | (f & FLAG_C) | (FLAG_AC if (v & 0x0F) == 0 else 0)
+                    else:
+                        v = (v - 1) & 0xFF
+                        f = szp[v] | (f & FLAG_C) | (FLAG_AC if (v & 0x0F) != 0x0F else 0)
+                    if y == 6:
+                        mem[addr] = v
+                    else:
+                        R[y] = v
+                    pc = (pc + 1) & 0xFFFF
+                elif z == 1:
+                    rp = y >> 1
+                    if y & 1:
+                        # DAD
+                        hl = (R[4] << 8) | R[5]
+                        if rp == 3:
+                            v = sp
+                        else:
+                            v = (R[rp * 2] << 8) | R[rp * 2 + 1]
+                        res = hl + v
+                        f = (f & ~FLAG_C) | (res >> 16)
+                        R[4] = (res >> 8) & 0xFF
+                        R[5] = res & 0xFF
+                        pc = (pc + 1) & 0xFFFF
+                    else:
+                        # LXI
+                        lo = mem[(pc + 1) & 0xFFFF]
+                        hi = mem[(pc + 2) & 0xFFFF]
+                        if rp == 3:
+                            sp = (hi << 8) | lo
+                        else:
+                            R[rp * 2] = hi
+                            R[rp * 2 + 1] = lo
+                        pc = (pc + 3) & 0xFFFF
+                elif z == 3:
+                    # INX / DCX
+                    rp = y >> 1
+                    delta = -1 if y & 1 else 1
+                    if rp == 3:
+                        sp = (sp + delta) & 0xFFFF
+                    else:
+                        v = (((R[rp * 2] << 8) | R[rp * 2 + 1]) + delta) & 0xFFFF
+                        R[rp * 2] = v >> 8
+                        R[rp * 2 + 1] = v & 0xFF
+                    pc = (pc + 1) & 0xFFFF
+                elif z == 2:
+                    if op == 0x02:
+                        mem[(R[0] << 8) | R[1]] = R[7]
+                        pc = (pc + 1) & 0xFFFF
+                    elif op == 0x12:
+                        mem[(R[2] << 8) | R[3]] = R[7]
+                        pc = (pc + 1) & 0xFFFF
+                    elif op == 0x0A:
+                        R[7] = mem[(R[0] << 8) | R[1]]
+                        pc = (pc + 1) & 0xFFFF
+                    elif op == 0x1A:
+                        R[7] = mem[(R[2] << 8) | R[3]]
+                        pc = (pc + 1) & 0xFFFF
+                    else:
+                        addr = mem[(pc + 1) & 0xFFFF] | (mem[(pc + 2) & 0xFFFF] << 8)
+                        if op == 0x22:
+                            mem[addr] = R[5]
+                            mem[(addr + 1) & 0xFFFF] = R[4]
+                        elif op == 0x2A:
+                            R[5] = mem[addr]
+                            R[4] = mem[(addr + 1) & 0xFFFF]
+                        elif op == 0x32:
+                            mem[addr] = R[7]
+                        else:
+                            R[7] = mem[addr]
+                        pc = (pc + 3) & 0xFFFF
+                elif z == 7:
+                    a = R[7]
+                    if y == 0:
+                        # RLC
+                        c = a >> 7
+                        R[7] = ((a << 1) | c) & 0xFF
+                        f = (f & ~FLAG_C) | c
+                    elif y == 1:
+                        # RRC
+                        c = a & 1
+                        R[7] = (a >> 1) | (c << 7)
+                        f = (f & ~FLAG_C) | c
+                    elif y == 2:
+                        # RAL
+                        c = a >> 7
+                        R[7] = ((a << 1) | (f & FLAG_C)) & 0xFF
+                        f = (f & ~FLAG_C) | c
+                    elif y == 3:
+                        # RAR
+                        c = a & 1
+                        R[7] = (a >> 1) | ((f & FLAG_C) << 7)
+                        f = (f & ~FLAG_C) | c
+                    elif y == 4:
+                        # DAA
+                        cy = f & FLAG_C
+                        add = 0
+                        if (a & 0x0F) > 9 or f & FLAG_AC:
+                            add = 0x06
+                        if a > 0x99 or cy:
+                            add |= 0x60
+                            cy = 1
+                        res = a + add
+                        f = szp[res & 0xFF] | cy | ((a ^ add ^ res) & FLAG_AC)
+                        R[7] = res & 0xFF
+                    elif y == 5:
+                        R[7] = a ^ 0xFF
+                    elif y == 6:
+                        f |= FLAG_C
+                    else:
+                        f ^= FLAG_C
+                    pc = (pc + 1) & 0xFFFF
+                else:
+                    # NOP and its undocumented aliases
+                    pc = (pc + 1) & 0xFFFF
+
+        self.f = f
+        self.pc = pc
+        self.sp = sp
+        self.cycles = cycles
+        self.steps += n
+        return n
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Machine state at one instant, to start other machines from.
+
+    The disk images are the bytes the machine had loaded. A machine
+    restored from the snapshot shares them and copies an image only when
+    it first writes to it. Snapshots pickle, so they can be handed to
+    worker processes.
+    """
+    mem: bytes
+    regs: tuple                 # r[0..7], f, pc, sp, inte
+    fdc: tuple                  # drive, track, sector, status, dma
+    disks: dict                 # drive number -> image bytes
+    prompt: bytes               # Last line of console output (e.g. b"A>")
+
+
+class Machine(Cpu8080):
+    """
+    z80pack cpmsim-compatible machine: 8080 CPU plus console, printer,
+    auxiliary and FDC ports.
+    """
+
+    def __init__(self, disk_dir: Path, console_input: bytes = b"",
+                 reader_input: bytes = b"", hle: Optional[dict] = None):
+        super().__init__()
+        self.disk_dir = Path(disk_dir)
+        self.console_in = bytearray(console_input)
+        self.console_pos = 0
+        self.console_out = bytearray()
+        self.printer_out = bytearray()
+        self.punch_out = bytearray()
+        self.reader_in = bytearray(reader_input)
+        self.reader_pos = 0
+        self.idle_polls = 0
+        self.idle = False
+
+        # FDC latches
+        self.fdc_drive = 0
+        self.fdc_track = 0
+        self.fdc_sector = 0
+        self.fdc_status = FDC_OK
+        self.dma = 0
+        self.fdc_reads = 0
+        self.fdc_writes = 0
+
+        self.disks: dict[int, bytearray] = {}
+        self.dirty: set[int] = set()
+
+        if hle is not None:
+            self.enable_hle(hle)
+
+    # --- Disk images ---------------------------------------------------------
+
+    def disk_path(self, drive: int) -> Path:
+        """Path of the image file for a drive number (drivea.dsk ...)."""
+        return self.disk_dir / f"drive{chr(ord('a') + drive)}.dsk"
+
+    def get_disk(self, drive: int) -> Optional[bytes]:
+        """
+        Return the image for a drive, loading it on first access.
+
+        The image is bytes while it is shared with a Snapshot; the first
+        write replaces it with a private bytearray.
+        """
+        if drive in self.disks:
+            return self.disks[drive]
+        path = self.disk_path(drive)
+        if drive not in DISK_GEOMETRY or not path.exists():
+            return None
+        self.disks[drive] = bytearray(path.read_bytes())
+        return self.disks[drive]
+
+    def flush(self):
+        """Write modified disk images back to their files."""
+        for drive in sorted(self.dirty):
+            self.disk_path(drive).write_bytes(self.disks[drive])
+        self.dirty.clear()
+
+    def fdc_command(self, command: int) -> int:
+        """Execute an FDC read (0) or write (1) using the current latches."""
+        if command not in (0, 1):
+            return FDC_BAD_COMMAND
+        disk = self.get_disk(self.fdc_drive)
+        if disk is None:
+            return FDC_BAD_DRIVE
+        tracks, spt = DISK_GEOMETRY[self.fdc_drive]
+        if self.fdc_track >= tracks:
+            return FDC_BAD_TRACK
+        if self.fdc_sector < 1 or self.fdc_sector > spt:
+            return FDC_BAD_SECTOR
+        pos = (self.fdc_track * spt + self.fdc_sector - 1) * SECTOR_SIZE
+        if pos + SECTOR_SIZE > len(disk):
+            return FDC_SEEK_ERROR
+        dma = self.dma
+        if command == 0:
+            self.fdc_reads += 1
+            data = disk[pos:pos + SECTOR_SIZE]
+            end = dma + SECTOR_SIZE
+            if end <= 0x10000:
+                self.mem[dma:end] = data
+            else:
+                for i in range(SECTOR_SIZE):
+                    self.mem[(dma + i) & 0xFFFF] = data[i]
+        else:
+            self.fdc_writes += 1
+            if not isinstance(disk, bytearray):
+                disk = self.disks[self.fdc_drive] = bytearray(disk)
+            if dma + SECTOR_SIZE <= 0x10000:
+                disk[pos:pos + SECTOR_SIZE] = self.mem[dma:dma + SECTOR_SIZE]
+            else:
+                disk[pos:pos + SECTOR_SIZE] = bytes(
+                    self.mem[(dma + i) & 0xFFFF] for i in range(SECTOR_SIZE))
+            self.dirty.add(self.fdc_drive)
+        return FDC_OK
+
+    # --- High-level BIOS -----------------------------------------------------
+
+    def enable_hle(self, symbols: dict):
+        """
+        Service the console and disk BIOS entries in Python.
+
+        symbols holds the HLE_SYMBOLS values from bios.lst (see
+        bios_symbols). CONST, CONIN, CONOUT, HOME, SELDSK, SETTRK, SETSEC,
+        SETDMA, READ, WRITE and SECTRAN run here instead of the BIOS code:
+        each does what the assembly routine does (including its stores to
+        SEKDSK, SEKTRK, SEKSEC and DMAADR, its IOSTAT counter and, in a
+        TRACE build, its trace record) and returns. The other entries,
+        warm boot included, run as 8080 code.
+        """
+        self.sym = {name: symbols[name] for name in HLE_SYMBOLS + HLE_TRACE_SYMBOLS
+                    if name in symbols}
+        self.conin_wait = False
+        self.bios_base = self.sym["bios"]
+        handlers = {"const": self._hle_const, "conin": self._hle_conin,
+                    "conout": self._hle_conout, "home": self._hle_home,
+                    "seldsk": self._hle_seldsk, "settrk": self._hle_settrk,
+                    "setsec": self._hle_setsec, "setdma": self._hle_setdma,
+                    "read": self._hle_read, "write": self._hle_write,
+                    "sectran": self._hle_sectran}
+        self.hle = [handlers.get(name) for name in BIOS_ENTRIES]
+
+    def _hle_ret(self, a: Optional[int] = None):
+        """Return from a BIOS entry, with A (and flags as for ORA A) if given."""
+        if a is not None:
+            self.r[7] = a
+            self.f = SZP[a]
+        mem = self.mem
+        sp = self.sp
+        self.pc = mem[sp] | (mem[(sp + 1) & 0xFFFF] << 8)
+        self.sp = (sp + 2) & 0xFFFF
+
+    def _hle_count(self, counter: str):
+        """Add 1 to a 32-bit IOSTAT counter, as STINC does."""
+        adr = self.sym["iostat"] + 1 + IOSTAT_COUNTERS.index(counter) * 4
+        mem = self.mem
+        for i in range(4):
+            mem[adr + i] = (mem[adr + i] + 1) & 0xFF
+            if mem[adr + i]:
+                break
+
+    def _hle_trace(self, op: int):
+        """Send a TRACE build's FDC trace record, as TRCREC does."""
+        sym = self.sym
+        if not sym["trace"]:
+            return
+        mem = self.mem
+        for value in (op, mem[sym["sekdsk"]], mem[sym["sektrk"]],
+                      mem[sym["trlsec"]], mem[sym["seksec"]]):
+            self.port_out(AUXDAT, value)
+
+    def _hle_hl(self, value: int):
+        self.r[4] = value >> 8
+        self.r[5] = value & 0xFF
+
+    def _hle_const(self):
+        self._hle_ret(0xFF if self.port_in(CONSTA) else 0x00)
+
+    def _hle_conin(self):
+        if self.conin_wait:
+            # Resumed after waiting: the same call, already counted
+            self.bios_calls[BIOS_ENTRIES.index("conin")] -= 1
+        else:
+            self._hle_count("conin")
+        self.conin_wait = not self.input_pending()
+        if self.conin_wait:
+            # The BIOS would poll until a key comes: go idle at the entry,
+            # so the call is made again when input is fed
+            self.idle = True
+            self.stop = True
+            return
+        ch = self.port_in(CONDAT) & 0x7F
+        self._hle_ret(0x08 if ch == 0x7F else ch)
+
+    def _hle_conout(self):
+        self._hle_count("conout")
+        self.port_out(CONDAT, self.r[1])
+        self._hle_ret(self.r[1])
+
+    def _hle_home(self):
+        self._hle_count("home")
+        self.r[0] = self.r[1] = 0
+        self._hle_settrk()
+
+    def _hle_seldsk(self):
+        sym = self.sym
+        drive = self.r[1]
+        self._hle_count("seldsk")
+        self.mem[sym["sekdsk"]] = drive
+        self._hle_trace(TRACE_SELDSK)
+        if drive < sym["ndisks"]:
+            self._hle_hl(sym["dph0"] + drive * 16)
+        elif drive == sym["hddsk"]:
+            self._hle_hl(sym["dph8"])
+        else:
+            self._hle_hl(0)
+        self._hle_ret(drive)
+
+    def _hle_settrk(self):
+        self.mem[self.sym["sektrk"]] = self.r[1]
+        self._hle_trace(TRACE_SETTRK)
+        self._hle_ret(self.r[1])
+
+    def _hle_setsec(self):
+        self.mem[self.sym["seksec"]] = self.r[1]
+        self._hle_ret(self.r[1])
+
+    def _hle_setdma(self):
+        adr = self.sym["dmaadr"]
+        self.mem[adr] = self.r[1]
+        self.mem[adr + 1] = self.r[0]
+        self.r[4], self.r[5] = self.r[0], self.r[1]
+        self._hle_ret()
+
+    def _hle_disk(self, command: int):
+        """READ and WRITE: program the FDC as SETFDC does and run the command."""
+        mem = self.mem
+        sym = self.sym
+        self.fdc_drive = mem[sym["sekdsk"]]
+        self.fdc_track = mem[sym["sektrk"]]
+        self.fdc_sector = (self.fdc_sector & 0xFF00) | mem[sym["seksec"]]
+        self.dma = mem[sym["dmaadr"]] | (mem[sym["dmaadr"] + 1] << 8)
+        self.idle_polls = 0
+        self.fdc_status = self.fdc_command(command)
+        self._hle_hl(self.dma)
+        self._hle_ret(self.fdc_status)
+
+    def _hle_read(self):
+        self._hle_count("read")
+        self._hle_trace(TRACE_READ)
+        self._hle_disk(0)
+
+    def _hle_write(self):
+        self._hle_count("write")
+        self._hle_trace(TRACE_WRITE | ((self.r[1] << 4) & 0xFF))
+        if self.r[1] == 1:
+            self._hle_count("dirwrite")
+        self._hle_disk(1)
+
+    def _hle_sectran(self):
+        r = self.r
+        sector = (r[0] << 8) | r[1]
+        table = (r[2] << 8) | r[3]
+        if self.sym["trace"]:
+            self.mem[self.sym["trlsec"]] = r[1]
+        if table:
+            self._hle_hl(self.mem[(table + sector) & 0xFFFF])
+        else:
+            self._hle_hl((sector + 1) & 0xFFFF)
+        self._hle_ret()
+
+    # --- Ports ---------------------------------------------------------------
+
+    def input_pending(self) -> bool:
+        """True if scripted console input remains."""
+        return self.console_pos < len(self.console_in)
+
+    def feed(self, data: bytes):
+        """Queue more console input."""
+        self.console_in += data
+        self.idle = False
+        self.idle_polls = 0
+
+    def port_in(self, port: int) -> int:
+        if port == CONSTA:
+            if self.input_pending():
+                self.idle_polls = 0
+                return 0xFF
+            # Input exhausted: a tight status loop means the system is
+            # blocked waiting for a key, so there is nothing left to run
+            self.idle_polls += 1
+            if self.idle_polls >= IDLE_POLLS:
+                self.idle = True
+                self.stop = True
+            return 0x00
+        self.idle_polls = 0
+        if port == CONDAT:
+            if self.input_pending():
+                ch = self.console_in[self.console_pos]
+                self.console_pos += 1
+                return ch
+            return 0x00
+        if port == PRTSTA:
+            return 0xFF
+        if port == AUXDAT:
+            if self.reader_pos < len(self.reader_in):
+                ch = self.reader_in[self.reader_pos]
+                self.reader_pos += 1
+                return ch
+            return 0x1A
+        if port == FDCD:
+            return self.fdc_drive
+        if port == FDCT:
+            return self.fdc_track
+        if port == FDCS:
+            return self.fdc_sector & 0xFF
+        if port == FDCSH:
+            return self.fdc_sector >> 8
+        if port == FDCST:
+            return self.fdc_status
+        if port == DMAL:
+            return self.dma & 0xFF
+        if port == DMAH:
+            return self.dma >> 8
+        return 0xFF
+
+    def port_out(self, port: int, value: int):
+        self.idle_polls = 0
+        if port == CONDAT:
+            self.console_out.append(value)
+        elif port == PRTDAT:
+            self.printer_out.append(value)
+        elif port == AUXDAT:
+            self.punch_out.append(value)
+        elif port == FDCD:
+            self.fdc_drive = value
+        elif port == FDCT:
+            self.fdc_track = value
+        elif port == FDCS:
+            self.fdc_sector = (self.fdc_sector & 0xFF00) | value
+        elif port == FDCSH:
+            self.fdc_sector = (self.fdc_sector & 0x00FF) | (value << 8)
+        elif port == FDCOP:
+            self.fdc_status = self.fdc_command(value)
+        elif port == DMAL:
+            self.dma = (self.dma & 0xFF00) | value
+        elif port == DMAH:
+            self.dma = (self.dma & 0x00FF) | (value << 8)
+
+    # --- Running -------------------------------------------------------------
+
+    def boot(self) -> bool:
+        """Load the boot sector (track 0, sector 1 of A:) to 0000H."""
+        disk = self.get_disk(0)
+        if disk is None:
+            return False
+        self.mem[0:SECTOR_SIZE] = disk[0:SECTOR_SIZE]
+        self.pc = 0
+        return True
+
+    def run_until_idle(self, timeout: Optional[float] = None,
+                       max_steps: Optional[int] = None) -> str:
+        """
+        Run until the input is used up and the system waits for more.
+
+        Returns the reason the run stopped: "idle", "halt", "timeout" or
+        "steps".
+        """
+        start = time.monotonic()
+        budget = max_steps
+        while True:
+            chunk = 200000 if budget is None else min(200000, budget)
+            if chunk <= 0:
+                return "steps"
+            ran = self.run(chunk)
+            if budget is not None:
+                budget -= ran
+            if self.idle:
+                return "idle"
+            if self.halted:
+                return "halt"
+            if timeout is not None and time.monotonic() - start > timeout:
+                return "timeout"
+
+    def output(self) -> str:
+        """Console output so far, decoded like the cpmsim backend."""
+        return self.console_out.decode("utf-8", errors="replace")
+
+    def snapshot(self) -> Snapshot:
+        """Capture memory, registers, FDC latches and the loaded disk images."""
+        out = self.console_out
+        return Snapshot(
+            mem=bytes(self.mem),
+            regs=(*self.r, self.f, self.pc, self.sp, self.inte),
+            fdc=(self.fdc_drive, self.fdc_track, self.fdc_sector,
+                 self.fdc_status, self.dma),
+            disks={drive: bytes(image) for drive, image in self.disks.items()},
+            prompt=bytes(out[out.rfind(b"\n") + 1:]))
+
+    def restore(self, snapshot: Snapshot):
+        """
+        Continue from a snapshot. Console input and output start empty
+        (output holds the snapshot's prompt line); counters are kept.
+        """
+        self.mem[:] = snapshot.mem
+        *self.r, self.f, self.pc, self.sp, self.inte = snapshot.regs
+        (self.fdc_drive, self.fdc_track, self.fdc_sector,
+         self.fdc_status, self.dma) = snapshot.fdc
+        self.disks = dict(snapshot.disks)
+        self.dirty.clear()
+        self.halted = False
+        self.idle = False
+        self.idle_polls = 0
+        self.console_in = bytearray()
+        self.console_pos = 0
+        self.console_out = bytearray(snapshot.prompt)
+
+    def counters(self) -> dict:
+        """
+        Work done so far: instructions, cycles, FDC sector transfers and,
+        when bios_base is set, calls per BIOS entry.
+        """
+        counts = {"instructions": self.steps, "cycles": self.cycles,
+                  "fdc_reads": self.fdc_reads, "fdc_writes": self.fdc_writes}
+        if self.bios_base is not None:
+            counts.update(zip(BIOS_ENTRIES, self.bios_calls))
+        return counts
+
+
+def bios_symbols(build_dir: Path) -> Optional[dict]:
+    """HLE_SYMBOLS from build_dir/bios.lst, or None if it has no such listing"""
+    lst_file = Path(build_dir) / "bios.lst"
+    if not lst_file.exists():
+        return None
+    symbols = layout.lst_symbols(lst_file)
+    if not all(name in symbols for name in HLE_SYMBOLS):
+        return None
+    return {name: symbols[name] for name in HLE_SYMBOLS + HLE_TRACE_SYMBOLS
+            if name in symbols}
+
+
+def run_session(disk_dir: Path, console_input: str, timeout: Optional[float] = None,
+                reader_input: bytes = b"", hle: Optional[dict] = None) -> tuple[str, str]:
+    """
+    Boot from drivea.dsk in disk_dir, feed console_input, and run until idle.
+
+    Disk images are written back before returning. With hle (bios_symbols)
+    the console and disk BIOS entries run in Python.
+
+    Returns:
+        (output, reason) tuple, where reason is as for run_until_idle
+    """
+    machine = Machine(disk_dir, console_input.encode("latin-1"), reader_input, hle)
+    if not machine.boot():
+        return "", "nodisk"
+    try:
+        reason = machine.run_until_idle(timeout=timeout)
+    finally:
+        machine.flush()
+    return machine.output(), reason
+
+
+def cross_check(disk_dir: Path, console_input: bytes, hle: dict,
+                timeout: Optional[float] = None,
+                reader_input: bytes = b"") -> list[str]:
+    """
+    Run the same input with full emulation and with the HLE BIOS, each on
+    its own copy of disk_dir, and compare the results: how the run ended,
+    console, printer and punch output, the disk images and the calls to
+    each BIOS entry.
+
+    Returns:
+        One line per difference (empty if the runs agree)
+    """
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("full", "hle"):
+            run_dir = Path(tmp) / mode
+            shutil.copytree(disk_dir, run_dir)
+            machine = Machine(run_dir, console_input, reader_input,
+                              hle if mode == "hle" else None)
+            machine.bios_base = hle["bios"]
+            if not machine.boot():
+                return [f"{machine.disk_path(0)} not found"]
+            reason = machine.run_until_idle(timeout=timeout)
+            machine.flush()
+            runs.append({
+                "stop reason": reason,
+                "console output": bytes(machine.console_out),
+                "printer output": bytes(machine.printer_out),
+                "punch output": bytes(machine.punch_out),
+                **{f"image {p.name}": p.read_bytes()
+                   for p in sorted(run_dir.glob("*.dsk"))},
+                **{f"{name} calls": count
+                   for name, count in zip(BIOS_ENTRIES, machine.bios_calls)},
+            })
+
+    full, fast = runs
+    differences = []
+    for key in full.keys() | fast.keys():
+        a, b = full.get(key), fast.get(key)
+        if a == b:
+            continue
+        if isinstance(a, bytes) and isinstance(b, bytes):
+            at = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+            differences.append(f"{key}: differs at byte {at} "
+                               f"(full {len(a)} bytes, HLE {len(b)} bytes)")
+        else:
+            differences.append(f"{key}: full {a}, HLE {b}")
+    return sorted(differences)
+
+
+class CpmSession:
+    """
+    Runs of scripted input that each start from the same booted system.
+
+    The first run cold boots from drivea.dsk, as run_session does, and
+    takes a Snapshot at the first prompt. Every later run starts from a
+    new machine restored from that snapshot, so no run sees what an
+    earlier one did to memory. If a disk image file no longer matches the
+    snapshot (the harness wrote files between runs), the images are read
+    from the files and ^C at the prompt warm boots, so the CCP resets the
+    disk system and logs the drives in again.
+    """
+
+    def __init__(self, disk_dir: Path, snapshot: Optional["Snapshot"] = None,
+                 hle: Optional[dict] = None):
+        self.disk_dir = Path(disk_dir)
+        self.snapshot = snapshot
+        self.hle = hle
+        self.cold_boots = 0
+        self.restores = 0
+        self.warm_boots = 0
+
+    def run(self, console_input: str, timeout: Optional[float] = None,
+            reader_input: bytes = b"", cold: bool = False) -> tuple[str, str]:
+        """
+        Feed console_input to a freshly booted system and run until idle.
+
+        The output starts at the prompt the input is typed at (with the
+        sign-on before it for a cold boot). Disk images are written back
+        before returning.
+
+        Returns:
+            (output, reason) tuple, as for run_session
+        """
+        machine = None if cold else self.restore(timeout)
+        if machine is None:
+            machine = self.boot(timeout)
+            if machine is None:
+                return "", "nodisk"
+        machine.reader_in = bytearray(reader_input)
+        machine.feed(console_input.encode("latin-1"))
+        try:
+            reason = machine.run_until_idle(timeout=timeout)
+        finally:
+            machine.flush()
+        return machine.output(), reason
+
+    def boot(self, timeout: Optional[float]) -> Optional[Machine]:
+        """Cold boot a new machine and snapshot it at the first prompt."""
+        machine = Machine(self.disk_dir, hle=self.hle)
+        if not machine.boot():
+            return None
+        self.cold_boots += 1
+        if machine.run_until_idle(timeout=timeout) == "idle":
+            self.snapshot = machine.snapshot()
+        return machine
+
+    def restore(self, timeout: Optional[float]) -> Optional[Machine]:
+        """
+        A new machine restored from the snapshot, warm booted if the disk
+        files changed since it was taken.
+
+        Returns:
+            The machine waiting at the A> prompt, or None if there is no
+            snapshot or the warm boot did not reach the prompt
+        """
+        if self.snapshot is None:
+            return None
+        machine = Machine(self.disk_dir, hle=self.hle)
+        machine.restore(self.snapshot)
+        self.restores += 1
+        changed = False
+        for drive, image in self.snapshot.disks.items():
+            path = machine.disk_path(drive)
+            current = path.read_bytes() if path.exists() else None
+            if current != image:
+                changed = True
+                if current is None:
+                    del machine.disks[drive]
+                else:
+                    machine.disks[drive] = current
+        if not changed:
+            return machine
+
+        machine.feed(CTRL_C)
+        if machine.run_until_idle(timeout=timeout) != "idle":
+            return None
+        # Keep only the new prompt line, e.g. "A>"
+        out = machine.console_out
+        del out[:out.rfind(b"\n") + 1]
+        if not (len(out) == 2 and out[1:] == b">"):
+            return None
+        self.warm_boots += 1
+        return machine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process 8080 machine for LOLOS")
+    parser.add_argument("--disks", type=Path, default=Path("disks"),
+                        help="Directory holding drivea.dsk ... (default: ./disks)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Wall-clock limit in seconds")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print instruction, cycle and sector counts to stderr")
+    parser.add_argument("--bios", type=lambda s: int(s, 16), default=None,
+                        help="BIOS jump table address in hex for --stats "
+                             "(default: from build/layout.inc)")
+    parser.add_argument("--hle", action="store_true",
+                        help="Run the console and disk BIOS entries in Python (needs build/bios.lst)")
+    parser.add_argument("--hle-check", action="store_true",
+                        help="Run the input with and without --hle and report any difference")
+    parser.add_argument("--punch", type=Path, default=None,
+                        help="Write the punch (AUXDAT) output to this file, e.g. a TRACE BIOS's FDC trace")
+    args = parser.parse_args()
+
+    console_input = sys.stdin.buffer.read() if not sys.stdin.isatty() else b""
+    hle = None
+    if args.hle or args.hle_check:
+        hle = bios_symbols(Path(__file__).resolve().parent.parent / "build")
+        if hle is None:
+            print("ERROR: build/bios.lst not found or lacks the HLE symbols", file=sys.stderr)
+            sys.exit(1)
+    if args.hle_check:
+        differences = cross_check(args.disks, console_input, hle, timeout=args.timeout)
+        for line in differences:
+            print(line)
+        if not differences:
+            print("HLE matches full emulation")
+        sys.exit(1 if differences else 0)
+
+    machine = Machine(args.disks, console_input, hle=hle)
+    if args.bios is not None:
+        machine.bios_base = args.bios
+    elif machine.bios_base is None:
+        built = layout.read(Path(__file__).resolve().parent.parent / "build")
+        machine.bios_base = built.bios if built else None
+    if not machine.boot():
+        print(f"ERROR: {machine.disk_path(0)} not found", file=sys.stderr)
+        sys.exit(1)
+    start = time.monotonic()
+    try:
+        reason = machine.run_until_idle(timeout=args.timeout)
+    finally:
+        machine.flush()
+    sys.stdout.buffer.write(bytes(machine.console_out))
+    sys.stdout.flush()
+    if args.punch is not None:
+        args.punch.write_bytes(machine.punch_out)
+    if args.stats:
+        elapsed = time.monotonic() - start
+        print(f"\n{reason}: {machine.steps} instructions, {machine.cycles} cycles, "
+              f"{machine.fdc_reads} sector reads, {machine.fdc_writes} sector writes, "
+              f"{elapsed:.2f}s", file=sys.stderr)
+        if machine.bios_base is not None:
+            calls = ", ".join(f"{name} {count}" for name, count
+                              in zip(BIOS_ENTRIES, machine.bios_calls) if count)
+            print(f"BIOS calls: {calls}", file=sys.stderr)
+    sys.exit(0 if reason in ("idle", "halt") else 2)
+
+
+if __name__ == '__main__':
+    main()
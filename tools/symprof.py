@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Symbol-level profiler for LOLOS on the pysim 8080 machine.
+
+Boots drivea.dsk to the CCP prompt, then runs the given commands one
+instruction at a time and charges each instruction's 8080 cycles to the
+routine it runs in. Routines and their addresses come from the zmac
+listings in build/ (ccp.lst, bdos.lst, bios.lst) and, for a transient,
+tests/programs/<name>.lst; only names defined as labels in the matching
+.asm source are used, so EQU constants never name code.
+
+A routine is entered by a CALL (or RST) and left by the RET, or any other
+transfer, to its return address. Code reached by a jump stays in the
+routine that jumped. Entering BDOSENT starts a BDOS function frame named
+after its FTABLE handler (FUNC20, ...), so the jump through FTABLE counts
+as a call. CALL 5 is named BDOS and BIOS jump table calls are named
+after the entry (READ, ...).
+Warm boot unwinds every frame.
+
+Reports:
+- Flat profile: calls, exclusive cycles (spent in the routine itself) and
+  inclusive cycles (including the routines it called) per routine
+- BDOS functions: calls and inclusive cycles per function number
+- Collapsed stacks (--collapsed FILE), one "A;B;C cycles" line per stack,
+  for flamegraph.pl or speedscope
+
+Usage:
+    python3 tools/symprof.py TSEQIO
+    python3 tools/symprof.py "DIR" "TYPE BENCH.TXT" --top 30
+    python3 tools/symprof.py BSEQIO --disks build/pysim/disks --collapsed build/bseqio.folded
+"""
+
+import argparse
+import bisect
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import layout
+import pysim
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BUILD_DIR = PROJECT_ROOT / "build"
+SRC_DIR = PROJECT_ROOT / "src"
+PROGRAMS_DIR = PROJECT_ROOT / "tests" / "programs"
+
+# Label at the start of a source line ("READDIR:" or "STCNT:  DS 4")
+LABEL_RE = re.compile(r"^([A-Za-z_?@.][\w?@.$]*):", re.MULTILINE)
+
+# Frames deeper than this are assumed leaked (a routine that never
+# returned) and are dropped
+MAX_DEPTH = 64
+
+
+def listing_labels(lst_file: Path, asm_file: Path, lo: int, hi: int) -> dict:
+    """
+    Addresses of the labels asm_file defines, from lst_file's symbol table,
+    limited to lo <= address < hi. Names are as written in the source.
+    """
+    symbols = layout.lst_symbols(lst_file)
+    labels = {}
+    for name in LABEL_RE.findall(asm_file.read_text(encoding="latin-1")):
+        value = symbols.get(name.lower())
+        if value is not None and lo <= value < hi:
+            labels[value] = name
+    return labels
+
+
+class Symbols:
+    """Address to label lookup over the CCP, BDOS, BIOS and a transient"""
+
+    def __init__(self, build_dir: Path = BUILD_DIR, src_dir: Path = SRC_DIR):
+        lay = layout.read(build_dir)
+        if lay is None:
+            raise FileNotFoundError(f"{build_dir / layout.INCLUDE_NAME} not found; build first")
+        self.layout = lay
+        top = lay.msize * 1024
+        self.labels: dict[int, str] = {}
+        for name, lo, hi in (("ccp", lay.ccp, lay.bdos), ("bdos", lay.bdos, lay.bios),
+                             ("bios", lay.bios, top)):
+            self.labels.update(listing_labels(build_dir / f"{name}.lst",
+                                              src_dir / f"{name}.asm", lo, hi))
+        self.by_name = {name: adr for adr, name in self.labels.items()}
+        self._sorted()
+
+    def add_program(self, lst_file: Path, asm_file: Path):
+        """Add a transient's labels (TPA, below the CCP)."""
+        self.labels.update(listing_labels(lst_file, asm_file, 0x0100, self.layout.ccp))
+        self._sorted()
+
+    def _sorted(self):
+        self.addresses = sorted(self.labels)
+        self.cache: dict[int, str] = {}
+
+    def name(self, adr: int) -> str:
+        """Enclosing label of adr ("LABEL" or "LABEL+n"), or its hex address."""
+        cached = self.cache.get(adr)
+        if cached is not None:
+            return cached
+        i = bisect.bisect_right(self.addresses, adr) - 1
+        if i < 0 or (adr < self.layout.ccp) != (self.addresses[i] < self.layout.ccp):
+            text = f"{adr:04X}h"
+        else:
+            start = self.addresses[i]
+            text = self.labels[start] + (f"+{adr - start}" if adr != start else "")
+        self.cache[adr] = text
+        return text
+
+
+class Profile:
+    """Cycle counts per routine, per BDOS function and per call stack"""
+
+    def __init__(self, symbols: Symbols):
+        self.symbols = symbols
+        lay = symbols.layout
+        self.bdos_entry = symbols.by_name["BDOSENT"]
+        self.ftable = symbols.by_name["FTABLE"]
+        self.wboot = symbols.by_name["WBOOT"]
+        self.bios = lay.bios
+        self.bios_end = lay.bios + 3 * len(pysim.BIOS_ENTRIES)
+        self.exclusive = Counter()
+        self.inclusive = Counter()
+        self.calls = Counter()
+        self.functions: dict[int, list] = {}    # number -> [name, calls, cycles]
+        self.collapsed = Counter()
+        self.cycles = 0
+        self.instructions = 0
+        # Frame: [routine, return address, cycles at entry, stack key, BDOS function]
+        self.frames: list[list] = []
+        self.active = Counter()
+
+    def _push(self, name: str, ret: int, cycles: int, caller: int,
+              function: Optional[int] = None):
+        frames = self.frames
+        if len(frames) >= MAX_DEPTH:
+            self._unwind(0, cycles)
+        key = frames[-1][3] if frames else self.symbols.name(caller)
+        frames.append([name, ret, cycles, f"{key};{name}", function])
+        self.calls[name] += 1
+        self.active[name] += 1
+
+    def _unwind(self, depth: int, cycles: int):
+        """Pop frames down to depth, charging their inclusive cycles."""
+        frames = self.frames
+        while len(frames) > depth:
+            name, _, start, _, function = frames.pop()
+            self.active[name] -= 1
+            if not self.active[name]:   # Outermost instance of a recursive routine
+                self.inclusive[name] += cycles - start
+            if function is not None:
+                self.functions[function][2] += cycles - start
+
+    def _routine(self, target: int) -> str:
+        if target == 0x0005:
+            return "BDOS"
+        if self.bios <= target < self.bios_end:
+            return pysim.BIOS_ENTRIES[(target - self.bios) // 3].upper()
+        return self.symbols.name(target)
+
+    def record(self, m: pysim.Machine, pc: int, sp: int, op: int, cycles: int):
+        """Charge one instruction, executed at pc with stack sp, and follow its control transfer."""
+        frames = self.frames
+        self.instructions += 1
+        self.cycles += cycles
+        if frames:
+            name, key = frames[-1][0], frames[-1][3]
+        else:
+            name = key = self.symbols.name(pc)
+        self.exclusive[name] += cycles
+        self.collapsed[key] += cycles
+
+        new_pc = m.pc
+        if m.sp == (sp - 2) & 0xFFFF and ((op & 0xCF) == 0xCD
+                                           or (op & 0xC7) in (0xC4, 0xC7)):
+            # CALL, a taken Ccc, or RST: a new frame returning past the instruction
+            ret = (pc + (1 if (op & 0xC7) == 0xC7 else 3)) & 0xFFFF
+            if m.mem[m.sp] | (m.mem[(m.sp + 1) & 0xFFFF] << 8) == ret:
+                self._push(self._routine(new_pc), ret, m.cycles, pc)
+        elif frames and new_pc == frames[-1][1]:
+            depth = len(frames) - 1
+            while depth and frames[depth - 1][1] == new_pc:
+                depth -= 1              # A BDOS function frame shares its caller's return
+            self._unwind(depth, m.cycles)
+        elif frames and (op == 0xC9 or op == 0xD9 or (op & 0xC7) == 0xC0):
+            # A return past frames that were left without a RET
+            for depth in range(len(frames) - 1, -1, -1):
+                if frames[depth][1] == new_pc:
+                    while depth and frames[depth - 1][1] == new_pc:
+                        depth -= 1
+                    self._unwind(depth, m.cycles)
+                    break
+
+        if new_pc == self.bdos_entry:
+            function = m.r[1]
+            handler = self.ftable + 2 * function
+            name = (self.symbols.name(m.mem[handler] | (m.mem[handler + 1] << 8))
+                    if function < 45 else "BFRET")
+            self.functions.setdefault(function, [name, 0, 0])[1] += 1
+            ret = m.mem[m.sp] | (m.mem[(m.sp + 1) & 0xFFFF] << 8)
+            self._push(name, ret, m.cycles, pc, function)
+        elif new_pc == self.wboot:
+            self._unwind(0, m.cycles)
+
+    def finish(self, cycles: int):
+        """Close the frames still open when the run stopped."""
+        self._unwind(0, cycles)
+
+    def report(self, top: int = 25) -> str:
+        """Flat profile and BDOS function table as text."""
+        total = self.cycles or 1
+        lines = [f"{self.instructions} instructions, {self.cycles} cycles", "",
+                 f"{'routine':<16}{'calls':>9}{'exclusive':>13}{'%':>7}"
+                 f"{'inclusive':>13}{'%':>7}"]
+        for name, cyc in self.exclusive.most_common(top):
+            inc = self.inclusive.get(name, 0)
+            lines.append(f"{name:<16}{self.calls.get(name, 0):>9}{cyc:>13}"
+                         f"{cyc * 100 / total:>7.1f}{inc:>13}{inc * 100 / total:>7.1f}")
+        if self.functions:
+            lines += ["", f"{'BDOS function':<16}{'calls':>9}{'cycles':>13}{'%':>7}{'per call':>13}"]
+            for number, (name, calls, cyc) in sorted(self.functions.items(),
+                                                      key=lambda item: -item[1][2]):
+                lines.append(f"{number:>3} {name:<12}{calls:>9}{cyc:>13}"
+                             f"{cyc * 100 / total:>7.1f}{cyc // max(calls, 1):>13}")
+        return "\n".join(lines)
+
+    def write_collapsed(self, path: Path):
+        """Collapsed stacks, one "A;B;C cycles" line each, heaviest first."""
+        Path(path).write_text("".join(f"{key} {cyc}\n"
+                                      for key, cyc in self.collapsed.most_common()))
+
+
+class ProfiledMachine(pysim.Machine):
+    """pysim Machine that steps one instruction at a time while profile is set"""
+
+    profile: Optional[Profile] = None
+
+    def run(self, max_steps: int) -> int:
+        prof = self.profile
+        if prof is None:
+            return super().run(max_steps)
+        mem = self.mem
+        n = 0
+        while n < max_steps:
+            pc, sp, before = self.pc, self.sp, self.cycles
+            op = mem[pc]
+            if not super().run(1):
+                break
+            n += 1
+            prof.record(self, pc, sp, op, self.cycles - before)
+            if self.stop or self.halted:
+                break
+        return n
+
+
+def profile_commands(disk_dir: Path, commands: list[str], symbols: Symbols,
+                     timeout: Optional[float] = None,
+                     hle: Optional[dict] = None) -> tuple[Profile, str, str]:
+    """
+    Boot disk_dir/drivea.dsk to the prompt, then profile commands.
+
+    Disk images are written back afterwards, as pysim does.
+
+    Returns:
+        (profile, console output of the commands, stop reason)
+    """
+    machine = ProfiledMachine(disk_dir, hle=hle)
+    if not machine.boot():
+        raise FileNotFoundError(f"{machine.disk_path(0)} not found")
+    try:
+        reason = machine.run_until_idle(timeout=timeout)
+        if reason != "idle":
+            return Profile(symbols), machine.output(), reason
+        start = len(machine.console_out)
+        machine.profile = Profile(symbols)
+        machine.feed("".join(f"{cmd}\n" for cmd in commands).encode("latin-1"))
+        reason = machine.run_until_idle(timeout=timeout)
+        machine.profile.finish(machine.cycles)
+    finally:
+        machine.flush()
+    return machine.profile, machine.console_out[start:].decode("latin-1"), reason
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile LOLOS commands by routine")
+    parser.add_argument("commands", nargs="+", help="CCP command lines to run after boot")
+    parser.add_argument("--disks", type=Path, default=BUILD_DIR / "pysim" / "disks",
+                        help="Directory holding drivea.dsk (default: build/pysim/disks)")
+    parser.add_argument("--build", type=Path, default=BUILD_DIR,
+                        help="Directory holding the listings and layout.inc")
+    parser.add_argument("--top", type=int, default=25, help="Routines in the flat profile")
+    parser.add_argument("--collapsed", type=Path, help="Write collapsed stacks here")
+    parser.add_argument("--timeout", type=float, default=None, help="Wall-clock limit in seconds")
+    parser.add_argument("--hle", action="store_true",
+                        help="Run the console and disk BIOS entries in Python")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not echo console output")
+    args = parser.parse_args()
+
+    try:
+        symbols = Symbols(args.build)
+    except (FileNotFoundError, KeyError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    for command in args.commands:
+        program = command.split()[0].lower()
+        lst_file, asm_file = PROGRAMS_DIR / f"{program}.lst", PROGRAMS_DIR / f"{program}.asm"
+        if lst_file.exists() and asm_file.exists():
+            symbols.add_program(lst_file, asm_file)
+    hle = pysim.bios_symbols(args.build) if args.hle else None
+
+    try:
+        prof, output, reason = profile_commands(args.disks, args.commands, symbols,
+                                                args.timeout, hle)
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not args.quiet:
+        print(output)
+    print(prof.report(args.top))
+    if args.collapsed:
+        prof.write_collapsed(args.collapsed)
+        print(f"Wrote {args.collapsed}")
+    sys.exit(0 if reason in ("idle", "halt") else 2)
+
+
+if __name__ == '__main__':
+    main()